@@ -0,0 +1,73 @@
+"""Benchmark: memory per 10k session messages and per-turn get_history allocation.
+
+Compares the old dict-per-message layout (ISO timestamp string, rebuilt
+LLM dicts every turn) with SessionMessage records and the cached history view.
+
+Run with: python benchmarks/session_memory.py
+"""
+
+import tracemalloc
+from datetime import datetime
+
+from nanobot.session.manager import Session
+
+N = 10_000
+WINDOW = 50
+
+
+def _measure(build) -> tuple[int, object]:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, obj
+
+
+def build_dicts() -> list[dict]:
+    messages = []
+    for i in range(N):
+        messages.append({
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i}",
+            "timestamp": datetime.now().isoformat(),
+            "tools_used": ["read_file"] if i % 10 == 0 else None,
+        })
+    return messages
+
+
+def build_session() -> Session:
+    session = Session(key="bench:memory")
+    for i in range(N):
+        session.add_message(
+            "user" if i % 2 == 0 else "assistant",
+            f"message {i}",
+            tools_used=["read_file"] if i % 10 == 0 else None,
+        )
+    return session
+
+
+def history_alloc(get_history, turns: int = 100) -> int:
+    # Keep every result alive so freelists cannot hide the allocations
+    size, _ = _measure(lambda: [get_history() for _ in range(turns)])
+    return size // turns
+
+
+def main() -> None:
+    dict_bytes, dicts = _measure(build_dicts)
+    session_bytes, session = _measure(build_session)
+    # Content strings are identical in both layouts; the difference is per-message overhead
+    print(f"Memory per {N} messages:")
+    print(f"  dict messages:      {dict_bytes / 1024:8.1f} KiB")
+    print(f"  SessionMessage:     {session_bytes / 1024:8.1f} KiB")
+
+    old = history_alloc(lambda: [{"role": m["role"], "content": m["content"]} for m in dicts[-WINDOW:]])
+    session.get_history(max_messages=WINDOW)
+    new = history_alloc(lambda: session.get_history(max_messages=WINDOW))
+    print(f"get_history({WINDOW}) allocation per turn:")
+    print(f"  rebuilt dicts:      {old:8d} B")
+    print(f"  cached view:        {new:8d} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark: Tool.validate_params with compiled validators vs. walking the schema per call.
+
+Runs the argument sets from tests/test_tool_validation.py, plus one large
+nested array argument of the kind MCP tools receive, against the previous
+recursive `_validate` (reproduced below) and the cached compiled validator.
+
+Run with: python benchmarks/tool_validation.py
+"""
+
+import sys
+import timeit
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nanobot.agent.tools.base import Tool  # noqa: E402
+from tests.test_tool_validation import SampleTool  # noqa: E402
+
+NUMBER = 20_000
+
+CASES = {
+    "valid": {"query": "hi", "count": 2},
+    "missing required": {"query": "hi"},
+    "range": {"query": "hi", "count": 0},
+    "wrong type": {"query": "hi", "count": "2"},
+    "enum + minLength": {"query": "h", "count": 2, "mode": "slow"},
+    "nested": {"query": "hi", "count": 2, "meta": {"flags": [1, "ok"]}},
+    "unknown field": {"query": "hi", "count": 2, "extra": "x"},
+    "500 flags": {"query": "hi", "count": 2, "meta": {"tag": "t", "flags": ["f"] * 500}},
+}
+
+
+def legacy_validate(val: Any, schema: dict[str, Any], path: str) -> list[str]:
+    t, label = schema.get("type"), path or "parameter"
+    if t in Tool._TYPE_MAP and not isinstance(val, Tool._TYPE_MAP[t]):
+        return [f"{label} should be {t}"]
+
+    errors = []
+    if "enum" in schema and val not in schema["enum"]:
+        errors.append(f"{label} must be one of {schema['enum']}")
+    if t in ("integer", "number"):
+        if "minimum" in schema and val < schema["minimum"]:
+            errors.append(f"{label} must be >= {schema['minimum']}")
+        if "maximum" in schema and val > schema["maximum"]:
+            errors.append(f"{label} must be <= {schema['maximum']}")
+    if t == "string":
+        if "minLength" in schema and len(val) < schema["minLength"]:
+            errors.append(f"{label} must be at least {schema['minLength']} chars")
+        if "maxLength" in schema and len(val) > schema["maxLength"]:
+            errors.append(f"{label} must be at most {schema['maxLength']} chars")
+    if t == "object":
+        props = schema.get("properties", {})
+        for k in schema.get("required", []):
+            if k not in val:
+                errors.append(f"missing required {path + '.' + k if path else k}")
+        for k, v in val.items():
+            if k in props:
+                errors.extend(legacy_validate(v, props[k], path + '.' + k if path else k))
+    if t == "array" and "items" in schema:
+        for i, item in enumerate(val):
+            errors.extend(legacy_validate(item, schema["items"], f"{path}[{i}]" if path else f"[{i}]"))
+    return errors
+
+
+def main() -> None:
+    tool = SampleTool()
+
+    def legacy(params: dict[str, Any]) -> list[str]:
+        schema = tool.parameters or {}
+        return legacy_validate(params, {**schema, "type": "object"}, "")
+
+    print(f"{'case':<18} {'walk (us)':>10} {'compiled (us)':>14} {'speedup':>8}")
+    for name, params in CASES.items():
+        assert sorted(legacy(params)) == sorted(tool.validate_params(params)), name
+        number = NUMBER // 50 if name == "500 flags" else NUMBER
+        old = timeit.timeit(lambda: legacy(params), number=number) / number * 1e6
+        new = timeit.timeit(lambda: tool.validate_params(params), number=number) / number * 1e6
+        print(f"{name:<18} {old:10.2f} {new:14.2f} {old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@
  *   npm run build && npm start
  *   
  * Or with custom settings:
- *   BRIDGE_PORT=3001 AUTH_DIR=~/.nanobot/whatsapp npm start
+ *   BRIDGE_PORT=3001 AUTH_DIR=~/.nanobot/whatsapp MEDIA_DIR=~/.nanobot/media npm start
  */
 
 // Polyfill crypto for Baileys in ESM
@@ -25,12 +25,13 @@ import { join } from 'path';
 
 const PORT = parseInt(process.env.BRIDGE_PORT || '3001', 10);
 const AUTH_DIR = process.env.AUTH_DIR || join(homedir(), '.nanobot', 'whatsapp-auth');
+const MEDIA_DIR = process.env.MEDIA_DIR || join(homedir(), '.nanobot', 'media');
 const TOKEN = process.env.BRIDGE_TOKEN || undefined;
 
 console.log('🐈 nanobot WhatsApp Bridge');
 console.log('========================\n');
 
-const server = new BridgeServer(PORT, AUTH_DIR, TOKEN);
+const server = new BridgeServer(PORT, AUTH_DIR, MEDIA_DIR, TOKEN);
 
 // Handle graceful shutdown
 process.on('SIGINT', async () => {
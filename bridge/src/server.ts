@@ -6,6 +6,10 @@
 import { WebSocketServer, WebSocket } from 'ws';
 import { WhatsAppClient, InboundMessage } from './whatsapp.js';
 
+// Largest websocket frame either side accepts; nanobot's WhatsApp channel uses
+// the same limit. Media is handed over by path, so frames stay far below it.
+export const MAX_FRAME_BYTES = 32 * 1024 * 1024;
+
 interface SendCommand {
   type: 'send';
   to: string;
@@ -22,17 +26,23 @@ export class BridgeServer {
   private wa: WhatsAppClient | null = null;
   private clients: Set<WebSocket> = new Set();
 
-  constructor(private port: number, private authDir: string, private token?: string) {}
+  constructor(
+    private port: number,
+    private authDir: string,
+    private mediaDir: string,
+    private token?: string,
+  ) {}
 
   async start(): Promise<void> {
     // Bind to localhost only — never expose to external network
-    this.wss = new WebSocketServer({ host: '127.0.0.1', port: this.port });
+    this.wss = new WebSocketServer({ host: '127.0.0.1', port: this.port, maxPayload: MAX_FRAME_BYTES });
     console.log(`🌉 Bridge server listening on ws://127.0.0.1:${this.port}`);
     if (this.token) console.log('🔒 Token authentication enabled');
 
     // Initialize WhatsApp client
     this.wa = new WhatsAppClient({
       authDir: this.authDir,
+      mediaDir: this.mediaDir,
       onMessage: (msg) => this.broadcast({ type: 'message', ...msg }),
       onQR: (qr) => this.broadcast({ type: 'qr', qr }),
       onStatus: (status) => this.broadcast({ type: 'status', status }),
@@ -100,6 +110,10 @@ export class BridgeServer {
 
   private broadcast(msg: BridgeMessage): void {
     const data = JSON.stringify(msg);
+    if (Buffer.byteLength(data) > MAX_FRAME_BYTES) {
+      console.error(`Dropping ${msg.type} frame larger than ${MAX_FRAME_BYTES} bytes`);
+      return;
+    }
     for (const client of this.clients) {
       if (client.readyState === WebSocket.OPEN) {
         client.send(data);
@@ -9,13 +9,37 @@ import makeWASocket, {
   useMultiFileAuthState,
   fetchLatestBaileysVersion,
   makeCacheableSignalKeyStore,
+  downloadMediaMessage,
 } from '@whiskeysockets/baileys';
 
 import { Boom } from '@hapi/boom';
 import qrcode from 'qrcode-terminal';
 import pino from 'pino';
+import { createHash } from 'crypto';
+import { mkdir, rename, utimes, writeFile } from 'fs/promises';
+import { extname, join } from 'path';
 
 const VERSION = '0.1.0';
+export const MAX_MEDIA_BYTES = 20 * 1024 * 1024; // 20MB
+
+const MIME_EXTENSIONS: Record<string, string> = {
+  'image/jpeg': '.jpg',
+  'image/png': '.png',
+  'image/webp': '.webp',
+  'image/gif': '.gif',
+  'audio/ogg': '.ogg',
+  'audio/mpeg': '.mp3',
+  'audio/mp4': '.m4a',
+  'video/mp4': '.mp4',
+  'application/pdf': '.pdf',
+};
+
+export interface InboundMedia {
+  mimetype: string;
+  fileName?: string;
+  path: string; // File in the shared media store (content-addressed by sha256)
+  size: number;
+}
 
 export interface InboundMessage {
   id: string;
@@ -24,10 +48,12 @@ export interface InboundMessage {
   content: string;
   timestamp: number;
   isGroup: boolean;
+  media?: InboundMedia[];
 }
 
 export interface WhatsAppClientOptions {
   authDir: string;
+  mediaDir: string;
   onMessage: (msg: InboundMessage) => void;
   onQR: (qr: string) => void;
   onStatus: (status: string) => void;
@@ -109,16 +135,21 @@ export class WhatsAppClient {
     this.sock.ev.on('messages.upsert', async ({ messages, type }: { messages: any[]; type: string }) => {
       if (type !== 'notify') return;
 
-      for (const msg of messages) {
+      const inbound = messages.flatMap((msg) => {
         // Skip own messages
-        if (msg.key.fromMe) continue;
+        if (msg.key.fromMe) return [];
 
         // Skip status updates
-        if (msg.key.remoteJid === 'status@broadcast') continue;
+        if (msg.key.remoteJid === 'status@broadcast') return [];
 
         const content = this.extractMessageContent(msg);
-        if (!content) continue;
+        return content ? [{ msg, content }] : [];
+      });
+
+      // Download attachments concurrently, then forward the messages in order
+      const media = await Promise.all(inbound.map(({ msg }) => this.downloadMedia(msg)));
 
+      inbound.forEach(({ msg, content }, i) => {
         const isGroup = msg.key.remoteJid?.endsWith('@g.us') || false;
 
         this.options.onMessage({
@@ -128,8 +159,9 @@ export class WhatsAppClient {
           content,
           timestamp: msg.messageTimestamp as number,
           isGroup,
+          ...(media[i] ? { media: [media[i]!] } : {}),
         });
-      }
+      });
     });
   }
 
@@ -147,19 +179,19 @@ export class WhatsAppClient {
       return message.extendedTextMessage.text;
     }
 
-    // Image with caption
-    if (message.imageMessage?.caption) {
-      return `[Image] ${message.imageMessage.caption}`;
+    // Image (caption optional; the file itself is forwarded as media)
+    if (message.imageMessage) {
+      return message.imageMessage.caption ? `[Image] ${message.imageMessage.caption}` : '[Image]';
     }
 
-    // Video with caption
-    if (message.videoMessage?.caption) {
-      return `[Video] ${message.videoMessage.caption}`;
+    // Video
+    if (message.videoMessage) {
+      return message.videoMessage.caption ? `[Video] ${message.videoMessage.caption}` : '[Video]';
     }
 
-    // Document with caption
-    if (message.documentMessage?.caption) {
-      return `[Document] ${message.documentMessage.caption}`;
+    // Document
+    if (message.documentMessage) {
+      return message.documentMessage.caption ? `[Document] ${message.documentMessage.caption}` : '[Document]';
     }
 
     // Voice/Audio message
@@ -170,6 +202,64 @@ export class WhatsAppClient {
     return null;
   }
 
+  private async downloadMedia(msg: any): Promise<InboundMedia | null> {
+    const message = msg.message;
+    const media =
+      message?.imageMessage || message?.audioMessage || message?.videoMessage || message?.documentMessage;
+    if (!media) return null;
+
+    if (Number(media.fileLength || 0) > MAX_MEDIA_BYTES) {
+      console.log(`Skipping media larger than ${MAX_MEDIA_BYTES} bytes`);
+      return null;
+    }
+
+    try {
+      const buffer = (await downloadMediaMessage(msg, 'buffer', {})) as Buffer;
+      if (buffer.length > MAX_MEDIA_BYTES) {
+        console.log(`Skipping media larger than ${MAX_MEDIA_BYTES} bytes`);
+        return null;
+      }
+      const mimetype = media.mimetype || 'application/octet-stream';
+      return {
+        mimetype,
+        fileName: media.fileName || undefined,
+        path: await this.saveMedia(buffer, this.extensionFor(mimetype, media.fileName)),
+        size: buffer.length,
+      };
+    } catch (error) {
+      console.error('Failed to download media:', error);
+      return null;
+    }
+  }
+
+  /**
+   * Write media into the store shared with nanobot, laid out as
+   * `<sha256[:2]>/<sha256><ext>`, so only its path crosses the websocket.
+   */
+  private async saveMedia(buffer: Buffer, ext: string): Promise<string> {
+    const digest = createHash('sha256').update(buffer).digest('hex');
+    const dir = join(this.options.mediaDir, digest.slice(0, 2));
+    const path = join(dir, `${digest}${ext}`);
+    try {
+      const now = new Date();
+      await utimes(path, now, now); // Already stored; refresh its recency
+      return path;
+    } catch {
+      // Not stored yet
+    }
+    await mkdir(dir, { recursive: true });
+    const tmp = join(dir, `.tmp-${process.pid}-${digest}`);
+    await writeFile(tmp, buffer);
+    await rename(tmp, path);
+    return path;
+  }
+
+  private extensionFor(mimetype: string, fileName?: string): string {
+    const suffix = fileName ? extname(fileName).toLowerCase() : '';
+    const ext = suffix || MIME_EXTENSIONS[mimetype.split(';')[0].trim().toLowerCase()] || '';
+    return /^\.[a-z0-9]{1,9}$/.test(ext) ? ext : '';
+  }
+
   async sendMessage(to: string, text: string): Promise<void> {
     if (!this.sock) {
       throw new Error('Not connected');
@@ -1,13 +1,17 @@
 """Context builder for assembling agent prompts."""
 
-import base64
-import mimetypes
 import platform
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
 
 from nanobot.agent.memory import MemoryStore
 from nanobot.agent.skills import SkillsLoader
+from nanobot.media import get_media_store
+
+if TYPE_CHECKING:
+    from nanobot.config.schema import MemoryRetrievalConfig
 
 
 class ContextBuilder:
@@ -20,17 +24,35 @@ class ContextBuilder:
     
     BOOTSTRAP_FILES = ["AGENTS.md", "SOUL.md", "USER.md", "TOOLS.md", "IDENTITY.md"]
     
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, memory_retrieval: "MemoryRetrievalConfig | None" = None):
         self.workspace = workspace
-        self.memory = MemoryStore(workspace)
+        self.memory = self._make_memory_store(workspace, memory_retrieval)
         self.skills = SkillsLoader(workspace)
+
+    @staticmethod
+    def _make_memory_store(workspace: Path, config: "MemoryRetrievalConfig | None") -> MemoryStore:
+        """Create the memory store, with relevance-based retrieval if enabled and available."""
+        if not config or not config.enabled:
+            return MemoryStore(workspace)
+        from nanobot.agent.memory_retrieval import NUMPY_AVAILABLE, MemoryRetriever, make_embedder
+        if not NUMPY_AVAILABLE:
+            logger.info("Memory retrieval disabled: numpy is not installed")
+            return MemoryStore(workspace)
+        retriever = MemoryRetriever(workspace, embedder=make_embedder(config.embedding_model))
+        return MemoryStore(
+            workspace,
+            retriever=retriever,
+            max_memory_chars=config.max_memory_chars,
+            top_k=config.top_k,
+        )
     
-    def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
+    def build_system_prompt(self, skill_names: list[str] | None = None, query: str | None = None) -> str:
         """
         Build the system prompt from bootstrap files, memory, and skills.
         
         Args:
             skill_names: Optional list of skills to include.
+            query: Current user message, used to pick relevant memory.
         
         Returns:
             Complete system prompt.
@@ -46,7 +68,7 @@ class ContextBuilder:
             parts.append(bootstrap)
         
         # Memory context
-        memory = self.memory.get_memory_context()
+        memory = self.memory.get_memory_context(query)
         if memory:
             parts.append(f"# Memory\n\n{memory}")
         
@@ -98,7 +120,7 @@ You are nanobot, a helpful AI assistant. You have access to tools that allow you
 ## Workspace
 Your workspace is at: {workspace_path}
 - Long-term memory: {workspace_path}/memory/MEMORY.md
-- History log: {workspace_path}/memory/HISTORY.md (grep-searchable)
+- History log: {workspace_path}/memory/HISTORY.md (searchable with search_memory)
 - Custom skills: {workspace_path}/skills/{{skill-name}}/SKILL.md
 
 IMPORTANT: When responding to direct questions or conversations, reply directly with your text response.
@@ -107,7 +129,7 @@ For normal conversation, just respond with text - do not call the message tool.
 
 Always be helpful, accurate, and concise. When using tools, think step by step: what you know, what you need, and why you chose this tool.
 When remembering something important, write to {workspace_path}/memory/MEMORY.md
-To recall past events, grep {workspace_path}/memory/HISTORY.md"""
+To recall past events or earlier conversations, use the search_memory tool"""
     
     def _load_bootstrap_files(self) -> str:
         """Load all bootstrap files from workspace."""
@@ -121,7 +143,7 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         
         return "\n\n".join(parts) if parts else ""
     
-    def build_messages(
+    async def build_messages(
         self,
         history: list[dict[str, Any]],
         current_message: str,
@@ -147,7 +169,7 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         messages = []
 
         # System prompt
-        system_prompt = self.build_system_prompt(skill_names)
+        system_prompt = self.build_system_prompt(skill_names, query=current_message)
         if channel and chat_id:
             system_prompt += f"\n\n## Current Session\nChannel: {channel}\nChat ID: {chat_id}"
         messages.append({"role": "system", "content": system_prompt})
@@ -156,24 +178,18 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         messages.extend(history)
 
         # Current message (with optional image attachments)
-        user_content = self._build_user_content(current_message, media)
+        user_content = await self._build_user_content(current_message, media)
         messages.append({"role": "user", "content": user_content})
 
         return messages
 
-    def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
+    async def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
         """Build user message content with optional base64-encoded images."""
         if not media:
             return text
         
-        images = []
-        for path in media:
-            p = Path(path)
-            mime, _ = mimetypes.guess_type(path)
-            if not p.is_file() or not mime or not mime.startswith("image/"):
-                continue
-            b64 = base64.b64encode(p.read_bytes()).decode()
-            images.append({"type": "image_url", "image_url": {"url": f"data:{mime};base64,{b64}"}})
+        urls = await get_media_store().image_data_urls(media)
+        images = [{"type": "image_url", "image_url": {"url": url}} for url in urls]
         
         if not images:
             return text
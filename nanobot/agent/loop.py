@@ -1,11 +1,12 @@
 """Agent loop: the core processing engine."""
 
 import asyncio
-from contextlib import AsyncExitStack
+from collections import deque
+from dataclasses import dataclass, field
 import json
-import json_repair
+import sqlite3
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable
 
 from loguru import logger
 
@@ -13,6 +14,7 @@ from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.providers.base import LLMProvider
 from nanobot.agent.context import ContextBuilder
+from nanobot.agent.tools.cache import ToolResultCache
 from nanobot.agent.tools.registry import ToolRegistry
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
 from nanobot.agent.tools.shell import ExecTool
@@ -20,10 +22,34 @@ from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
 from nanobot.agent.tools.message import MessageTool
 from nanobot.agent.tools.spawn import SpawnTool
 from nanobot.agent.tools.cron import CronTool
-from nanobot.agent.memory import MemoryStore
+from nanobot.agent.tools.memory import SearchMemoryTool
+from nanobot.agent.tools.router import ListToolsTool, ToolRouter, ToolSelection, current_selection
+from nanobot.agent.tools.results import ReadResultTool, ResultStore
+from nanobot.agent.memory import MemoryConsolidator
+from nanobot.agent.memory_index import MemoryIndex
 from nanobot.agent.subagent import SubagentManager
 from nanobot.session.manager import Session, SessionManager
 
+if TYPE_CHECKING:
+    from nanobot.agent.tools.mcp import MCPManager
+
+
+class TurnPreemptedError(Exception):
+    """Raised inside a turn when a newer message for the same session preempts it."""
+
+    def __init__(self, tools_used: list[str], steps: list[str]):
+        super().__init__("turn preempted by a newer message")
+        self.tools_used = tools_used
+        self.steps = steps
+
+
+@dataclass
+class _Turn:
+    """A turn running in the background while the loop keeps reading the bus."""
+    msg: InboundMessage
+    task: asyncio.Task
+    preempt: asyncio.Event = field(default_factory=asyncio.Event)
+
 
 class AgentLoop:
     """
@@ -53,8 +79,18 @@ class AgentLoop:
         restrict_to_workspace: bool = False,
         session_manager: SessionManager | None = None,
         mcp_servers: dict | None = None,
+        tool_routing: "ToolRoutingConfig | None" = None,
+        tool_cache: "ToolResultCacheConfig | None" = None,
+        result_spill: "ResultSpillConfig | None" = None,
+        consolidation_model: str | None = None,
+        memory_retrieval: "MemoryRetrievalConfig | None" = None,
+        preempt_turns: bool = True,
+        subagent_config: "SubagentConfig | None" = None,
+        provider_factory: Callable[[], LLMProvider] | None = None,
     ):
-        from nanobot.config.schema import ExecToolConfig
+        from nanobot.config.schema import (
+            ExecToolConfig, MemoryRetrievalConfig, ResultSpillConfig, ToolResultCacheConfig, ToolRoutingConfig,
+        )
         from nanobot.cron.service import CronService
         self.bus = bus
         self.provider = provider
@@ -68,10 +104,41 @@ class AgentLoop:
         self.exec_config = exec_config or ExecToolConfig()
         self.cron_service = cron_service
         self.restrict_to_workspace = restrict_to_workspace
+        self.preempt_turns = preempt_turns
 
-        self.context = ContextBuilder(workspace)
+        self.context = ContextBuilder(workspace, memory_retrieval=memory_retrieval or MemoryRetrievalConfig())
         self.sessions = session_manager or SessionManager(workspace)
-        self.tools = ToolRegistry()
+        self.consolidator = MemoryConsolidator(
+            provider=provider,
+            workspace=workspace,
+            sessions=self.sessions,
+            memory_window=memory_window,
+            model=consolidation_model or self.model,
+            on_update=retriever.schedule_sync if (retriever := self.context.memory.retriever) else None,
+        )
+        tool_cache = tool_cache or ToolResultCacheConfig()
+        self.tools = ToolRegistry(
+            cache=ToolResultCache(ttl=tool_cache.ttl_seconds, max_entries=tool_cache.max_entries)
+            if tool_cache.enabled else None,
+        )
+        result_spill = result_spill or ResultSpillConfig()
+        self.results: ResultStore | None = None
+        if result_spill.enabled:
+            self.results = ResultStore(
+                workspace / ".scratch" / "tool_results",
+                threshold=result_spill.threshold_chars,
+                preview_chars=result_spill.preview_chars,
+                retention_hours=result_spill.retention_hours,
+            )
+        tool_routing = tool_routing or ToolRoutingConfig()
+        self.router: ToolRouter | None = None
+        if tool_routing.enabled:
+            self.router = ToolRouter(
+                self.tools,
+                max_tools=tool_routing.max_tools,
+                core_tools=tool_routing.core_tools,
+                embedding_model=(memory_retrieval or MemoryRetrievalConfig()).embedding_model,
+            )
         self.subagents = SubagentManager(
             provider=provider,
             workspace=workspace,
@@ -82,11 +149,13 @@ class AgentLoop:
             brave_api_key=brave_api_key,
             exec_config=self.exec_config,
             restrict_to_workspace=restrict_to_workspace,
+            config=subagent_config,
+            provider_factory=provider_factory,
         )
         
         self._running = False
         self._mcp_servers = mcp_servers or {}
-        self._mcp_stack: AsyncExitStack | None = None
+        self._mcp: "MCPManager | None" = None
         self._mcp_connected = False
         self._register_default_tools()
     
@@ -121,6 +190,21 @@ class AgentLoop:
         # Cron tool (for scheduling)
         if self.cron_service:
             self.tools.register(CronTool(self.cron_service))
+
+        # Memory search tool (needs SQLite with FTS5)
+        try:
+            index = MemoryIndex(self.workspace, sessions_dir=self.sessions.sessions_dir)
+            self.tools.register(SearchMemoryTool(index))
+        except sqlite3.Error as e:
+            logger.warning(f"Memory search disabled: {e}")
+
+        # Paging through large results that were spilled to the workspace
+        if self.results:
+            self.tools.register(ReadResultTool(self.results))
+
+        # Tool search (escape hatch for tools routing left out of a turn)
+        if self.router:
+            self.tools.register(ListToolsTool(self.router))
     
     async def _connect_mcp(self) -> None:
         """Connect to configured MCP servers (one-time, lazy)."""
@@ -128,9 +212,7 @@ class AgentLoop:
             return
         self._mcp_connected = True
         from nanobot.agent.tools.mcp import connect_mcp_servers
-        self._mcp_stack = AsyncExitStack()
-        await self._mcp_stack.__aenter__()
-        await connect_mcp_servers(self._mcp_servers, self.tools, self._mcp_stack)
+        self._mcp = await connect_mcp_servers(self._mcp_servers, self.tools)
 
     def _set_tool_context(self, channel: str, chat_id: str) -> None:
         """Update context for all tools that need routing info."""
@@ -146,31 +228,64 @@ class AgentLoop:
             if isinstance(cron_tool, CronTool):
                 cron_tool.set_context(channel, chat_id)
 
-    async def _run_agent_loop(self, initial_messages: list[dict]) -> tuple[str | None, list[str]]:
+    def _format_subagent_status(self, session_key: str) -> str:
+        """Render the /tasks reply for one chat."""
+        tasks = self.subagents.get_status(session_key)
+        if not tasks:
+            return "No background tasks."
+        lines = [
+            f"Background tasks ({self.subagents.get_running_count()} running, "
+            f"{self.subagents.get_queued_count()} queued overall):"
+        ]
+        for t in tasks:
+            if t["status"] == "queued":
+                detail = f"waiting {t['waited']:.0f}s"
+            else:
+                detail = f"{t['elapsed']:.0f}s, {t['iterations']} steps, {t['tokens']} tokens"
+            lines.append(f"- [{t['id']}] {t['label']} — {t['status']} ({detail})")
+        return "\n".join(lines)
+
+    async def _run_agent_loop(
+        self,
+        initial_messages: list[dict],
+        preempt: asyncio.Event | None = None,
+        selection: ToolSelection | None = None,
+    ) -> tuple[str | None, list[str]]:
         """
         Run the agent iteration loop.
 
+        If `preempt` gets set, the turn stops at the next safe point: a pending
+        LLM call is abandoned, but a tool that is already running is allowed to
+        finish so its side effects are never cut off half-way.
+
         Args:
             initial_messages: Starting messages for the LLM conversation.
+            preempt: Event signalling that a newer message superseded this turn.
+            selection: This turn's routed tool subset (None sends every tool).
 
         Returns:
             Tuple of (final_content, list_of_tools_used).
+
+        Raises:
+            TurnPreemptedError: If `preempt` was set before the turn finished.
         """
         messages = initial_messages
         iteration = 0
         final_content = None
         tools_used: list[str] = []
+        steps: list[str] = []
+
+        def check_preempted() -> None:
+            if preempt is not None and preempt.is_set():
+                raise TurnPreemptedError(tools_used, steps)
 
+        current_selection.set(selection)  # Task-local: only this turn's list_tools calls see it
         while iteration < self.max_iterations:
             iteration += 1
 
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            check_preempted()
+            response = await self._chat_unless_preempted(messages, preempt, selection)
+            check_preempted()
 
             if response.has_tool_calls:
                 tool_call_dicts = [
@@ -190,10 +305,14 @@ class AgentLoop:
                 )
 
                 for tool_call in response.tool_calls:
+                    check_preempted()
                     tools_used.append(tool_call.name)
                     args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
                     logger.info(f"Tool call: {tool_call.name}({args_str[:200]})")
                     result = await self.tools.execute(tool_call.name, tool_call.arguments)
+                    if self.results:
+                        result = self.results.spill(tool_call.name, result)
+                    steps.append(f"{tool_call.name}({args_str[:100]}) -> {result[:200]}")
                     messages = self.context.add_tool_result(
                         messages, tool_call.id, tool_call.name, result
                     )
@@ -202,55 +321,136 @@ class AgentLoop:
                 final_content = response.content
                 break
 
+        if selection and selection.saved_tokens:
+            logger.debug(f"Tool routing saved ~{selection.saved_tokens} schema tokens this turn")
         return final_content, tools_used
 
+    async def _chat_unless_preempted(
+        self,
+        messages: list[dict],
+        preempt: asyncio.Event | None,
+        selection: ToolSelection | None = None,
+    ):
+        """Call the LLM, abandoning the call (returns None) if the turn gets preempted meanwhile."""
+        chat = self.provider.chat(
+            messages=messages,
+            tools=selection.definitions() if selection else self.tools.get_definitions(),
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+        )
+        if preempt is None:
+            return await chat
+
+        chat_task = asyncio.ensure_future(chat)
+        preempt_task = asyncio.ensure_future(preempt.wait())
+        try:
+            await asyncio.wait({chat_task, preempt_task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            preempt_task.cancel()
+            if not chat_task.done():
+                chat_task.cancel()
+        # A chat task still pending here was just cancelled because of preemption
+        return chat_task.result() if chat_task.done() else None
+
     async def run(self) -> None:
-        """Run the agent loop, processing messages from the bus."""
+        """
+        Run the agent loop, processing messages from the bus.
+
+        Turns run one at a time, but the bus keeps being read while a turn is
+        in flight so that a newer message for the same session can preempt it.
+        """
         self._running = True
         await self._connect_mcp()
         logger.info("Agent loop started")
+        if resumed := await self.subagents.resume():
+            logger.info(f"Resumed {resumed} interrupted subagent task(s)")
 
-        while self._running:
-            try:
-                msg = await asyncio.wait_for(
-                    self.bus.consume_inbound(),
-                    timeout=1.0
-                )
-                try:
-                    response = await self._process_message(msg)
-                    if response:
-                        await self.bus.publish_outbound(response)
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
-                    await self.bus.publish_outbound(OutboundMessage(
-                        channel=msg.channel,
-                        chat_id=msg.chat_id,
-                        content=f"Sorry, I encountered an error: {str(e)}"
-                    ))
-            except asyncio.TimeoutError:
-                continue
+        pending: deque[InboundMessage] = deque()
+        getter: asyncio.Task | None = None
+        turn: _Turn | None = None
+        try:
+            while self._running:
+                if turn is None and pending:
+                    msg = pending.popleft()
+                    preempt = asyncio.Event()
+                    turn = _Turn(msg, asyncio.create_task(self._process_message(msg, preempt=preempt)), preempt)
+                if getter is None:
+                    getter = asyncio.create_task(self.bus.consume_inbound())
+
+                waiting = {getter, turn.task} if turn else {getter}
+                done, _ = await asyncio.wait(waiting, timeout=1.0, return_when=asyncio.FIRST_COMPLETED)
+
+                if getter in done:
+                    new_msg = getter.result()
+                    getter = None
+                    if turn and not turn.preempt.is_set() and self._should_preempt(turn.msg, new_msg):
+                        logger.info(f"Newer message for {new_msg.session_key}, preempting the running turn")
+                        turn.preempt.set()
+                    pending.append(new_msg)
+
+                if turn and turn.task.done():
+                    await self._finish_turn(turn)
+                    turn = None
+        finally:
+            if getter:
+                getter.cancel()
+            if turn:
+                turn.task.cancel()
+
+    def _should_preempt(self, current: InboundMessage, new: InboundMessage) -> bool:
+        return (
+            self.preempt_turns
+            and current.channel != "system"
+            and new.channel != "system"
+            and new.session_key == current.session_key
+        )
+
+    async def _finish_turn(self, turn: _Turn) -> None:
+        """Publish a finished turn's response (or its error)."""
+        msg = turn.msg
+        try:
+            response = turn.task.result()
+            if response:
+                await self.bus.publish_outbound(response)
+        except Exception as e:
+            logger.error(f"Error processing message: {e}")
+            await self.bus.publish_outbound(OutboundMessage(
+                channel=msg.channel,
+                chat_id=msg.chat_id,
+                content=f"Sorry, I encountered an error: {str(e)}"
+            ))
     
+    async def close(self, consolidation_timeout: float = 30.0) -> None:
+        """Finish queued memory consolidation (up to the timeout) and close MCP connections."""
+        await self.consolidator.shutdown(consolidation_timeout)
+        await self.close_mcp()
+
     async def close_mcp(self) -> None:
         """Close MCP connections."""
-        if self._mcp_stack:
-            try:
-                await self._mcp_stack.aclose()
-            except (RuntimeError, BaseExceptionGroup):
-                pass  # MCP SDK cancel scope cleanup is noisy but harmless
-            self._mcp_stack = None
+        if self._mcp:
+            await self._mcp.close()
+            self._mcp = None
 
     def stop(self) -> None:
         """Stop the agent loop."""
         self._running = False
+        self.subagents.shutdown()
         logger.info("Agent loop stopping")
     
-    async def _process_message(self, msg: InboundMessage, session_key: str | None = None) -> OutboundMessage | None:
+    async def _process_message(
+        self,
+        msg: InboundMessage,
+        session_key: str | None = None,
+        preempt: asyncio.Event | None = None,
+    ) -> OutboundMessage | None:
         """
         Process a single inbound message.
         
         Args:
             msg: The inbound message to process.
             session_key: Override session key (used by process_direct).
+            preempt: Set by the run loop when a newer message supersedes this one.
         
         Returns:
             The response message, or None if no response needed.
@@ -263,41 +463,45 @@ class AgentLoop:
         logger.info(f"Processing message from {msg.channel}:{msg.sender_id}: {preview}")
         
         key = session_key or msg.session_key
-        session = self.sessions.get_or_create(key)
+        session = self.sessions.get_or_create(key, tail=self.memory_window)
         
         # Handle slash commands
         cmd = msg.content.strip().lower()
         if cmd == "/new":
             # Capture messages before clearing (avoid race condition with background task)
-            messages_to_archive = session.messages.copy()
+            messages_to_archive = self.sessions.load_messages(session)
             session.clear()
             self.sessions.save(session)
             self.sessions.invalidate(session.key)
-
-            async def _consolidate_and_cleanup():
-                temp_session = Session(key=session.key)
-                temp_session.messages = messages_to_archive
-                await self._consolidate_memory(temp_session, archive_all=True)
-
-            asyncio.create_task(_consolidate_and_cleanup())
+            self.consolidator.archive(session.key, messages_to_archive)
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
                                   content="New session started. Memory consolidation in progress.")
+        if cmd == "/tasks":
+            return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
+                                  content=self._format_subagent_status(f"{msg.channel}:{msg.chat_id}"))
         if cmd == "/help":
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
-                                  content="🐈 nanobot commands:\n/new — Start a new conversation\n/help — Show available commands")
+                                  content="🐈 nanobot commands:\n/new — Start a new conversation\n"
+                                          "/tasks — Show background tasks\n/help — Show available commands")
         
-        if len(session.messages) > self.memory_window:
-            asyncio.create_task(self._consolidate_memory(session))
+        self.consolidator.schedule(session)
 
         self._set_tool_context(msg.channel, msg.chat_id)
-        initial_messages = self.context.build_messages(
+        selection = self.router.begin_turn(msg.content) if self.router else None
+        initial_messages = await self.context.build_messages(
             history=session.get_history(max_messages=self.memory_window),
             current_message=msg.content,
             media=msg.media if msg.media else None,
             channel=msg.channel,
             chat_id=msg.chat_id,
         )
-        final_content, tools_used = await self._run_agent_loop(initial_messages)
+        try:
+            final_content, tools_used = await self._run_agent_loop(
+                initial_messages, preempt=preempt, selection=selection,
+            )
+        except TurnPreemptedError as e:
+            self._fold_preempted_turn(session, msg.content, e)
+            return None
 
         if final_content is None:
             final_content = "I've completed processing but have no response to give."
@@ -317,6 +521,16 @@ class AgentLoop:
             metadata=msg.metadata or {},  # Pass through for channel-specific needs (e.g. Slack thread_ts)
         )
     
+    def _fold_preempted_turn(self, session: Session, content: str, preempted: TurnPreemptedError) -> None:
+        """Record a preempted turn in the session so the next turn sees what was already done."""
+        logger.info(f"Turn for {session.key} preempted after {len(preempted.steps)} tool call(s)")
+        note = "[Interrupted by a newer message before finishing.]"
+        if preempted.steps:
+            note += " Steps already completed:\n" + "\n".join(f"- {step}" for step in preempted.steps)
+        session.add_message("user", content)
+        session.add_message("assistant", note, tools_used=preempted.tools_used or None)
+        self.sessions.save(session)
+
     async def _process_system_message(self, msg: InboundMessage) -> OutboundMessage | None:
         """
         Process a system message (e.g., subagent announce).
@@ -337,15 +551,16 @@ class AgentLoop:
             origin_chat_id = msg.chat_id
         
         session_key = f"{origin_channel}:{origin_chat_id}"
-        session = self.sessions.get_or_create(session_key)
+        session = self.sessions.get_or_create(session_key, tail=self.memory_window)
         self._set_tool_context(origin_channel, origin_chat_id)
-        initial_messages = self.context.build_messages(
+        selection = self.router.begin_turn(msg.content) if self.router else None
+        initial_messages = await self.context.build_messages(
             history=session.get_history(max_messages=self.memory_window),
             current_message=msg.content,
             channel=origin_channel,
             chat_id=origin_chat_id,
         )
-        final_content, _ = await self._run_agent_loop(initial_messages)
+        final_content, _ = await self._run_agent_loop(initial_messages, selection=selection)
 
         if final_content is None:
             final_content = "Background task completed."
@@ -360,91 +575,6 @@ class AgentLoop:
             content=final_content
         )
     
-    async def _consolidate_memory(self, session, archive_all: bool = False) -> None:
-        """Consolidate old messages into MEMORY.md + HISTORY.md.
-
-        Args:
-            archive_all: If True, clear all messages and reset session (for /new command).
-                       If False, only write to files without modifying session.
-        """
-        memory = MemoryStore(self.workspace)
-
-        if archive_all:
-            old_messages = session.messages
-            keep_count = 0
-            logger.info(f"Memory consolidation (archive_all): {len(session.messages)} total messages archived")
-        else:
-            keep_count = self.memory_window // 2
-            if len(session.messages) <= keep_count:
-                logger.debug(f"Session {session.key}: No consolidation needed (messages={len(session.messages)}, keep={keep_count})")
-                return
-
-            messages_to_process = len(session.messages) - session.last_consolidated
-            if messages_to_process <= 0:
-                logger.debug(f"Session {session.key}: No new messages to consolidate (last_consolidated={session.last_consolidated}, total={len(session.messages)})")
-                return
-
-            old_messages = session.messages[session.last_consolidated:-keep_count]
-            if not old_messages:
-                return
-            logger.info(f"Memory consolidation started: {len(session.messages)} total, {len(old_messages)} new to consolidate, {keep_count} keep")
-
-        lines = []
-        for m in old_messages:
-            if not m.get("content"):
-                continue
-            tools = f" [tools: {', '.join(m['tools_used'])}]" if m.get("tools_used") else ""
-            lines.append(f"[{m.get('timestamp', '?')[:16]}] {m['role'].upper()}{tools}: {m['content']}")
-        conversation = "\n".join(lines)
-        current_memory = memory.read_long_term()
-
-        prompt = f"""You are a memory consolidation agent. Process this conversation and return a JSON object with exactly two keys:
-
-1. "history_entry": A paragraph (2-5 sentences) summarizing the key events/decisions/topics. Start with a timestamp like [YYYY-MM-DD HH:MM]. Include enough detail to be useful when found by grep search later.
-
-2. "memory_update": The updated long-term memory content. Add any new facts: user location, preferences, personal info, habits, project context, technical decisions, tools/services used. If nothing new, return the existing content unchanged.
-
-## Current Long-term Memory
-{current_memory or "(empty)"}
-
-## Conversation to Process
-{conversation}
-
-Respond with ONLY valid JSON, no markdown fences."""
-
-        try:
-            response = await self.provider.chat(
-                messages=[
-                    {"role": "system", "content": "You are a memory consolidation agent. Respond only with valid JSON."},
-                    {"role": "user", "content": prompt},
-                ],
-                model=self.model,
-            )
-            text = (response.content or "").strip()
-            if not text:
-                logger.warning("Memory consolidation: LLM returned empty response, skipping")
-                return
-            if text.startswith("```"):
-                text = text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
-            result = json_repair.loads(text)
-            if not isinstance(result, dict):
-                logger.warning(f"Memory consolidation: unexpected response type, skipping. Response: {text[:200]}")
-                return
-
-            if entry := result.get("history_entry"):
-                memory.append_history(entry)
-            if update := result.get("memory_update"):
-                if update != current_memory:
-                    memory.write_long_term(update)
-
-            if archive_all:
-                session.last_consolidated = 0
-            else:
-                session.last_consolidated = len(session.messages) - keep_count
-            logger.info(f"Memory consolidation done: {len(session.messages)} messages, last_consolidated={session.last_consolidated}")
-        except Exception as e:
-            logger.error(f"Memory consolidation failed: {e}")
-
     async def process_direct(
         self,
         content: str,
@@ -1,17 +1,37 @@
 """Memory system for persistent agent memory."""
 
+import asyncio
+import os
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+import json_repair
+from loguru import logger
 
 from nanobot.utils.helpers import ensure_dir
 
+if TYPE_CHECKING:
+    from nanobot.agent.memory_retrieval import MemoryRetriever
+    from nanobot.providers.base import LLMProvider
+    from nanobot.session.manager import Session, SessionManager
+
 
 class MemoryStore:
-    """Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (grep-searchable log)."""
+    """Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (searchable log)."""
 
-    def __init__(self, workspace: Path):
+    def __init__(
+        self,
+        workspace: Path,
+        retriever: "MemoryRetriever | None" = None,
+        max_memory_chars: int = 4000,
+        top_k: int = 5,
+    ):
         self.memory_dir = ensure_dir(workspace / "memory")
         self.memory_file = self.memory_dir / "MEMORY.md"
         self.history_file = self.memory_dir / "HISTORY.md"
+        self.retriever = retriever
+        self.max_memory_chars = max_memory_chars
+        self.top_k = top_k
 
     def read_long_term(self) -> str:
         if self.memory_file.exists():
@@ -19,12 +39,228 @@ class MemoryStore:
         return ""
 
     def write_long_term(self, content: str) -> None:
-        self.memory_file.write_text(content, encoding="utf-8")
+        # Write to a temp file and rename so readers never see a partial MEMORY.md
+        tmp_file = self.memory_file.with_suffix(".md.tmp")
+        tmp_file.write_text(content, encoding="utf-8")
+        os.replace(tmp_file, self.memory_file)
 
     def append_history(self, entry: str) -> None:
         with open(self.history_file, "a", encoding="utf-8") as f:
             f.write(entry.rstrip() + "\n\n")
 
-    def get_memory_context(self) -> str:
+    def get_memory_context(self, query: str | None = None) -> str:
+        """
+        Get memory for the system prompt.
+
+        MEMORY.md is injected whole while it is small. Once it grows past
+        `max_memory_chars` and a retriever is configured, only the chunks of
+        MEMORY.md / HISTORY.md most relevant to `query` are injected, which
+        keeps the prompt size bounded. Until the retriever has indexed
+        anything, the whole of MEMORY.md is injected.
+        """
         long_term = self.read_long_term()
-        return f"## Long-term Memory\n{long_term}" if long_term else ""
+        if not (self.retriever and query and len(long_term) > self.max_memory_chars):
+            return f"## Long-term Memory\n{long_term}" if long_term else ""
+
+        if not self.retriever.ready:
+            # First index is still being built in the background
+            self.retriever.schedule_sync()
+            return f"## Long-term Memory\n{long_term}"
+        try:
+            hits = self.retriever.search(query, top_k=self.top_k)
+        except Exception as e:
+            logger.warning(f"Memory retrieval failed, injecting full memory: {e}")
+            return f"## Long-term Memory\n{long_term}"
+
+        parts = ["## Relevant Memory", f"(Excerpts selected for this message. Full long-term memory: {self.memory_file})"]
+        for source, text, _ in hits:
+            label = "MEMORY.md" if source == "memory" else "HISTORY.md"
+            parts.append(f"- ({label}) {text}")
+        return "\n".join(parts)
+
+
+class MemoryConsolidator:
+    """
+    Background worker that consolidates old session messages into MEMORY.md + HISTORY.md.
+
+    Requests are queued and handled one at a time by a single worker task, so
+    consolidations never race on the memory files. Repeated requests for a
+    session that is already queued are coalesced into one, and a session is
+    only consolidated once `memory_window` unconsolidated messages have piled up.
+    """
+
+    def __init__(
+        self,
+        provider: "LLMProvider",
+        workspace: Path,
+        sessions: "SessionManager",
+        memory_window: int = 50,
+        model: str | None = None,
+        on_update: Callable[[], None] | None = None,
+    ):
+        self.provider = provider
+        self.memory = MemoryStore(workspace)
+        self.sessions = sessions
+        self.memory_window = memory_window
+        self.model = model or provider.get_default_model()
+        self.on_update = on_update  # Called after MEMORY.md / HISTORY.md were written
+
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._queued: set[str] = set()
+        self._pending: dict[str, "Session"] = {}
+        self._archives: dict[str, list[list[Any]]] = {}
+        self._worker: asyncio.Task | None = None
+        self._active: str | None = None  # Key being consolidated right now
+
+    @property
+    def keep_count(self) -> int:
+        return self.memory_window // 2
+
+    def needs_consolidation(self, session: "Session") -> bool:
+        """Check whether enough unconsolidated messages have piled up."""
+        return session.total_messages - session.last_consolidated >= self.memory_window
+
+    def schedule(self, session: "Session") -> None:
+        """Queue a session for consolidation (no-op if not needed or already queued)."""
+        if not self.needs_consolidation(session):
+            return
+        self._pending[session.key] = session
+        self._enqueue(session.key)
+
+    def archive(self, key: str, messages: list[Any]) -> None:
+        """Queue a batch of messages to archive in full (used by /new)."""
+        if not messages:
+            return
+        self._archives.setdefault(key, []).append(messages)
+        self._enqueue(key)
+
+    def _enqueue(self, key: str) -> None:
+        if key not in self._queued:
+            self._queued.add(key)
+            self._queue.put_nowait(key)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Worker loop: drain the queue one session at a time."""
+        while True:
+            key = await self._queue.get()
+            self._queued.discard(key)
+            self._active = key
+            try:
+                for messages in self._archives.pop(key, []):
+                    await self._consolidate(key, messages, keep_count=0)
+                if session := self._pending.pop(key, None):
+                    await self.consolidate(session)
+            except Exception as e:
+                logger.error(f"Memory consolidation failed for {key}: {e}")
+            finally:
+                self._active = None
+                self._queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until all queued consolidations have finished."""
+        await self._queue.join()
+
+    async def shutdown(self, timeout: float) -> None:
+        """Let queued consolidations finish for up to `timeout` seconds, then stop the worker."""
+        if self._queued or self._active:
+            logger.info("Waiting for memory consolidation to finish...")
+            try:
+                await asyncio.wait_for(self.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Memory consolidation unfinished after {timeout:g}s; dropping "
+                    f"{', '.join(filter(None, [self._active, *sorted(self._queued)]))}"
+                )
+        await self.stop()
+
+    async def stop(self) -> None:
+        """Cancel the worker task."""
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def consolidate(self, session: "Session") -> None:
+        """Consolidate messages between `last_consolidated` and the kept tail of a session."""
+        if not self.needs_consolidation(session):
+            logger.debug(f"Session {session.key}: No consolidation needed (total={session.total_messages}, last_consolidated={session.last_consolidated})")
+            return
+
+        total = session.total_messages
+        end = total - self.keep_count
+        old_messages = self.sessions.load_messages(session, session.last_consolidated, end)
+        if not old_messages:
+            return
+        logger.info(f"Memory consolidation started: {total} total, {len(old_messages)} new to consolidate, {self.keep_count} keep")
+
+        if not await self._consolidate(session.key, old_messages, keep_count=self.keep_count):
+            return
+        if session.total_messages < total:
+            # Session was cleared (/new) while the LLM call was in flight
+            return
+        session.last_consolidated = end
+        logger.info(f"Memory consolidation done: {total} messages, last_consolidated={session.last_consolidated}")
+
+    async def _consolidate(self, key: str, old_messages: list[Any], keep_count: int) -> bool:
+        """Summarize messages into HISTORY.md and update MEMORY.md. Returns True on success."""
+        if not keep_count:
+            logger.info(f"Memory consolidation (archive_all): {len(old_messages)} total messages archived")
+
+        lines = []
+        for m in old_messages:
+            if not m.get("content"):
+                continue
+            tools = f" [tools: {', '.join(m['tools_used'])}]" if m.get("tools_used") else ""
+            lines.append(f"[{m.get('timestamp', '?')[:16]}] {m['role'].upper()}{tools}: {m['content']}")
+        conversation = "\n".join(lines)
+        current_memory = self.memory.read_long_term()
+
+        prompt = f"""You are a memory consolidation agent. Process this conversation and return a JSON object with exactly two keys:
+
+1. "history_entry": A paragraph (2-5 sentences) summarizing the key events/decisions/topics. Start with a timestamp like [YYYY-MM-DD HH:MM]. Include enough detail to be useful when found by grep search later.
+
+2. "memory_update": The updated long-term memory content. Add any new facts: user location, preferences, personal info, habits, project context, technical decisions, tools/services used. If nothing new, return the existing content unchanged.
+
+## Current Long-term Memory
+{current_memory or "(empty)"}
+
+## Conversation to Process
+{conversation}
+
+Respond with ONLY valid JSON, no markdown fences."""
+
+        try:
+            response = await self.provider.chat(
+                messages=[
+                    {"role": "system", "content": "You are a memory consolidation agent. Respond only with valid JSON."},
+                    {"role": "user", "content": prompt},
+                ],
+                model=self.model,
+            )
+            text = (response.content or "").strip()
+            if not text:
+                logger.warning("Memory consolidation: LLM returned empty response, skipping")
+                return False
+            if text.startswith("```"):
+                text = text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
+            result = json_repair.loads(text)
+            if not isinstance(result, dict):
+                logger.warning(f"Memory consolidation: unexpected response type, skipping. Response: {text[:200]}")
+                return False
+
+            if entry := result.get("history_entry"):
+                self.memory.append_history(entry)
+            if update := result.get("memory_update"):
+                if update != current_memory:
+                    self.memory.write_long_term(update)
+            if self.on_update and (entry or update):
+                self.on_update()
+            return True
+        except Exception as e:
+            logger.error(f"Memory consolidation failed for {key}: {e}")
+            return False
@@ -0,0 +1,287 @@
+"""Full-text index over HISTORY.md and session messages (SQLite FTS5)."""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+
+from nanobot.utils.helpers import ensure_dir
+
+_HISTORY_SOURCE = "history"
+_SESSION_PREFIX = "session:"
+_TS_RE = re.compile(r"^\[(\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2})?)")
+_FINGERPRINT_BYTES = 256
+
+
+@dataclass
+class SearchHit:
+    """A single search result."""
+    source: str  # "history" or "session:<key>"
+    ts: str  # "YYYY-MM-DD HH:MM" (may be empty)
+    role: str
+    snippet: str
+    score: float
+
+
+class MemoryIndex:
+    """
+    Incrementally updated inverted index over HISTORY.md entries and session messages.
+
+    Each source remembers how far it has been indexed, so `sync()` only reads
+    data appended since the last call. HISTORY.md is tracked by byte offset;
+    session files are tracked by message count plus a hash of the last indexed
+    line, because `SessionManager.save` rewrites the metadata line on every save.
+    """
+
+    def __init__(self, workspace: Path, sessions_dir: Path | None = None):
+        self.memory_dir = ensure_dir(workspace / "memory")
+        self.history_file = self.memory_dir / "HISTORY.md"
+        self.sessions_dir = sessions_dir
+        self.db_path = self.memory_dir / "index.db"
+        self._session_keys: dict[Path, str] = {}
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS entries USING fts5("
+                "content, source UNINDEXED, role UNINDEXED, ts UNINDEXED, tokenize='unicode61')"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                "source TEXT PRIMARY KEY, offset INTEGER, count INTEGER, "
+                "mtime_ns INTEGER, size INTEGER, fingerprint TEXT)"
+            )
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def sync(self) -> int:
+        """Index anything appended since the last sync. Returns number of new entries."""
+        added = 0
+        with closing(self._connect()) as conn, conn:
+            added += self._sync_history(conn)
+            if self.sessions_dir and self.sessions_dir.exists():
+                seen = set()
+                for path in self.sessions_dir.glob("*.jsonl"):
+                    source = _SESSION_PREFIX + self._session_key(path)
+                    seen.add(source)
+                    added += self._sync_session(conn, source, path)
+                for (source,) in conn.execute(
+                    "SELECT source FROM sources WHERE source LIKE ?", (_SESSION_PREFIX + "%",)
+                ).fetchall():
+                    if source not in seen:
+                        self._reset(conn, source)
+                        conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+        if added:
+            logger.debug(f"Memory index: {added} new entries")
+        return added
+
+    def _session_key(self, path: Path) -> str:
+        """Session key from the file's metadata line (the file name is a lossy encoding of it)."""
+        if key := self._session_keys.get(path):
+            return key
+        try:
+            with open(path, "rb") as f:
+                key = json.loads(f.readline() or b"{}").get("key")
+        except (OSError, ValueError, AttributeError):
+            key = None
+        if not isinstance(key, str) or not key:
+            return path.stem.replace("_", ":")  # Saved before keys were recorded
+        self._session_keys[path] = key
+        return key
+
+    def _get_state(self, conn: sqlite3.Connection, source: str) -> tuple[int, int, tuple[int, int], str]:
+        row = conn.execute(
+            "SELECT offset, count, mtime_ns, size, fingerprint FROM sources WHERE source = ?", (source,)
+        ).fetchone()
+        if not row:
+            return 0, 0, (0, -1), ""
+        return row[0], row[1], (row[2], row[3]), row[4]
+
+    def _set_state(self, conn: sqlite3.Connection, source: str, offset: int, count: int,
+                   stat: os.stat_result, fingerprint: str) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO sources (source, offset, count, mtime_ns, size, fingerprint) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (source, offset, count, stat.st_mtime_ns, stat.st_size, fingerprint),
+        )
+
+    def _reset(self, conn: sqlite3.Connection, source: str) -> None:
+        conn.execute("DELETE FROM entries WHERE source = ?", (source,))
+
+    def _sync_history(self, conn: sqlite3.Connection) -> int:
+        if not self.history_file.exists():
+            return 0
+        stat = self.history_file.stat()
+        offset, count, version, fingerprint = self._get_state(conn, _HISTORY_SOURCE)
+        fingerprint = fingerprint or _sha1(b"")
+        if (stat.st_mtime_ns, stat.st_size) == version:
+            return 0
+
+        with open(self.history_file, "rb") as f:
+            head = f.read(_FINGERPRINT_BYTES)
+            if stat.st_size < offset or _sha1(head[:offset]) != fingerprint:
+                # File was truncated or rewritten: start over
+                self._reset(conn, _HISTORY_SOURCE)
+                offset = count = 0
+            f.seek(offset)
+            data = f.read()
+
+        # Entries are separated by blank lines; leave a trailing partial entry for next time
+        end = data.rfind(b"\n\n")
+        rows = []
+        if end >= 0:
+            for raw in data[:end].split(b"\n\n"):
+                text = raw.decode("utf-8", errors="replace").strip()
+                if not text:
+                    continue
+                m = _TS_RE.match(text)
+                rows.append((text, _HISTORY_SOURCE, "", m.group(1).replace("T", " ") if m else ""))
+            offset += end + 2
+        conn.executemany("INSERT INTO entries (content, source, role, ts) VALUES (?, ?, ?, ?)", rows)
+        self._set_state(conn, _HISTORY_SOURCE, offset, count + len(rows), stat, _sha1(head[:offset]))
+        return len(rows)
+
+    def _sync_session(self, conn: sqlite3.Connection, source: str, path: Path) -> int:
+        stat = path.stat()
+        offset, count, version, fingerprint = self._get_state(conn, source)
+        if (stat.st_mtime_ns, stat.st_size) == version:
+            return 0
+
+        tail_len = int(fingerprint.split(":", 1)[0]) if fingerprint else 0
+        with open(path, "rb") as f:
+            first = f.readline()
+            body_start = len(first) if b'"_type": "metadata"' in first else 0
+            # Fast path: the last indexed line is still where we left it
+            f.seek(body_start + offset - tail_len)
+            data = f.read()
+            if count and _line_hash(data[:tail_len - 1]) == fingerprint:
+                data = data[tail_len:]
+            elif count:
+                f.seek(body_start)
+                body = f.read()
+                offset = _find_line_end(body, count, fingerprint)
+                if offset < 0:
+                    # Session was cleared or rewritten: reindex from scratch
+                    self._reset(conn, source)
+                    offset = count = 0
+                data = body[offset:]
+
+        # Only index complete lines; a partial last line is picked up next time
+        end = data.rfind(b"\n") + 1
+        rows = []
+        for line in data[:end].split(b"\n"):
+            if not line.strip():
+                continue
+            count += 1
+            fingerprint = _line_hash(line)
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue
+            content = msg.get("content")
+            if not isinstance(content, str) or not content.strip():
+                continue
+            ts = (msg.get("timestamp") or "")[:16].replace("T", " ")
+            rows.append((content, source, msg.get("role", ""), ts))
+        offset += end
+
+        conn.executemany("INSERT INTO entries (content, source, role, ts) VALUES (?, ?, ?, ?)", rows)
+        self._set_state(conn, source, offset, count, stat, fingerprint)
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        source: str = "all",
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 10,
+    ) -> list[SearchHit]:
+        """
+        Search indexed memory, best matches first.
+
+        Args:
+            query: Free-text query. All words must match; falls back to any word.
+            source: "history", "sessions" or "all".
+            since: Only entries on or after this date (YYYY-MM-DD).
+            until: Only entries on or before this date (YYYY-MM-DD).
+            limit: Maximum number of results.
+
+        Returns:
+            Matching entries with highlighted snippets.
+        """
+        terms = [t for t in re.findall(r"\w+", query.lower()) if t]
+        if not terms:
+            return []
+        self.sync()
+
+        where = ["entries MATCH ?"]
+        params: list = []
+        if source == "history":
+            where.append("source = ?")
+            params.append(_HISTORY_SOURCE)
+        elif source == "sessions":
+            where.append("source LIKE ?")
+            params.append(_SESSION_PREFIX + "%")
+        if since:
+            where.append("ts >= ?")
+            params.append(since)
+        if until:
+            where.append("substr(ts, 1, 10) <= ?")
+            params.append(until)
+        sql = (
+            "SELECT source, ts, role, snippet(entries, 0, '**', '**', '…', 24), bm25(entries) "
+            f"FROM entries WHERE {' AND '.join(where)} ORDER BY bm25(entries) LIMIT ?"
+        )
+
+        with closing(self._connect()) as conn:
+            for joiner in (" ", " OR "):
+                match = joiner.join(f'"{t}"' for t in terms)
+                rows = conn.execute(sql, [match, *params, limit]).fetchall()
+                if rows or len(terms) == 1:
+                    break
+        return [SearchHit(source=r[0], ts=r[1], role=r[2], snippet=r[3], score=-r[4]) for r in rows]
+
+
+def _sha1(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def _line_hash(line: bytes) -> str:
+    """Fingerprint of a line: its length plus a short hash."""
+    return f"{len(line) + 1}:{hashlib.sha1(line).hexdigest()[:16]}"
+
+
+def _find_line_end(body: bytes, count: int, fingerprint: str) -> int:
+    """Find the byte offset after the `count`-th non-empty line, if it still matches `fingerprint`."""
+    if not count:
+        return 0
+    pos = 0
+    seen = 0
+    while seen < count:
+        nl = body.find(b"\n", pos)
+        if nl < 0:
+            return -1
+        line = body[pos:nl]
+        pos = nl + 1
+        if line.strip():
+            seen += 1
+            if seen == count and _line_hash(line) != fingerprint:
+                return -1
+    return pos
@@ -0,0 +1,336 @@
+"""Embedding-based retrieval over MEMORY.md and HISTORY.md chunks."""
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any, Protocol
+
+from loguru import logger
+
+from nanobot.utils.helpers import ensure_dir
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class Embedder(Protocol):
+    """Turns texts into L2-normalized float32 vectors."""
+    name: str
+    dim: int
+
+    def embed(self, texts: list[str]) -> "np.ndarray": ...
+
+
+class HashingEmbedder:
+    """
+    Dependency-free fallback embedder (hashing vectorizer).
+
+    Hashes words and word bigrams into a fixed number of signed buckets with
+    log-scaled term frequency. No model download, fast on CPU, and good
+    enough for keyword-level recall.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> list[str]:
+        words = _WORD_RE.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: list[str]) -> "np.ndarray":
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: dict[int, float] = {}
+            for feature in self._features(text):
+                h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                idx = h % self.dim
+                counts[idx] = counts.get(idx, 0.0) + (1.0 if (h >> 63) else -1.0)
+            for idx, value in counts.items():
+                out[row, idx] = np.sign(value) * np.log1p(abs(value))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-9)
+
+
+class FastEmbedEmbedder:
+    """Small local CPU embedding model via the optional `fastembed` package."""
+
+    def __init__(self, model_name: str):
+        from fastembed import TextEmbedding
+        self._model = TextEmbedding(model_name=model_name)
+        self.name = f"fastembed-{model_name}"
+        self.dim = len(next(iter(self._model.embed(["probe"]))))
+
+    def embed(self, texts: list[str]) -> "np.ndarray":
+        vectors = np.asarray(list(self._model.embed(texts)), dtype=np.float32).reshape(len(texts), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+def make_embedder(model: str = "") -> Embedder:
+    """Create the configured embedder, falling back to hashing if the model is unavailable."""
+    if model:
+        try:
+            return FastEmbedEmbedder(model)
+        except Exception as e:
+            logger.warning(f"Embedding model {model!r} unavailable ({e}), using hashing embedder")
+    return HashingEmbedder()
+
+
+def chunk_markdown(text: str, max_chars: int = 600) -> list[str]:
+    """Split markdown into paragraph-aligned chunks, prefixed with their section heading."""
+    chunks: list[str] = []
+    parts: list[str] = []
+    heading = ""
+
+    def flush() -> None:
+        if parts:
+            prefix = f"[{heading}] " if heading else ""
+            chunks.append(prefix + "\n\n".join(parts))
+            parts.clear()
+
+    for block in re.split(r"\n\s*\n", text):
+        block = block.strip()
+        if not block:
+            continue
+        if block.startswith("#"):
+            flush()
+            first, _, rest = block.partition("\n")
+            heading = first.lstrip("#").strip()
+            block = rest.strip()
+            if not block:
+                continue
+        if parts and sum(len(p) + 2 for p in parts) + len(block) > max_chars:
+            flush()
+        parts.append(block)
+    flush()
+    return chunks
+
+
+class _MatrixFile:
+    """An append-only 2-D matrix on disk, read through a NumPy memmap."""
+
+    def __init__(self, path: Path, width: int, dtype: str = "float32"):
+        self.path = path
+        self.width = width
+        self.dtype = np.dtype(dtype)
+        self._matrix: "np.ndarray | None" = None
+
+    @property
+    def rows(self) -> int:
+        return self.path.stat().st_size // (self.dtype.itemsize * self.width) if self.path.exists() else 0
+
+    def matrix(self) -> "np.ndarray":
+        rows = self.rows
+        if self._matrix is None or self._matrix.shape[0] != rows:
+            self._matrix = (
+                np.memmap(self.path, dtype=self.dtype, mode="r", shape=(rows, self.width))
+                if rows else np.zeros((0, self.width), dtype=self.dtype)
+            )
+        return self._matrix
+
+    def append(self, values: "np.ndarray") -> None:
+        with open(self.path, "ab") as f:
+            f.write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+        self._matrix = None
+
+    def reset(self) -> None:
+        self._matrix = None
+        self.path.unlink(missing_ok=True)
+
+
+class MemoryRetriever:
+    """
+    Retrieves the memory chunks most relevant to a message.
+
+    MEMORY.md is re-chunked and re-embedded whenever it changes (it is small
+    and rewritten wholesale). HISTORY.md entries are embedded incrementally as
+    they are appended; only their byte spans are stored, and the text is read
+    back from HISTORY.md for the few chunks that are returned. Vectors and
+    spans live in memory-mapped files under memory/.vectors/.
+
+    Embedding is kept off the event loop: `search` only reads what has been
+    indexed so far and calls `schedule_sync`, which indexes new text in a
+    worker thread.
+    """
+
+    def __init__(self, workspace: Path, embedder: Embedder | None = None, chunk_chars: int = 600):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for memory retrieval")
+        self.memory_dir = ensure_dir(workspace / "memory")
+        self.memory_file = self.memory_dir / "MEMORY.md"
+        self.history_file = self.memory_dir / "HISTORY.md"
+        self.embedder = embedder or HashingEmbedder()
+        self.chunk_chars = chunk_chars
+
+        store_dir = ensure_dir(self.memory_dir / ".vectors")
+        self._meta_path = store_dir / "state.json"
+        self._memory_vectors = _MatrixFile(store_dir / "memory.f32", self.embedder.dim)
+        self._history_vectors = _MatrixFile(store_dir / "history.f32", self.embedder.dim)
+        self._history_spans = _MatrixFile(store_dir / "history.spans", 2, dtype="int64")
+        self._meta = self._load_meta()
+        self._sync_lock = threading.Lock()  # One sync at a time
+        self._state_lock = threading.Lock()  # Guards vectors and meta while a sync swaps them
+        self._sync_task: asyncio.Task | None = None
+        self._resync = False
+
+    def _load_meta(self) -> dict[str, Any]:
+        try:
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+        rows = self._history_vectors.rows
+        consistent = (
+            meta.get("embedder") == self.embedder.name
+            and len(meta.get("memory_chunks", [])) == self._memory_vectors.rows
+            and self._history_spans.rows == rows
+        )
+        if not consistent:
+            for f in (self._memory_vectors, self._history_vectors, self._history_spans):
+                f.reset()
+            meta = {"embedder": self.embedder.name, "memory_sha1": "", "memory_chunks": [], "history_offset": 0}
+        return meta
+
+    def _save_meta(self) -> None:
+        tmp = self._meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._meta, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self._meta_path)
+
+    @property
+    def ready(self) -> bool:
+        """Whether anything has been indexed yet."""
+        return bool(self._meta["memory_sha1"] or self._meta["history_offset"])
+
+    def sync(self) -> None:
+        """Embed whatever changed in MEMORY.md / HISTORY.md since the last sync (blocking)."""
+        with self._sync_lock:
+            # Embedding happens outside the state lock, so searches only wait for the swap
+            memory_update = self._embed_memory()
+            history_update = self._embed_history()
+            if memory_update is None and history_update is None:
+                return
+            with self._state_lock:
+                if memory_update is not None:
+                    digest, chunks, vectors = memory_update
+                    self._memory_vectors.reset()
+                    if chunks:
+                        self._memory_vectors.append(vectors)
+                    self._meta.update(memory_sha1=digest, memory_chunks=chunks)
+                if history_update is not None:
+                    restart, offset, vectors, spans = history_update
+                    if restart:
+                        self._history_vectors.reset()
+                        self._history_spans.reset()
+                    if len(spans):
+                        self._history_vectors.append(vectors)
+                        self._history_spans.append(spans)
+                    self._meta["history_offset"] = offset
+                self._save_meta()
+
+    def schedule_sync(self) -> None:
+        """Index new text in a worker thread (no-op outside an event loop)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._sync_task and not self._sync_task.done():
+            self._resync = True  # Picked up by the running task once it finishes
+            return
+        self._sync_task = loop.create_task(self._sync_in_thread())
+
+    async def _sync_in_thread(self) -> None:
+        while True:
+            self._resync = False
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                logger.warning(f"Memory indexing failed: {e}")
+            if not self._resync:
+                return
+
+    async def wait_synced(self) -> None:
+        """Wait for a scheduled background sync to finish."""
+        if self._sync_task:
+            await asyncio.shield(self._sync_task)
+
+    def _embed_memory(self) -> tuple[str, list[str], "np.ndarray | None"] | None:
+        memory = self.memory_file.read_text(encoding="utf-8") if self.memory_file.exists() else ""
+        digest = hashlib.sha1(memory.encode()).hexdigest()
+        if digest == self._meta["memory_sha1"]:
+            return None
+        chunks = chunk_markdown(memory, self.chunk_chars)
+        return digest, chunks, self.embedder.embed(chunks) if chunks else None
+
+    def _embed_history(self) -> tuple[bool, int, "np.ndarray | None", "np.ndarray"] | None:
+        offset = self._meta["history_offset"]
+        size = self.history_file.stat().st_size if self.history_file.exists() else 0
+        if size == offset:
+            return None
+        restart = size < offset
+        if restart:
+            # HISTORY.md was truncated or rewritten: start over
+            offset = 0
+
+        with open(self.history_file, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # Entries are separated by blank lines; leave a trailing partial entry for next time
+        end = data.rfind(b"\n\n")
+        texts, spans = [], []
+        pos = 0
+        for raw in data[:max(end, 0)].split(b"\n\n") if end >= 0 else []:
+            text = raw.decode("utf-8", errors="replace").strip()
+            if text:
+                texts.append(text[:self.chunk_chars * 2])
+                spans.append((offset + pos, len(raw)))
+            pos += len(raw) + 2
+        if end >= 0:
+            offset += end + 2
+        vectors = self.embedder.embed(texts) if texts else None
+        return restart, offset, vectors, np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+
+    def _read_history_chunk(self, index: int) -> str:
+        start, length = (int(v) for v in self._history_spans.matrix()[index])
+        with open(self.history_file, "rb") as f:
+            f.seek(start)
+            text = f.read(length).decode("utf-8", errors="replace").strip()
+        return text[:self.chunk_chars * 2]
+
+    def search(self, query: str, top_k: int = 5, min_score: float = 0.05) -> list[tuple[str, str, float]]:
+        """
+        Return up to `top_k` (source, chunk, score) tuples, best first.
+
+        Searches what has been indexed so far and schedules indexing of
+        anything new, so text written since the last sync is found on a later call.
+        """
+        self.schedule_sync()
+        if not query.strip():
+            return []
+        q = self.embedder.embed([query])[0]
+
+        with self._state_lock:
+            candidates: list[tuple[str, int, float]] = []
+            for source, vectors in (("memory", self._memory_vectors), ("history", self._history_vectors)):
+                matrix = vectors.matrix()
+                if not matrix.shape[0]:
+                    continue
+                scores = matrix @ q
+                k = min(top_k, scores.shape[0])
+                best = np.argpartition(-scores, k - 1)[:k]
+                candidates.extend((source, int(i), float(scores[i])) for i in best if scores[i] >= min_score)
+            candidates.sort(key=lambda c: c[2], reverse=True)
+
+            results = []
+            for source, i, score in candidates[:top_k]:
+                text = self._meta["memory_chunks"][i] if source == "memory" else self._read_history_chunk(i)
+                results.append((source, text, score))
+        return results
@@ -1,20 +1,109 @@
 """Subagent manager for background task execution."""
 
 import asyncio
-import json
+import heapq
+import itertools
+import multiprocessing
+import threading
+import time
 import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable
 
 from loguru import logger
 
-from nanobot.bus.events import InboundMessage
+from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.providers.base import LLMProvider
-from nanobot.agent.tools.registry import ToolRegistry
-from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
-from nanobot.agent.tools.shell import ExecTool
-from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
+from nanobot.utils.helpers import get_data_path
+from nanobot.agent.subagent_checkpoint import CheckpointStore
+from nanobot.agent.subagent_worker import (
+    SubagentJob,
+    init_worker,
+    run_job,
+    run_subagent_loop,
+    subagent_tools,
+)
+
+if TYPE_CHECKING:
+    from nanobot.config.schema import ExecToolConfig, SubagentConfig
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+MAX_FINISHED_TASKS = 50  # Finished tasks kept for status reporting
+WORKER_DEADLINE_GRACE_S = 5.0
+MAX_RESUMES = 3  # A task interrupted this many times is dropped rather than resumed again
+
+
+@dataclass
+class SubagentTask:
+    """A spawned subagent task and its scheduling state."""
+    id: str
+    task: str
+    label: str
+    origin: dict[str, str]
+    priority: int = PRIORITIES["normal"]
+    status: str = "queued"  # queued | running | ok | error | timeout | budget | cancelled
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    iterations: int = 0
+    tokens_used: int = 0
+    resumes: int = 0
+    messages: list[dict[str, Any]] | None = field(default=None, repr=False)  # Checkpointed conversation
+    last_progress_at: float = 0.0
+    runner: asyncio.Task | None = field(default=None, repr=False)
+
+    @property
+    def session_key(self) -> str:
+        return f"{self.origin['channel']}:{self.origin['chat_id']}"
+
+    def to_dict(self) -> dict[str, Any]:
+        """Status snapshot (times in seconds)."""
+        now = time.time()
+        return {
+            "id": self.id,
+            "label": self.label,
+            "status": self.status,
+            "priority": self.priority,
+            "session": self.session_key,
+            "waited": round((self.started_at or now) - self.created_at, 1),
+            "elapsed": round((self.finished_at or now) - self.started_at, 1) if self.started_at else 0.0,
+            "iterations": self.iterations,
+            "tokens": self.tokens_used,
+        }
+
+    def to_checkpoint(self, messages: list[dict[str, Any]] | None = None) -> dict[str, Any]:
+        """Persistent state; `messages` is the conversation to resume from."""
+        return {
+            "id": self.id,
+            "task": self.task,
+            "label": self.label,
+            "origin": self.origin,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "resumes": self.resumes,
+            "iterations": self.iterations,
+            "tokens_used": self.tokens_used,
+            "messages": messages or [],
+        }
+
+    @classmethod
+    def from_checkpoint(cls, state: dict[str, Any]) -> "SubagentTask":
+        return cls(
+            id=state["id"],
+            task=state["task"],
+            label=state["label"],
+            origin=state["origin"],
+            priority=state.get("priority", PRIORITIES["normal"]),
+            created_at=state.get("created_at", time.time()),
+            iterations=state.get("iterations", 0),
+            tokens_used=state.get("tokens_used", 0),
+            resumes=state.get("resumes", 0) + 1,
+            messages=state.get("messages") or None,
+        )
 
 
 class SubagentManager:
@@ -24,6 +113,23 @@ class SubagentManager:
     Subagents are lightweight agent instances that run in the background
     to handle specific tasks. They share the same LLM provider but have
     isolated context and a focused system prompt.
+
+    Spawned tasks wait in a priority queue (FIFO within a priority) and are
+    started while fewer than `max_concurrent` run overall and fewer than
+    `max_per_session` run for the originating chat, so a fan-out of spawns
+    cannot flood the provider. Each running task is held to an iteration,
+    token and wall-clock budget.
+
+    Unless disabled, each task is checkpointed to `checkpoint_dir` after
+    every iteration; `resume()` re-queues checkpointed tasks after a
+    restart so they continue where they stopped. With `progress_updates`
+    the origin chat gets a short note as a task works through its steps.
+
+    With `mode="process"` the agent loop runs in a pool of worker processes
+    (each building its own provider from `provider_factory`), so tool output
+    parsing and JSON handling stay off the gateway's event loop. Progress
+    comes back over a multiprocessing queue; results are announced on the
+    bus from this process as usual.
     """
     
     def __init__(
@@ -37,8 +143,11 @@ class SubagentManager:
         brave_api_key: str | None = None,
         exec_config: "ExecToolConfig | None" = None,
         restrict_to_workspace: bool = False,
+        config: "SubagentConfig | None" = None,
+        provider_factory: Callable[[], LLMProvider] | None = None,
+        checkpoint_dir: Path | None = None,
     ):
-        from nanobot.config.schema import ExecToolConfig
+        from nanobot.config.schema import ExecToolConfig, SubagentConfig
         self.provider = provider
         self.workspace = workspace
         self.bus = bus
@@ -48,7 +157,18 @@ class SubagentManager:
         self.brave_api_key = brave_api_key
         self.exec_config = exec_config or ExecToolConfig()
         self.restrict_to_workspace = restrict_to_workspace
-        self._running_tasks: dict[str, asyncio.Task[None]] = {}
+        self.config = config or SubagentConfig()
+        self._tasks: OrderedDict[str, SubagentTask] = OrderedDict()
+        self._queue: list[tuple[int, int, str]] = []  # (priority, seq, task_id)
+        self._seq = itertools.count()
+        self.provider_factory = provider_factory
+        self._pool: ProcessPoolExecutor | None = None
+        self._progress_queue: Any = None
+        if self.config.mode == "process" and provider_factory is None:
+            logger.warning("Subagent process mode needs a provider factory; running subagents in-process")
+        self.checkpoints: CheckpointStore | None = None
+        if self.config.checkpoints:
+            self.checkpoints = CheckpointStore(checkpoint_dir or get_data_path() / "subagents")
     
     async def spawn(
         self,
@@ -56,6 +176,7 @@ class SubagentManager:
         label: str | None = None,
         origin_channel: str = "cli",
         origin_chat_id: str = "direct",
+        priority: str = "normal",
     ) -> str:
         """
         Spawn a subagent to execute a task in the background.
@@ -65,123 +186,265 @@ class SubagentManager:
             label: Optional human-readable label for the task.
             origin_channel: The channel to announce results to.
             origin_chat_id: The chat ID to announce results to.
+            priority: "high", "normal" or "low"; decides the order of queued tasks.
         
         Returns:
-            Status message indicating the subagent was started.
+            Status message indicating the subagent was started or queued.
         """
+        if self.get_queued_count() >= self.config.max_queued:
+            return (
+                f"Error: {self.config.max_queued} subagent tasks are already waiting. "
+                "Try again after some of them finish."
+            )
+
         task_id = str(uuid.uuid4())[:8]
         display_label = label or task[:30] + ("..." if len(task) > 30 else "")
-        
-        origin = {
-            "channel": origin_channel,
-            "chat_id": origin_chat_id,
-        }
-        
-        # Create background task
-        bg_task = asyncio.create_task(
-            self._run_subagent(task_id, task, display_label, origin)
+        record = SubagentTask(
+            id=task_id,
+            task=task,
+            label=display_label,
+            origin={"channel": origin_channel, "chat_id": origin_chat_id},
+            priority=PRIORITIES.get(priority, PRIORITIES["normal"]),
         )
-        self._running_tasks[task_id] = bg_task
-        
-        # Cleanup when done
-        bg_task.add_done_callback(lambda _: self._running_tasks.pop(task_id, None))
-        
-        logger.info(f"Spawned subagent [{task_id}]: {display_label}")
-        return f"Subagent [{display_label}] started (id: {task_id}). I'll notify you when it completes."
+        self._enqueue(record)
+
+        if record.status == "running":
+            logger.info(f"Spawned subagent [{task_id}]: {display_label}")
+            return f"Subagent [{display_label}] started (id: {task_id}). I'll notify you when it completes."
+        position = self.get_queued_count()
+        logger.info(f"Queued subagent [{task_id}]: {display_label} (position {position})")
+        return (
+            f"Subagent [{display_label}] queued (id: {task_id}, {position} waiting) because other "
+            "subagents are busy. It will start automatically and I'll notify you when it completes."
+        )
+
+    def _enqueue(self, record: SubagentTask) -> None:
+        self._tasks[record.id] = record
+        self._checkpoint(record, record.messages)
+        heapq.heappush(self._queue, (record.priority, next(self._seq), record.id))
+        self._dispatch()
+
+    async def resume(self) -> int:
+        """
+        Re-queue tasks left unfinished by a previous run.
+
+        Returns:
+            Number of tasks resumed.
+        """
+        if not self.checkpoints:
+            return 0
+        resumed = 0
+        for state in self.checkpoints.load_all():
+            if state["id"] in self._tasks:
+                continue
+            try:
+                record = SubagentTask.from_checkpoint(state)
+            except (KeyError, TypeError) as e:
+                logger.warning(f"Dropping malformed subagent checkpoint {state.get('id')}: {e}")
+                self.checkpoints.delete(state["id"])
+                continue
+            if record.resumes > MAX_RESUMES:
+                logger.warning(f"Subagent [{record.id}] was interrupted {MAX_RESUMES} times; giving up")
+                self.checkpoints.delete(record.id)
+                await self._announce_result(
+                    record.id, record.label, record.task,
+                    "Error: the task was interrupted by restarts too many times.", record.origin, "error",
+                )
+                continue
+            logger.info(f"Resuming subagent [{record.id}] at iteration {record.iterations}: {record.label}")
+            self._enqueue(record)
+            resumed += 1
+        return resumed
+
+    def _checkpoint(self, record: SubagentTask, messages: list[dict[str, Any]] | None) -> None:
+        if self.checkpoints:
+            self.checkpoints.save(record.to_checkpoint(messages))
+
+    def _dispatch(self) -> None:
+        """Start queued tasks while the global and per-session caps allow."""
+        running = [t for t in self._tasks.values() if t.status == "running"]
+        per_session = Counter(t.session_key for t in running)
+        total = len(running)
+        deferred = []
+        while self._queue and total < self.config.max_concurrent:
+            entry = heapq.heappop(self._queue)
+            record = self._tasks.get(entry[2])
+            if record is None or record.status != "queued":
+                continue
+            if per_session[record.session_key] >= self.config.max_per_session:
+                deferred.append(entry)
+                continue
+            self._start(record)
+            per_session[record.session_key] += 1
+            total += 1
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+
+    def _start(self, record: SubagentTask) -> None:
+        record.status = "running"
+        record.started_at = time.time()
+        record.runner = asyncio.create_task(self._execute(record))
+        record.runner.add_done_callback(lambda runner: self._on_finished(record, runner))
+
+    def _on_finished(self, record: SubagentTask, runner: asyncio.Task) -> None:
+        record.runner = None
+        record.finished_at = time.time()
+        if record.status == "running":
+            record.status = "cancelled" if runner.cancelled() else "error"
+        if self.checkpoints and record.status != "cancelled":
+            self.checkpoints.delete(record.id)  # Cancelled by shutdown: keep it for resume()
+        finished = [tid for tid, t in self._tasks.items() if t.finished_at is not None]
+        for tid in finished[:max(0, len(finished) - MAX_FINISHED_TASKS)]:
+            del self._tasks[tid]
+        self._dispatch()
+
+    async def _execute(self, record: SubagentTask) -> None:
+        """Run a task within its wall-clock budget."""
+        timeout = self.config.timeout_seconds or None
+        if timeout and self._use_processes:
+            timeout += WORKER_DEADLINE_GRACE_S  # Let the worker stop itself (and its checkpoints) first
+        try:
+            await asyncio.wait_for(self._run_subagent(record), timeout=timeout)
+        except asyncio.TimeoutError:
+            record.status = "timeout"
+            logger.warning(f"Subagent [{record.id}] timed out after {timeout}s")
+            await self._announce_result(
+                record.id, record.label, record.task,
+                f"Error: the task did not finish within {timeout} seconds "
+                f"({record.iterations} iterations done).",
+                record.origin, "error",
+            )
     
-    async def _run_subagent(
-        self,
-        task_id: str,
-        task: str,
-        label: str,
-        origin: dict[str, str],
-    ) -> None:
+    async def _run_subagent(self, record: SubagentTask) -> None:
         """Execute the subagent task and announce the result."""
+        task_id, task, label, origin = record.id, record.task, record.label, record.origin
         logger.info(f"Subagent [{task_id}] starting task: {label}")
         
+        # Continue a checkpointed conversation, or build messages with subagent-specific prompt
+        messages: list[dict[str, Any]] = record.messages or [
+            {"role": "system", "content": self._build_subagent_prompt(task)},
+            {"role": "user", "content": task},
+        ]
+        record.messages = None
+
+        def on_step(iterations: int, tokens: int, msgs: list[dict[str, Any]]) -> None:
+            self._checkpoint(record, msgs)
+
         try:
-            # Build subagent tools (no message tool, no spawn tool)
-            tools = ToolRegistry()
-            allowed_dir = self.workspace if self.restrict_to_workspace else None
-            tools.register(ReadFileTool(allowed_dir=allowed_dir))
-            tools.register(WriteFileTool(allowed_dir=allowed_dir))
-            tools.register(EditFileTool(allowed_dir=allowed_dir))
-            tools.register(ListDirTool(allowed_dir=allowed_dir))
-            tools.register(ExecTool(
-                working_dir=str(self.workspace),
-                timeout=self.exec_config.timeout,
-                restrict_to_workspace=self.restrict_to_workspace,
-            ))
-            tools.register(WebSearchTool(api_key=self.brave_api_key))
-            tools.register(WebFetchTool())
-            
-            # Build messages with subagent-specific prompt
-            system_prompt = self._build_subagent_prompt(task)
-            messages: list[dict[str, Any]] = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": task},
-            ]
-            
-            # Run agent loop (limited iterations)
-            max_iterations = 15
-            iteration = 0
-            final_result: str | None = None
-            
-            while iteration < max_iterations:
-                iteration += 1
-                
-                response = await self.provider.chat(
-                    messages=messages,
-                    tools=tools.get_definitions(),
+            if self._use_processes:
+                status, final_result = await self._run_in_process(record, messages)
+            else:
+                tools = subagent_tools(
+                    self.workspace, self.restrict_to_workspace, self.exec_config.timeout, self.brave_api_key,
+                )
+                status, final_result = await run_subagent_loop(
+                    self.provider, tools, messages,
                     model=self.model,
                     temperature=self.temperature,
                     max_tokens=self.max_tokens,
+                    max_iterations=self.config.max_iterations,
+                    token_budget=self.config.max_task_tokens,
+                    task_id=task_id,
+                    start_iteration=record.iterations,
+                    start_tokens=record.tokens_used,
+                    on_progress=lambda *progress: self._apply_progress(task_id, *progress),
+                    on_step=on_step if self.checkpoints else None,
                 )
-                
-                if response.has_tool_calls:
-                    # Add assistant message with tool calls
-                    tool_call_dicts = [
-                        {
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.name,
-                                "arguments": json.dumps(tc.arguments),
-                            },
-                        }
-                        for tc in response.tool_calls
-                    ]
-                    messages.append({
-                        "role": "assistant",
-                        "content": response.content or "",
-                        "tool_calls": tool_call_dicts,
-                    })
-                    
-                    # Execute tools
-                    for tool_call in response.tool_calls:
-                        args_str = json.dumps(tool_call.arguments)
-                        logger.debug(f"Subagent [{task_id}] executing: {tool_call.name} with arguments: {args_str}")
-                        result = await tools.execute(tool_call.name, tool_call.arguments)
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "name": tool_call.name,
-                            "content": result,
-                        })
-                else:
-                    final_result = response.content
-                    break
-            
-            if final_result is None:
-                final_result = "Task completed but no final response was generated."
             
-            logger.info(f"Subagent [{task_id}] completed successfully")
-            await self._announce_result(task_id, label, task, final_result, origin, "ok")
+            record.status = status
+            logger.info(f"Subagent [{task_id}] finished ({status})")
+            await self._announce_result(task_id, label, task, final_result, origin, status)
             
         except Exception as e:
+            record.status = "error"
             error_msg = f"Error: {str(e)}"
             logger.error(f"Subagent [{task_id}] failed: {e}")
             await self._announce_result(task_id, label, task, error_msg, origin, "error")
+
+    @property
+    def _use_processes(self) -> bool:
+        return self.config.mode == "process" and self.provider_factory is not None
+
+    async def _run_in_process(self, record: SubagentTask, messages: list[dict[str, Any]]) -> tuple[str, str]:
+        """Run the agent loop in a worker process; progress arrives over the IPC queue."""
+        timeout = self.config.timeout_seconds or None
+        job = SubagentJob(
+            task_id=record.id,
+            messages=messages,
+            provider_factory=self.provider_factory,
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            workspace=str(self.workspace),
+            restrict_to_workspace=self.restrict_to_workspace,
+            exec_timeout=self.exec_config.timeout,
+            brave_api_key=self.brave_api_key,
+            max_iterations=self.config.max_iterations,
+            token_budget=self.config.max_task_tokens,
+            deadline=time.time() + timeout if timeout else None,
+            start_iteration=record.iterations,
+            start_tokens=record.tokens_used,
+            checkpoint_dir=str(self.checkpoints.directory) if self.checkpoints else None,
+            checkpoint=record.to_checkpoint() if self.checkpoints else None,
+        )
+        loop = asyncio.get_running_loop()
+        status, result, iterations, tokens = await loop.run_in_executor(self._get_pool(), run_job, job)
+        record.iterations, record.tokens_used = iterations, tokens
+        return status, result
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Start the worker pool and its progress listener on first use."""
+        if self._pool is None:
+            ctx = multiprocessing.get_context("spawn")  # Don't fork the running event loop
+            self._progress_queue = ctx.Queue()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.config.workers,
+                mp_context=ctx,
+                initializer=init_worker,
+                initargs=(self._progress_queue,),
+            )
+            loop = asyncio.get_running_loop()
+            threading.Thread(
+                target=self._drain_progress, args=(loop, self._progress_queue),
+                name="subagent-progress", daemon=True,
+            ).start()
+            logger.info(f"Subagent worker pool started ({self.config.workers} processes)")
+        return self._pool
+
+    def _drain_progress(self, loop: asyncio.AbstractEventLoop, queue: Any) -> None:
+        """Listener thread: forward worker progress to the event loop."""
+        while (item := queue.get()) is not None:
+            try:
+                loop.call_soon_threadsafe(self._apply_progress, *item)
+            except RuntimeError:
+                return  # Event loop closed
+
+    def _apply_progress(self, task_id: str, iterations: int, tokens: int, tool_names: list[str]) -> None:
+        """Record a task's progress and, if enabled, tell the origin chat what it is doing."""
+        record = self._tasks.get(task_id)
+        if not record or record.status != "running":
+            return
+        record.iterations, record.tokens_used = iterations, tokens
+        if not (self.config.progress_updates and tool_names):
+            return
+        now = time.time()
+        if now - record.last_progress_at < self.config.progress_interval_seconds:
+            return
+        record.last_progress_at = now
+        self.bus.outbound.put_nowait(OutboundMessage(
+            channel=record.origin["channel"],
+            chat_id=record.origin["chat_id"],
+            content=f"⏳ {record.label}: step {iterations} ({', '.join(dict.fromkeys(tool_names))})",
+            metadata={"subagent_progress": True, "task_id": task_id},
+        ))
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, abandoning queued jobs."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._progress_queue.put(None)
+            self._pool = None
+            self._progress_queue = None
     
     async def _announce_result(
         self,
@@ -193,7 +456,10 @@ class SubagentManager:
         status: str,
     ) -> None:
         """Announce the subagent result to the main agent via the message bus."""
-        status_text = "completed successfully" if status == "ok" else "failed"
+        status_text = {
+            "ok": "completed successfully",
+            "budget": "stopped at its token budget",
+        }.get(status, "failed")
         
         announce_content = f"""[Subagent '{label}' {status_text}]
 
@@ -254,4 +520,20 @@ When you have completed the task, provide a clear summary of your findings or ac
     
     def get_running_count(self) -> int:
         """Return the number of currently running subagents."""
-        return len(self._running_tasks)
+        return sum(1 for t in self._tasks.values() if t.status == "running")
+
+    def get_queued_count(self) -> int:
+        """Return the number of subagents waiting for a free slot."""
+        return sum(1 for t in self._tasks.values() if t.status == "queued")
+
+    def get_status(self, session_key: str | None = None) -> list[dict[str, Any]]:
+        """
+        Describe known subagent tasks: queued and running ones, then recently finished.
+
+        Args:
+            session_key: Only include tasks spawned from this "channel:chat_id".
+        """
+        order = {"running": 0, "queued": 1}
+        tasks = [t for t in self._tasks.values() if session_key is None or t.session_key == session_key]
+        tasks.sort(key=lambda t: (order.get(t.status, 2), t.priority if t.status == "queued" else 0))
+        return [t.to_dict() for t in tasks]
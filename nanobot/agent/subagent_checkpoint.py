@@ -0,0 +1,58 @@
+"""On-disk checkpoints that let subagent tasks survive a gateway restart."""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+
+class CheckpointStore:
+    """
+    One JSON file per unfinished subagent task.
+
+    A checkpoint holds the task's metadata plus its message list as of the
+    last completed iteration, so a resumed task continues from there
+    instead of repeating LLM calls and tool runs. Files are replaced
+    atomically and deleted once the task's result has been announced.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def _path(self, task_id: str) -> Path:
+        return self.directory / f"{task_id}.json"
+
+    def save(self, state: dict[str, Any]) -> None:
+        """Write (or replace) the checkpoint for `state["id"]`."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-", suffix=".json")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, self._path(state["id"]))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to checkpoint subagent [{state.get('id')}]: {e}")
+
+    def delete(self, task_id: str) -> None:
+        self._path(task_id).unlink(missing_ok=True)
+
+    def load_all(self) -> list[dict[str, Any]]:
+        """Read all checkpoints, oldest task first; unreadable files are skipped."""
+        states = []
+        if not self.directory.exists():
+            return states
+        for path in self.directory.glob("*.json"):
+            if path.name.startswith(".tmp-"):
+                continue
+            try:
+                state = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Skipping unreadable subagent checkpoint {path.name}: {e}")
+                continue
+            if isinstance(state, dict) and state.get("id") == path.stem:
+                states.append(state)
+        states.sort(key=lambda s: s.get("created_at", 0))
+        return states
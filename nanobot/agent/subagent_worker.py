@@ -0,0 +1,238 @@
+"""Subagent agent loop, shared by in-process and worker-process execution."""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+
+from loguru import logger
+
+from nanobot.agent.subagent_checkpoint import CheckpointStore
+from nanobot.agent.tools.filesystem import EditFileTool, ListDirTool, ReadFileTool, WriteFileTool
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.tools.shell import ExecTool
+from nanobot.agent.tools.web import WebFetchTool, WebSearchTool
+from nanobot.providers.base import LLMProvider
+
+# on_progress(iterations, tokens_used, tool names requested) after every LLM call
+ProgressFn = Callable[[int, int, list[str]], None]
+# on_step(iterations, tokens_used, messages) once an iteration's tool results are in
+StepFn = Callable[[int, int, list[dict[str, Any]]], None]
+
+
+@lru_cache(maxsize=8)
+def subagent_tools(
+    workspace: Path,
+    restrict_to_workspace: bool,
+    exec_timeout: int,
+    brave_api_key: str | None,
+) -> ToolRegistry:
+    """
+    Get the subagent tool set (no message tool, no spawn tool).
+
+    These tools keep no per-task state, so one frozen registry per
+    configuration is built per process and shared by every subagent.
+    """
+    tools = ToolRegistry()
+    allowed_dir = workspace if restrict_to_workspace else None
+    tools.register(ReadFileTool(allowed_dir=allowed_dir))
+    tools.register(WriteFileTool(allowed_dir=allowed_dir))
+    tools.register(EditFileTool(allowed_dir=allowed_dir))
+    tools.register(ListDirTool(allowed_dir=allowed_dir))
+    tools.register(ExecTool(
+        working_dir=str(workspace),
+        timeout=exec_timeout,
+        restrict_to_workspace=restrict_to_workspace,
+    ))
+    tools.register(WebSearchTool(api_key=brave_api_key))
+    tools.register(WebFetchTool())
+    return tools.freeze()
+
+
+async def run_subagent_loop(
+    provider: LLMProvider,
+    tools: ToolRegistry,
+    messages: list[dict[str, Any]],
+    *,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    max_iterations: int,
+    token_budget: int = 0,
+    task_id: str = "",
+    start_iteration: int = 0,
+    start_tokens: int = 0,
+    on_progress: ProgressFn | None = None,
+    on_step: StepFn | None = None,
+) -> tuple[str, str]:
+    """
+    Run the tool-calling loop until the model answers or a budget runs out.
+
+    Args:
+        messages: System prompt and task, or a checkpointed conversation to
+            resume; extended in place as the loop runs.
+        token_budget: Stop once the provider has reported this many tokens (0 = unlimited).
+        start_iteration: Iterations already spent (when resuming).
+        start_tokens: Tokens already spent (when resuming).
+        on_progress: Called after every LLM call.
+        on_step: Called after each iteration's tool results are appended,
+            i.e. whenever `messages` is a consistent point to resume from.
+
+    Returns:
+        (status, result) where status is "ok" or "budget".
+    """
+    iteration = start_iteration
+    tokens_used = start_tokens
+    final_result: str | None = None
+    status = "ok"
+    definitions = tools.get_definitions()
+
+    while iteration < max_iterations:
+        iteration += 1
+
+        response = await provider.chat(
+            messages=messages,
+            tools=definitions,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        tokens_used += response.usage.get("total_tokens", 0)
+        if on_progress:
+            on_progress(iteration, tokens_used, [tc.name for tc in response.tool_calls])
+
+        if response.has_tool_calls and token_budget and tokens_used >= token_budget:
+            status = "budget"
+            final_result = (
+                f"Stopped after using its token budget ({tokens_used}/{token_budget} tokens, "
+                f"{iteration} iterations). Progress so far: {response.content or '(none reported)'}"
+            )
+            break
+
+        if response.has_tool_calls:
+            # Add assistant message with tool calls
+            tool_call_dicts = [
+                {
+                    "id": tc.id,
+                    "type": "function",
+                    "function": {
+                        "name": tc.name,
+                        "arguments": json.dumps(tc.arguments),
+                    },
+                }
+                for tc in response.tool_calls
+            ]
+            messages.append({
+                "role": "assistant",
+                "content": response.content or "",
+                "tool_calls": tool_call_dicts,
+            })
+
+            # Execute tools
+            for tool_call in response.tool_calls:
+                args_str = json.dumps(tool_call.arguments)
+                logger.debug(f"Subagent [{task_id}] executing: {tool_call.name} with arguments: {args_str}")
+                result = await tools.execute(tool_call.name, tool_call.arguments)
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "name": tool_call.name,
+                    "content": result,
+                })
+            if on_step:
+                on_step(iteration, tokens_used, messages)
+        else:
+            final_result = response.content
+            break
+
+    if final_result is None:
+        final_result = "Task completed but no final response was generated."
+    return status, final_result
+
+
+@dataclass
+class SubagentJob:
+    """Everything a worker process needs to run one subagent task (must pickle)."""
+    task_id: str
+    messages: list[dict[str, Any]]
+    provider_factory: Callable[[], LLMProvider]
+    model: str
+    temperature: float
+    max_tokens: int
+    workspace: str
+    restrict_to_workspace: bool
+    exec_timeout: int
+    brave_api_key: str | None
+    max_iterations: int
+    token_budget: int
+    deadline: float | None  # time.time() at which the task is abandoned
+    start_iteration: int = 0
+    start_tokens: int = 0
+    checkpoint_dir: str | None = None
+    checkpoint: dict[str, Any] | None = None  # Task metadata written with each checkpoint
+
+
+# Set in each worker process by init_worker: (task_id, iterations, tokens, tool_names) tuples
+_progress_queue: Any = None
+
+
+def init_worker(progress_queue: Any) -> None:
+    """ProcessPoolExecutor initializer: remember where to report progress."""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def run_job(job: SubagentJob) -> tuple[str, str, int, int]:
+    """
+    Worker-process entry point.
+
+    Returns:
+        (status, result, iterations, tokens_used); errors are returned as
+        status "error" or "timeout" rather than raised.
+    """
+    return asyncio.run(_run_job(job))
+
+
+async def _run_job(job: SubagentJob) -> tuple[str, str, int, int]:
+    progress = [job.start_iteration, job.start_tokens]
+    store = CheckpointStore(Path(job.checkpoint_dir)) if job.checkpoint_dir and job.checkpoint else None
+
+    def on_progress(iterations: int, tokens: int, tool_names: list[str]) -> None:
+        progress[:] = [iterations, tokens]
+        if _progress_queue is not None:
+            _progress_queue.put((job.task_id, iterations, tokens, tool_names))
+
+    def on_step(iterations: int, tokens: int, messages: list[dict[str, Any]]) -> None:
+        store.save({**job.checkpoint, "iterations": iterations, "tokens_used": tokens, "messages": messages})
+
+    timeout = None if job.deadline is None else max(0.0, job.deadline - time.time())
+    try:
+        provider = job.provider_factory()
+        tools = subagent_tools(
+            Path(job.workspace), job.restrict_to_workspace, job.exec_timeout, job.brave_api_key,
+        )
+        status, result = await asyncio.wait_for(
+            run_subagent_loop(
+                provider, tools, job.messages,
+                model=job.model,
+                temperature=job.temperature,
+                max_tokens=job.max_tokens,
+                max_iterations=job.max_iterations,
+                token_budget=job.token_budget,
+                task_id=job.task_id,
+                start_iteration=job.start_iteration,
+                start_tokens=job.start_tokens,
+                on_progress=on_progress,
+                on_step=on_step if store else None,
+            ),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        status, result = "timeout", f"Error: the task ran past its deadline ({progress[0]} iterations done)."
+    except Exception as e:
+        logger.error(f"Subagent [{job.task_id}] failed in worker: {e}")
+        status, result = "error", f"Error: {str(e)}"
+    return status, result, progress[0], progress[1]
@@ -1,7 +1,176 @@
 """Base class for agent tools."""
 
+import json
+import re
 from abc import ABC, abstractmethod
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable
+
+from loguru import logger
+
+# check(value, path, errors) appends a message per problem found. `path` is None
+# for the parameters object, else (parent path, key or index); it is only turned
+# into a string when an error is reported, so valid input builds no strings.
+Check = Callable[[Any, Any, list[str]], None]
+
+_TYPE_MAP = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+
+def _path_str(path: Any) -> str:
+    parts = []
+    while path is not None:
+        path, part = path
+        parts.append(part)
+    out = ""
+    for part in reversed(parts):
+        if isinstance(part, int):
+            out += f"[{part}]"
+        else:
+            out += f".{part}" if out else part
+    return out
+
+
+def _label(path: Any) -> str:
+    return _path_str(path) or "parameter"
+
+
+def _check_all(checks: list[Check]) -> Check:
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(val: Any, path: Any, errors: list[str]) -> None:
+        for c in checks:
+            c(val, path, errors)
+    return check
+
+
+def compile_schema(schema: dict[str, Any]) -> Check:
+    """
+    Build a validator for a JSON schema.
+
+    Supports type, enum, minimum/maximum, minLength/maxLength, pattern,
+    properties/required/additionalProperties, items and oneOf. All schema
+    lookups happen here, once; the returned closure only checks values.
+    """
+    t = schema.get("type")
+    checks: list[Check] = []
+
+    if "enum" in schema:
+        enum = schema["enum"]
+
+        def check_enum(val: Any, path: Any, errors: list[str]) -> None:
+            if val not in enum:
+                errors.append(f"{_label(path)} must be one of {enum}")
+        checks.append(check_enum)
+
+    if t in ("integer", "number"):
+        if "minimum" in schema:
+            minimum = schema["minimum"]
+
+            def check_minimum(val: Any, path: Any, errors: list[str]) -> None:
+                if val < minimum:
+                    errors.append(f"{_label(path)} must be >= {minimum}")
+            checks.append(check_minimum)
+        if "maximum" in schema:
+            maximum = schema["maximum"]
+
+            def check_maximum(val: Any, path: Any, errors: list[str]) -> None:
+                if val > maximum:
+                    errors.append(f"{_label(path)} must be <= {maximum}")
+            checks.append(check_maximum)
+
+    if t == "string":
+        if "minLength" in schema:
+            min_len = schema["minLength"]
+
+            def check_min_length(val: Any, path: Any, errors: list[str]) -> None:
+                if len(val) < min_len:
+                    errors.append(f"{_label(path)} must be at least {min_len} chars")
+            checks.append(check_min_length)
+        if "maxLength" in schema:
+            max_len = schema["maxLength"]
+
+            def check_max_length(val: Any, path: Any, errors: list[str]) -> None:
+                if len(val) > max_len:
+                    errors.append(f"{_label(path)} must be at most {max_len} chars")
+            checks.append(check_max_length)
+        if "pattern" in schema:
+            try:
+                regex = re.compile(schema["pattern"])
+            except (re.error, TypeError) as e:
+                logger.warning(f"Ignoring invalid pattern {schema['pattern']!r} in tool schema: {e}")
+            else:
+                def check_pattern(val: Any, path: Any, errors: list[str]) -> None:
+                    if regex.search(val) is None:
+                        errors.append(f"{_label(path)} must match pattern {regex.pattern!r}")
+                checks.append(check_pattern)
+
+    if t == "object":
+        props = {k: compile_schema(v) for k, v in schema.get("properties", {}).items()}
+        required = tuple(schema.get("required", ()))
+        additional = schema.get("additionalProperties", True)
+        extra = compile_schema(additional) if isinstance(additional, dict) else None
+        closed = additional is False
+
+        if required:
+            def check_required(val: Any, path: Any, errors: list[str]) -> None:
+                for k in required:
+                    if k not in val:
+                        errors.append(f"missing required {_path_str((path, k))}")
+            checks.append(check_required)
+        if props or extra or closed:
+            def check_properties(val: Any, path: Any, errors: list[str]) -> None:
+                for k, v in val.items():
+                    c = props.get(k, extra)
+                    if c is not None:
+                        c(v, (path, k), errors)
+                    elif closed:
+                        errors.append(f"unexpected {_path_str((path, k))}")
+            checks.append(check_properties)
+
+    if t == "array" and "items" in schema:
+        item_check = compile_schema(schema["items"])
+
+        def check_items(val: Any, path: Any, errors: list[str]) -> None:
+            for i, item in enumerate(val):
+                item_check(item, (path, i), errors)
+        checks.append(check_items)
+
+    if "oneOf" in schema:
+        branches = [compile_schema(s) for s in schema["oneOf"]]
+
+        def check_one_of(val: Any, path: Any, errors: list[str]) -> None:
+            matched = 0
+            for branch in branches:
+                branch_errors: list[str] = []
+                branch(val, path, branch_errors)
+                matched += not branch_errors
+            if matched != 1:
+                errors.append(
+                    f"{_label(path)} must match exactly one of {len(branches)} allowed schemas (matched {matched})"
+                )
+        checks.append(check_one_of)
+
+    py_type = _TYPE_MAP.get(t)
+    rest = _check_all(checks) if checks else None
+    if py_type is None:
+        if rest is None:
+            return lambda val, path, errors: None
+        return rest
+
+    def check(val: Any, path: Any, errors: list[str]) -> None:
+        if not isinstance(val, py_type):
+            errors.append(f"{_label(path)} should be {t}")
+        elif rest is not None:
+            rest(val, path, errors)
+    return check
 
 
 class Tool(ABC):
@@ -12,14 +181,13 @@ class Tool(ABC):
     the environment, such as reading files, executing commands, etc.
     """
     
-    _TYPE_MAP = {
-        "string": str,
-        "integer": int,
-        "number": (int, float),
-        "boolean": bool,
-        "array": list,
-        "object": dict,
-    }
+    _TYPE_MAP = _TYPE_MAP
+    _validator: "Check | None" = None
+
+    # Results of a cacheable tool may be reused for identical arguments while
+    # the files it reads are unchanged (see ToolResultCache). Only set this
+    # for tools without side effects.
+    cacheable: bool = False
     
     @property
     @abstractmethod
@@ -54,42 +222,30 @@ class Tool(ABC):
 
     def validate_params(self, params: dict[str, Any]) -> list[str]:
         """Validate tool parameters against JSON schema. Returns error list (empty if valid)."""
-        schema = self.parameters or {}
-        if schema.get("type", "object") != "object":
-            raise ValueError(f"Schema must be object type, got {schema.get('type')!r}")
-        return self._validate(params, {**schema, "type": "object"}, "")
-
-    def _validate(self, val: Any, schema: dict[str, Any], path: str) -> list[str]:
-        t, label = schema.get("type"), path or "parameter"
-        if t in self._TYPE_MAP and not isinstance(val, self._TYPE_MAP[t]):
-            return [f"{label} should be {t}"]
-        
-        errors = []
-        if "enum" in schema and val not in schema["enum"]:
-            errors.append(f"{label} must be one of {schema['enum']}")
-        if t in ("integer", "number"):
-            if "minimum" in schema and val < schema["minimum"]:
-                errors.append(f"{label} must be >= {schema['minimum']}")
-            if "maximum" in schema and val > schema["maximum"]:
-                errors.append(f"{label} must be <= {schema['maximum']}")
-        if t == "string":
-            if "minLength" in schema and len(val) < schema["minLength"]:
-                errors.append(f"{label} must be at least {schema['minLength']} chars")
-            if "maxLength" in schema and len(val) > schema["maxLength"]:
-                errors.append(f"{label} must be at most {schema['maxLength']} chars")
-        if t == "object":
-            props = schema.get("properties", {})
-            for k in schema.get("required", []):
-                if k not in val:
-                    errors.append(f"missing required {path + '.' + k if path else k}")
-            for k, v in val.items():
-                if k in props:
-                    errors.extend(self._validate(v, props[k], path + '.' + k if path else k))
-        if t == "array" and "items" in schema:
-            for i, item in enumerate(val):
-                errors.extend(self._validate(item, schema["items"], f"{path}[{i}]" if path else f"[{i}]"))
+        validator = self._validator
+        if validator is None:
+            # Compiled on first use; tool schemas don't change after construction
+            schema = self.parameters or {}
+            if schema.get("type", "object") != "object":
+                raise ValueError(f"Schema must be object type, got {schema.get('type')!r}")
+            validator = self._validator = compile_schema({**schema, "type": "object"})
+        errors: list[str] = []
+        validator(params, None, errors)
         return errors
     
+    def cache_key(self, params: dict[str, Any]) -> str:
+        """Normalize arguments into a result cache key."""
+        return json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+    def cache_paths(self, params: dict[str, Any]) -> list[Path] | None:
+        """
+        Files a call reads (cacheable tools) or may change (other tools).
+
+        Cached results are revalidated against the files they read and dropped
+        when a call changes them. None means a call may change any file.
+        """
+        return []
+
     def to_schema(self) -> dict[str, Any]:
         """Convert tool to OpenAI function schema format."""
         return {
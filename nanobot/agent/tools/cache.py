@@ -0,0 +1,122 @@
+"""Memoization of tool results for repeated identical calls."""
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.agent.tools.base import Tool
+
+
+@dataclass(slots=True)
+class _Entry:
+    result: str
+    paths: tuple[Path, ...]
+    stamps: tuple[tuple[int, int], ...]  # (mtime_ns, size) of each path when the result was produced
+    expires: float | None  # time.monotonic() deadline for entries that read no files
+
+
+@dataclass(slots=True)
+class CacheTicket:
+    """What ToolResultCache.lookup learned about a call that missed, for store()."""
+    key: tuple[str, str]
+    paths: tuple[Path, ...]
+    stamps: tuple[tuple[int, int], ...]
+
+
+def _stamps(paths: tuple[Path, ...]) -> tuple[tuple[int, int], ...] | None:
+    try:
+        return tuple((st.st_mtime_ns, st.st_size) for st in map(os.stat, paths))
+    except OSError:
+        return None
+
+
+class ToolResultCache:
+    """
+    Reuses results of cacheable tools (see `Tool.cacheable`) for identical arguments.
+
+    Results of tools that read files stay valid while each file's mtime and
+    size are unchanged, and are dropped when a write tool reports touching
+    the file (or its directory). Results of tools that read no files, i.e.
+    web tools, expire after `ttl` seconds. Error results are never cached,
+    and the least recently used entries are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, tool: Tool, params: dict[str, Any]) -> tuple[str | None, CacheTicket | None]:
+        """
+        Find a cached result for this call.
+
+        Returns:
+            (result, None) on a hit; (None, ticket) on a miss, to pass to
+            store() with the fresh result; (None, None) if the call can't be cached.
+        """
+        if not tool.cacheable:
+            return None, None
+        try:
+            key = (tool.name, tool.cache_key(params))
+            paths = tuple(tool.cache_paths(params) or ())
+        except Exception:
+            return None, None  # e.g. a path outside the workspace; let the tool report it
+        stamps = _stamps(paths) if paths else ()
+        if stamps is None:
+            return None, None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.stamps == stamps and (entry.expires is None or entry.expires > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                logger.debug(f"Tool cache hit: {tool.name}")
+                return entry.result, None
+            del self._entries[key]
+        self.misses += 1
+        # Stamps are taken before the tool runs, so a file changed mid-read is re-read next time
+        return None, CacheTicket(key, paths, stamps)
+
+    def store(self, ticket: CacheTicket, result: str) -> None:
+        if result.startswith(("Error", '{"error"')):  # web_fetch reports failures as JSON
+            return
+        expires = None if ticket.paths else time.monotonic() + self.ttl
+        self._entries[ticket.key] = _Entry(result, ticket.paths, ticket.stamps, expires)
+        self._entries.move_to_end(ticket.key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def after_write(self, tool: Tool, params: dict[str, Any]) -> None:
+        """Drop results that a call to a non-cacheable tool may have made stale."""
+        try:
+            paths = tool.cache_paths(params)
+        except Exception:
+            return  # Its path didn't resolve, so the call couldn't have changed it
+        self.invalidate(paths)
+
+    def invalidate(self, paths: list[Path] | None) -> None:
+        """Drop results that read `paths` or a directory containing them (None = any file)."""
+        if paths is None:
+            stale = [key for key, entry in self._entries.items() if entry.paths]
+        else:
+            if not paths:
+                return
+            touched = {p for path in paths for p in (path, *path.parents)}
+            stale = [key for key, entry in self._entries.items() if touched.intersection(entry.paths)]
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -17,6 +17,8 @@ def _resolve_path(path: str, allowed_dir: Path | None = None) -> Path:
 class ReadFileTool(Tool):
     """Tool to read file contents."""
     
+    cacheable = True
+
     def __init__(self, allowed_dir: Path | None = None):
         self._allowed_dir = allowed_dir
 
@@ -41,6 +43,12 @@ class ReadFileTool(Tool):
             "required": ["path"]
         }
     
+    def cache_key(self, params: dict[str, Any]) -> str:
+        return str(_resolve_path(params["path"], self._allowed_dir))
+
+    def cache_paths(self, params: dict[str, Any]) -> list[Path]:
+        return [_resolve_path(params["path"], self._allowed_dir)]
+    
     async def execute(self, path: str, **kwargs: Any) -> str:
         try:
             file_path = _resolve_path(path, self._allowed_dir)
@@ -88,6 +96,9 @@ class WriteFileTool(Tool):
             "required": ["path", "content"]
         }
     
+    def cache_paths(self, params: dict[str, Any]) -> list[Path]:
+        return [_resolve_path(params["path"], self._allowed_dir)]
+    
     async def execute(self, path: str, content: str, **kwargs: Any) -> str:
         try:
             file_path = _resolve_path(path, self._allowed_dir)
@@ -135,6 +146,9 @@ class EditFileTool(Tool):
             "required": ["path", "old_text", "new_text"]
         }
     
+    def cache_paths(self, params: dict[str, Any]) -> list[Path]:
+        return [_resolve_path(params["path"], self._allowed_dir)]
+    
     async def execute(self, path: str, old_text: str, new_text: str, **kwargs: Any) -> str:
         try:
             file_path = _resolve_path(path, self._allowed_dir)
@@ -164,6 +178,8 @@ class EditFileTool(Tool):
 class ListDirTool(Tool):
     """Tool to list directory contents."""
     
+    cacheable = True
+
     def __init__(self, allowed_dir: Path | None = None):
         self._allowed_dir = allowed_dir
 
@@ -188,6 +204,12 @@ class ListDirTool(Tool):
             "required": ["path"]
         }
     
+    def cache_key(self, params: dict[str, Any]) -> str:
+        return str(_resolve_path(params["path"], self._allowed_dir))
+
+    def cache_paths(self, params: dict[str, Any]) -> list[Path]:
+        return [_resolve_path(params["path"], self._allowed_dir)]
+    
     async def execute(self, path: str, **kwargs: Any) -> str:
         try:
             dir_path = _resolve_path(path, self._allowed_dir)
@@ -1,23 +1,101 @@
 """MCP client: connects to MCP servers and wraps their tools as native nanobot tools."""
 
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
 from contextlib import AsyncExitStack
+from pathlib import Path
 from typing import Any
 
 from loguru import logger
 
 from nanobot.agent.tools.base import Tool
 from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.utils.metrics import LatencyHistogram
+
+RECONNECT_MIN_S = 1.0
+RECONNECT_MAX_S = 300.0
+PING_TIMEOUT_S = 10.0
+
+
+def _protocol_errors() -> tuple[type[Exception], ...]:
+    """Errors the server reported over a working connection (named McpError before mcp 2.0)."""
+    from mcp.shared import exceptions
+    return tuple(getattr(exceptions, n) for n in ("McpError", "MCPError") if hasattr(exceptions, n))
+
+
+def _is_idempotent(tool: Any) -> bool:
+    """Whether the server marks a tool read-only or idempotent (safe to retry)."""
+    ann = getattr(tool, "annotations", None)
+    if ann is None:
+        return False
+    return any(
+        getattr(ann, attr, None) is True
+        for attr in ("readOnlyHint", "idempotentHint", "read_only_hint", "idempotent_hint")
+    )
+
+
+def _config_hash(cfg: Any) -> str:
+    """Hash of the settings that decide which server (and so which tools) we talk to."""
+    key = {"command": cfg.command, "args": list(cfg.args), "env": dict(cfg.env or {}), "url": cfg.url}
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class MCPSchemaCache:
+    """
+    Tool definitions of each MCP server, cached on disk.
+
+    Entries are keyed by server name and a hash of the server's connection
+    settings, so changing the command, args, env or url invalidates them.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def _path(self, name: str, cfg: Any) -> Path:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        return self.directory / f"{safe}-{_config_hash(cfg)}.json"
+
+    def load(self, name: str, cfg: Any) -> list[dict[str, Any]] | None:
+        path = self._path(name, cfg)
+        try:
+            tools = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"MCP server '{name}': ignoring unreadable schema cache: {e}")
+            return None
+        return tools if isinstance(tools, list) else None
+
+    def save(self, name: str, cfg: Any, tools: list[dict[str, Any]]) -> None:
+        path = self._path(name, cfg)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(tools, f, ensure_ascii=False)
+            os.replace(tmp, path)
+            for stale in self.directory.glob(f"{path.name.rsplit('-', 1)[0]}-{'?' * 16}.json"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"MCP server '{name}': failed to write schema cache: {e}")
 
 
 class MCPToolWrapper(Tool):
     """Wraps a single MCP server tool as a nanobot Tool."""
 
-    def __init__(self, session, server_name: str, tool_def):
-        self._session = session
-        self._original_name = tool_def.name
-        self._name = f"mcp_{server_name}_{tool_def.name}"
-        self._description = tool_def.description or tool_def.name
-        self._parameters = tool_def.inputSchema or {"type": "object", "properties": {}}
+    def __init__(self, server: "MCPServer", tool_def: dict[str, Any]):
+        self._server = server
+        self._original_name = tool_def["name"]
+        self._name = f"mcp_{server.name}_{tool_def['name']}"
+        self._description = tool_def.get("description") or tool_def["name"]
+        self._parameters = tool_def.get("inputSchema") or {"type": "object", "properties": {}}
+        self.idempotent = bool(tool_def.get("idempotent")) or self._original_name in server.cfg.idempotent_tools
 
     @property
     def name(self) -> str:
@@ -33,7 +111,7 @@ class MCPToolWrapper(Tool):
 
     async def execute(self, **kwargs: Any) -> str:
         from mcp import types
-        result = await self._session.call_tool(self._original_name, arguments=kwargs)
+        result = await self._server.call_tool(self._original_name, kwargs, retry=self.idempotent)
         parts = []
         for block in result.content:
             if isinstance(block, types.TextContent):
@@ -43,38 +121,275 @@ class MCPToolWrapper(Tool):
         return "\n".join(parts) or "(no output)"
 
 
-async def connect_mcp_servers(
-    mcp_servers: dict, registry: ToolRegistry, stack: AsyncExitStack
-) -> None:
-    """Connect to configured MCP servers and register their tools."""
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
+class MCPServer:
+    """
+    One MCP server connection, owned by a background task.
+
+    The task opens the transport and session, lists the server's tools
+    (registering them and refreshing the schema cache) and then holds the
+    connection until it is closed or lost, reconnecting with exponential
+    backoff. Transport contexts are entered and exited within that one task,
+    as anyio's cancel scopes require.
+
+    While connected the task pings the server every `health_interval`
+    seconds; a failed ping or a transport error during a call drops the
+    session and reconnects. Calls are limited to `tool_timeout`, and calls to
+    idempotent tools that hit a transport error are retried once on the new
+    session. `call_latency` records every call (failures flagged as errors).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        cfg: Any,
+        registry: ToolRegistry,
+        cache: MCPSchemaCache | None = None,
+    ):
+        self.name = name
+        self.cfg = cfg
+        self.registry = registry
+        self.cache = cache
+        self.connect_timeout = cfg.connect_timeout
+        self.tool_timeout = cfg.tool_timeout
+        self.health_interval = cfg.health_interval
+        self.call_latency = LatencyHistogram()
+        self.reconnects = 0
+        self.tool_names: set[str] = set()
+        self.last_error: str | None = None
+        self._session: Any = None
+        self._connected = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    @property
+    def connected(self) -> bool:
+        return self._session is not None
+
+    def register_cached(self) -> bool:
+        """Register tools from the schema cache; returns False if there is no entry."""
+        tools = self.cache.load(self.name, self.cfg) if self.cache else None
+        if tools is None:
+            return False
+        self._update_tools(tools, save=False)
+        logger.info(f"MCP server '{self.name}': {len(tools)} tools registered from cache")
+        return True
+
+    def start(self) -> None:
+        """Start connecting in the background (idempotent)."""
+        if self._task is None and not self._closing:
+            self._task = asyncio.create_task(self._run())
 
-    for name, cfg in mcp_servers.items():
+    async def wait_connected(self, timeout: float | None = None) -> bool:
+        """Start if needed and wait up to `timeout` (default: connect timeout) for a session."""
+        self.start()
         try:
-            if cfg.command:
-                params = StdioServerParameters(
-                    command=cfg.command, args=cfg.args, env=cfg.env or None
-                )
-                read, write = await stack.enter_async_context(stdio_client(params))
-            elif cfg.url:
-                from mcp.client.streamable_http import streamable_http_client
-                read, write, _ = await stack.enter_async_context(
-                    streamable_http_client(cfg.url)
-                )
-            else:
+            await asyncio.wait_for(self._connected.wait(), timeout or self.connect_timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def call_tool(self, name: str, arguments: dict[str, Any], retry: bool = False) -> Any:
+        """
+        Call a tool on the server.
+
+        Args:
+            retry: Retry once after a transport failure (only for idempotent tools).
+
+        Raises:
+            ConnectionError: The server is unreachable or the connection broke.
+            TimeoutError: The call took longer than `tool_timeout`.
+        """
+        attempts = 2 if retry else 1
+        for attempt in range(1, attempts + 1):
+            started = time.perf_counter()  # Includes waiting for a (re)connect
+            failed = True
+            session = None
+            try:
+                if await self.wait_connected():
+                    session = self._session
+                if session is None:
+                    raise ConnectionError(
+                        f"MCP server '{self.name}' is not connected: {self.last_error or 'timed out'}"
+                    )
+                async with asyncio.timeout(self.tool_timeout or None):
+                    result = await session.call_tool(name, arguments=arguments)
+                failed = False
+                return result
+            except TimeoutError:
+                raise TimeoutError(f"MCP tool '{name}' timed out after {self.tool_timeout:.0f}s") from None
+            except _protocol_errors():
+                raise
+            except Exception as e:
+                if session is None:
+                    raise
+                self._drop_session(session, f"call to '{name}' failed: {e}")
+                if attempt == attempts:
+                    raise ConnectionError(f"MCP server '{self.name}' connection lost: {e}") from e
+                logger.info(f"MCP server '{self.name}': retrying idempotent tool '{name}' after reconnect")
+            finally:
+                self.call_latency.observe(time.perf_counter() - started, error=failed)
+
+    def _drop_session(self, session: Any, reason: str) -> None:
+        """Mark `session` dead so calls wait for the reconnect instead of reusing it."""
+        if session is not None and session is self._session:
+            logger.warning(f"MCP server '{self.name}': {reason}; reconnecting")
+            self.last_error = reason
+            self._session = None
+            self._connected.clear()
+            self._lost.set()
+
+    def stats(self) -> dict[str, Any]:
+        """Connection state and call metrics."""
+        latency = self.call_latency.snapshot()
+        return {
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+            "failure_rate": latency["errors"] / latency["count"] if latency["count"] else 0.0,
+            "latency": latency,
+        }
+
+    async def close(self) -> None:
+        self._closing = True
+        self._lost.set()
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, 5.0)
+            except asyncio.TimeoutError:
+                pass
+            except Exception as e:  # MCP SDK cancel scope cleanup is noisy but harmless
+                logger.debug(f"MCP server '{self.name}': error while closing: {e}")
+            self._task = None
+
+    async def _open(self, stack: AsyncExitStack) -> Any:
+        """Open the transport and an initialized session inside `stack`."""
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+
+        if self.cfg.command:
+            params = StdioServerParameters(
+                command=self.cfg.command, args=self.cfg.args, env=self.cfg.env or None
+            )
+            read, write = await stack.enter_async_context(stdio_client(params))
+        else:
+            from mcp.client.streamable_http import streamable_http_client
+            read, write, _ = await stack.enter_async_context(
+                streamable_http_client(self.cfg.url)
+            )
+        session = await stack.enter_async_context(ClientSession(read, write))
+        await session.initialize()
+        return session
+
+    async def _run(self) -> None:
+        backoff = RECONNECT_MIN_S
+        while not self._closing:
+            try:
+                async with AsyncExitStack() as stack:
+                    async with asyncio.timeout(self.connect_timeout):
+                        session = await self._open(stack)
+                        listed = await session.list_tools()
+                    self._update_tools([
+                        {
+                            "name": t.name, "description": t.description, "inputSchema": t.inputSchema,
+                            "idempotent": _is_idempotent(t),
+                        }
+                        for t in listed.tools
+                    ])
+                    self._session = session
+                    self.last_error = None
+                    self._lost.clear()
+                    self._connected.set()
+                    backoff = RECONNECT_MIN_S
+                    logger.info(f"MCP server '{self.name}': connected, {len(listed.tools)} tools")
+                    await self._watch(session)
+                    if not self._closing:
+                        self.reconnects += 1
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+                logger.warning(f"MCP server '{self.name}': connection failed: {self.last_error}")
+            finally:
+                self._session = None
+                self._connected.clear()
+            if self._closing:
+                break
+            logger.info(f"MCP server '{self.name}': reconnecting in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX_S)
+
+    async def _watch(self, session: Any) -> None:
+        """Return once the connection is lost or closing; pings the server meanwhile."""
+        while not self._lost.is_set():
+            try:
+                await asyncio.wait_for(self._lost.wait(), self.health_interval or None)
+            except asyncio.TimeoutError:
+                try:
+                    async with asyncio.timeout(PING_TIMEOUT_S):
+                        await session.send_ping()
+                except Exception as e:
+                    self._drop_session(session, f"health ping failed: {e or type(e).__name__}")
+
+    def _update_tools(self, tool_defs: list[dict[str, Any]], save: bool = True) -> None:
+        """Make the registry match the server's current tool list."""
+        wrappers = {w.name: w for w in (MCPToolWrapper(self, d) for d in tool_defs)}
+        for name in self.tool_names - wrappers.keys():
+            self.registry.unregister(name)
+        for name, wrapper in wrappers.items():
+            existing = self.registry.get(name)
+            if not (isinstance(existing, MCPToolWrapper) and existing.to_schema() == wrapper.to_schema()):
+                self.registry.register(wrapper)
+                logger.debug(f"MCP: registered tool '{name}' from server '{self.name}'")
+        self.tool_names = set(wrappers)
+        if save and self.cache:
+            self.cache.save(self.name, self.cfg, tool_defs)
+
+
+class MCPManager:
+    """Starts all configured MCP servers concurrently and closes them together."""
+
+    def __init__(self, cache_dir: Path | None = None):
+        from nanobot.utils.helpers import get_data_path
+        self.cache = MCPSchemaCache(cache_dir or get_data_path() / "mcp")
+        self.servers: dict[str, MCPServer] = {}
+
+    async def start(self, mcp_servers: dict, registry: ToolRegistry) -> None:
+        """
+        Register every server's tools.
+
+        Servers with cached schemas are registered at once and connect on
+        their first tool call. The others connect concurrently; this waits for
+        each at most its `connect_timeout`, after which slow or failing
+        servers keep retrying in the background.
+        """
+        connecting = []
+        for name, cfg in mcp_servers.items():
+            if not cfg.command and not cfg.url:
                 logger.warning(f"MCP server '{name}': no command or url configured, skipping")
                 continue
+            server = MCPServer(name, cfg, registry, self.cache)
+            self.servers[name] = server
+            if not server.register_cached():
+                connecting.append(server)
+
+        results = await asyncio.gather(*(s.wait_connected() for s in connecting))
+        for server, ok in zip(connecting, results):
+            if not ok:
+                logger.error(
+                    f"MCP server '{server.name}': not connected after {server.connect_timeout:.0f}s "
+                    f"({server.last_error or 'timed out'}); retrying in the background"
+                )
 
-            session = await stack.enter_async_context(ClientSession(read, write))
-            await session.initialize()
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-server connection state, call latency and failure rate."""
+        return {name: server.stats() for name, server in self.servers.items()}
 
-            tools = await session.list_tools()
-            for tool_def in tools.tools:
-                wrapper = MCPToolWrapper(session, name, tool_def)
-                registry.register(wrapper)
-                logger.debug(f"MCP: registered tool '{wrapper.name}' from server '{name}'")
+    async def close(self) -> None:
+        await asyncio.gather(*(s.close() for s in self.servers.values()))
+        self.servers.clear()
 
-            logger.info(f"MCP server '{name}': connected, {len(tools.tools)} tools registered")
-        except Exception as e:
-            logger.error(f"MCP server '{name}': failed to connect: {e}")
+
+async def connect_mcp_servers(mcp_servers: dict, registry: ToolRegistry) -> MCPManager:
+    """Connect to configured MCP servers and register their tools."""
+    manager = MCPManager()
+    await manager.start(mcp_servers, registry)
+    return manager
@@ -0,0 +1,81 @@
+"""Memory search tool."""
+
+import asyncio
+from typing import Any
+
+from nanobot.agent.memory_index import MemoryIndex
+from nanobot.agent.tools.base import Tool
+
+
+class SearchMemoryTool(Tool):
+    """Tool to search HISTORY.md and past session messages."""
+
+    def __init__(self, index: MemoryIndex):
+        self._index = index
+
+    @property
+    def name(self) -> str:
+        return "search_memory"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Search past conversations and the HISTORY.md event log. "
+            "Returns the best-matching entries with dates and snippets."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Words to search for"
+                },
+                "source": {
+                    "type": "string",
+                    "enum": ["all", "history", "sessions"],
+                    "description": "Where to search (default: all)"
+                },
+                "since": {
+                    "type": "string",
+                    "description": "Only entries on or after this date (YYYY-MM-DD)"
+                },
+                "until": {
+                    "type": "string",
+                    "description": "Only entries on or before this date (YYYY-MM-DD)"
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 50,
+                    "description": "Maximum number of results (default: 10)"
+                }
+            },
+            "required": ["query"]
+        }
+
+    async def execute(
+        self,
+        query: str,
+        source: str = "all",
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 10,
+        **kwargs: Any
+    ) -> str:
+        try:
+            hits = await asyncio.to_thread(self._index.search, query, source, since, until, limit)
+        except Exception as e:
+            return f"Error searching memory: {e}"
+
+        if not hits:
+            return f"No memory entries found for: {query}"
+
+        lines = [f"Found {len(hits)} entries for: {query}"]
+        for hit in hits:
+            where = "HISTORY.md" if hit.source == "history" else hit.source
+            role = f" {hit.role}" if hit.role else ""
+            lines.append(f"- [{hit.ts or '?'}] ({where}{role}) {hit.snippet}")
+        return "\n".join(lines)
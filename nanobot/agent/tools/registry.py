@@ -3,25 +3,52 @@
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.cache import ToolResultCache
 
 
 class ToolRegistry:
     """
     Registry for agent tools.
     
-    Allows dynamic registration and execution of tools.
+    Allows dynamic registration and execution of tools. Tool definitions
+    are built once and cached until the set of tools changes. A frozen
+    registry rejects further changes, so it can be shared between agents.
+    With a `cache`, results of cacheable tools are reused for repeated calls.
     """
     
-    def __init__(self):
+    def __init__(self, cache: ToolResultCache | None = None):
         self._tools: dict[str, Tool] = {}
+        self.cache = cache
+        self._definitions: list[dict[str, Any]] | None = None
+        self._frozen = False
+        self.version = 0  # Bumped whenever the set of tools changes
     
     def register(self, tool: Tool) -> None:
         """Register a tool."""
+        self._check_mutable()
         self._tools[tool.name] = tool
+        self._definitions = None
+        self.version += 1
     
     def unregister(self, name: str) -> None:
         """Unregister a tool by name."""
+        self._check_mutable()
         self._tools.pop(name, None)
+        self._definitions = None
+        self.version += 1
+
+    def freeze(self) -> "ToolRegistry":
+        """Make the registry read-only (for sharing) and return it."""
+        self._frozen = True
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
+    def _check_mutable(self) -> None:
+        if self._frozen:
+            raise RuntimeError("Cannot modify a frozen ToolRegistry")
     
     def get(self, name: str) -> Tool | None:
         """Get a tool by name."""
@@ -32,8 +59,15 @@ class ToolRegistry:
         return name in self._tools
     
     def get_definitions(self) -> list[dict[str, Any]]:
-        """Get all tool definitions in OpenAI format."""
-        return [tool.to_schema() for tool in self._tools.values()]
+        """
+        Get all tool definitions in OpenAI format.
+
+        The same cached list is returned until tools are added or removed;
+        callers must not modify it.
+        """
+        if self._definitions is None:
+            self._definitions = [tool.to_schema() for tool in self._tools.values()]
+        return self._definitions
     
     async def execute(self, name: str, params: dict[str, Any]) -> str:
         """
@@ -57,7 +91,20 @@ class ToolRegistry:
             errors = tool.validate_params(params)
             if errors:
                 return f"Error: Invalid parameters for tool '{name}': " + "; ".join(errors)
-            return await tool.execute(**params)
+            if self.cache is None:
+                return await tool.execute(**params)
+
+            cached, ticket = self.cache.lookup(tool, params)
+            if cached is not None:
+                return cached
+            try:
+                result = await tool.execute(**params)
+            finally:
+                if not tool.cacheable:
+                    self.cache.after_write(tool, params)
+            if ticket is not None:
+                self.cache.store(ticket, result)
+            return result
         except Exception as e:
             return f"Error executing {name}: {str(e)}"
     
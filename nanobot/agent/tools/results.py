@@ -0,0 +1,152 @@
+"""Scratch store for large tool results, paged back in with read_result."""
+
+import hashlib
+import re
+import time
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.agent.tools.base import Tool
+
+_HANDLE_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+PRUNE_INTERVAL_S = 3600  # Old results are looked for at most this often
+
+
+class ResultStore:
+    """
+    Keeps oversized tool results out of the conversation.
+
+    A result longer than `threshold` chars is written to `directory` and
+    replaced by its first `preview_chars` chars plus a handle, so the full
+    text is sent to the LLM only in the pieces the model asks for. Handles
+    are content hashes: the same result is stored once. Files older than
+    `retention_hours` are deleted.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        threshold: int = 8000,
+        preview_chars: int = 2000,
+        retention_hours: float = 24,
+    ):
+        self.directory = directory
+        self.threshold = threshold
+        self.preview_chars = min(preview_chars, threshold)
+        self.retention_hours = retention_hours
+        self._last_prune = 0.0
+        self.spilled = 0
+        self.saved_chars = 0  # Chars kept out of messages by spilling
+
+    def _path(self, handle: str) -> Path:
+        return self.directory / f"{handle}.txt"
+
+    def spill(self, tool_name: str, result: str) -> str:
+        """Return `result`, or a preview plus handle if it is too long to send whole."""
+        if len(result) <= self.threshold or tool_name == "read_result":  # Its pages are already bounded
+            return result
+        digest = hashlib.sha1(result.encode("utf-8", errors="replace")).hexdigest()[:12]
+        handle = f"{re.sub(r'[^A-Za-z0-9_-]', '_', tool_name)}-{digest}"
+        path = self._path(handle)
+        try:
+            if not path.exists():
+                self.directory.mkdir(parents=True, exist_ok=True)
+                path.write_text(result, encoding="utf-8")
+            else:
+                path.touch()  # Keep it for another retention period
+        except OSError as e:
+            logger.warning(f"Could not store large {tool_name} result, sending it whole: {e}")
+            return result
+        self._maybe_prune()
+
+        shown = self.preview_chars
+        self.spilled += 1
+        self.saved_chars += len(result) - shown
+        return (
+            f"{result[:shown]}\n\n"
+            f"[{tool_name} returned {len(result):,} chars ({result.count(chr(10)) + 1:,} lines); "
+            f"only the first {shown:,} are shown. The full result is stored as '{handle}': "
+            f"call read_result with handle='{handle}' and offset={shown} to read the rest.]"
+        )
+
+    def read(self, handle: str) -> str | None:
+        """Full text of a stored result, or None if the handle is unknown or expired."""
+        if not _HANDLE_RE.match(handle):
+            return None
+        try:
+            return self._path(handle).read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def _maybe_prune(self) -> None:
+        now = time.monotonic()
+        if self._last_prune and now - self._last_prune < PRUNE_INTERVAL_S:
+            return
+        self._last_prune = now
+        cutoff = time.time() - self.retention_hours * 3600
+        for path in self.directory.glob("*.txt"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> dict[str, int]:
+        return {"spilled": self.spilled, "saved_tokens": self.saved_chars // 4}
+
+
+class ReadResultTool(Tool):
+    """Tool to page through a tool result that was too large to send whole."""
+
+    def __init__(self, store: ResultStore):
+        self._store = store
+
+    @property
+    def name(self) -> str:
+        return "read_result"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Read part of a large tool result that was shortened to a preview. "
+            "Use the handle given at the end of the preview."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "handle": {
+                    "type": "string",
+                    "pattern": _HANDLE_RE.pattern,
+                    "description": "Handle from the shortened result"
+                },
+                "offset": {
+                    "type": "integer",
+                    "minimum": 0,
+                    "description": "Character offset to start reading at (default: 0)"
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": self._store.threshold,
+                    "description": f"Maximum characters to return (default and max: {self._store.threshold})"
+                }
+            },
+            "required": ["handle"]
+        }
+
+    async def execute(self, handle: str, offset: int = 0, limit: int | None = None, **kwargs: Any) -> str:
+        text = self._store.read(handle)
+        if text is None:
+            return f"Error: No stored result '{handle}' (results are kept for {self._store.retention_hours:g} hours)"
+        if offset >= len(text):
+            return f"Error: offset {offset} is past the end of '{handle}' ({len(text)} chars)"
+        end = min(len(text), offset + min(limit or self._store.threshold, self._store.threshold))
+        page = f"[{handle}: chars {offset}-{end} of {len(text)}]\n{text[offset:end]}"
+        if end < len(text):
+            page += f"\n[{len(text) - end} more chars; continue with offset={end}]"
+        return page
@@ -0,0 +1,223 @@
+"""Per-turn tool subset selection, so large MCP tool sets aren't sent on every LLM call."""
+
+import json
+import re
+from contextvars import ContextVar
+from typing import Any
+
+from loguru import logger
+
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolRegistry
+
+MIN_SCORE = 0.05  # Tools scoring below this are never picked by relevance
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it me my of on or please that the this to "
+    "use what with you your".split()
+)
+
+
+# The running turn's selection, for list_tools (each turn runs in its own task)
+current_selection: ContextVar["ToolSelection | None"] = ContextVar("current_selection", default=None)
+
+
+def _words(text: str) -> set[str]:
+    return {w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS and len(w) > 1}
+
+
+def _tool_text(tool: Tool) -> str:
+    return f"{tool.name.replace('_', ' ')} {tool.description}"
+
+
+class ToolSelection:
+    """
+    The tools sent to the LLM during one turn.
+
+    Created by `ToolRouter.begin_turn`. Each turn owns its selection, so
+    concurrent turns (e.g. a cron job next to a chat turn) never see each
+    other's tool subsets or `list_tools` activations.
+    """
+
+    def __init__(self, router: "ToolRouter", active: set[str] | None):
+        self.router = router
+        self.active = active  # None while routing is off: every tool is sent
+        self._cached: tuple[tuple[int, frozenset[str]], list[dict[str, Any]], int, int] | None = None
+        self.sent_chars = self.full_chars = 0
+
+    def activate(self, names: list[str]) -> None:
+        """Send these tools for the rest of the turn."""
+        if self.active is not None:
+            self.active.update(name for name in names if name in self.router.registry)
+
+    def definitions(self) -> list[dict[str, Any]]:
+        """Tool definitions for the next LLM call."""
+        registry = self.router.registry
+        full = registry.get_definitions()
+        if self.active is None or not self.router.routing:
+            return full
+        # ((registry version, active names), definitions, their size, size of all definitions)
+        key = (registry.version, frozenset(self.active))
+        if self._cached is None or self._cached[0] != key:
+            chosen = [d for d in full if d["function"]["name"] in self.active]
+            self._cached = (key, chosen, len(json.dumps(chosen)), len(json.dumps(full)))
+        _, chosen, sent, total = self._cached
+        self.sent_chars += sent
+        self.full_chars += total
+        self.router.sent_chars += sent
+        self.router.full_chars += total
+        return chosen
+
+    @property
+    def saved_tokens(self) -> int:
+        """Tool schema tokens saved in this turn (estimated at ~4 chars per token)."""
+        return (self.full_chars - self.sent_chars) // 4
+
+
+class ToolRouter:
+    """
+    Chooses which tool definitions are sent to the LLM during a turn.
+
+    Core tools (every built-in tool, plus any listed in `core_tools`) are
+    always sent. Other tools, i.e. MCP tools, are ranked against the user's
+    message and the best `max_tools` minus core are added. Ranking uses the
+    configured embedder when numpy is available, keyword overlap otherwise.
+    The `list_tools` tool lets the model search everything registered and
+    enables what it finds for the rest of the turn.
+
+    While the registry holds no more than `max_tools` tools, all of them are
+    sent and routing is a no-op.
+
+    Args:
+        registry: The registry whose tools are routed.
+        max_tools: Target number of tools per LLM call (core tools always count in full).
+        core_tools: Extra tool names (or name prefixes ending in "*") that are always sent.
+        embedding_model: fastembed model for ranking; empty uses the hashing embedder.
+    """
+
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        max_tools: int = 24,
+        core_tools: list[str] | None = None,
+        embedding_model: str = "",
+    ):
+        self.registry = registry
+        self.max_tools = max_tools
+        self.core_tools = core_tools or []
+        self.embedding_model = embedding_model
+        self._embedder: Any = None
+        self._index: tuple[int, list[str], Any] | None = None  # (registry version, names, vectors)
+        # Schema characters sent, summed over LLM calls, and what sending every tool would have cost
+        self.sent_chars = self.full_chars = 0
+
+    def is_core(self, name: str) -> bool:
+        if not name.startswith("mcp_"):
+            return True
+        return any(
+            name.startswith(pattern[:-1]) if pattern.endswith("*") else name == pattern
+            for pattern in self.core_tools
+        )
+
+    @property
+    def routing(self) -> bool:
+        return len(self.registry) > self.max_tools
+
+    def begin_turn(self, query: str) -> ToolSelection:
+        """Pick the tools for a new turn from the user's message."""
+        if not self.routing:
+            return ToolSelection(self, None)
+        core = {name for name in self.registry.tool_names if self.is_core(name)}
+        room = max(0, self.max_tools - len(core))
+        matched = [tool.name for tool in self.search(query, limit=room)] if room else []
+        logger.debug(f"Tool routing: {len(core) + len(matched)}/{len(self.registry)} tools for this turn ({matched})")
+        return ToolSelection(self, core | set(matched))
+
+    def stats(self) -> dict[str, Any]:
+        """Tool schema tokens saved over all turns (estimated at ~4 chars per token)."""
+        return {
+            "sent_tokens": self.sent_chars // 4,
+            "full_tokens": self.full_chars // 4,
+            "saved_tokens": (self.full_chars - self.sent_chars) // 4,
+        }
+
+    def search(self, query: str, limit: int = 10, include_core: bool = False) -> list[Tool]:
+        """Rank tools by relevance to `query` (best first, non-matching tools omitted)."""
+        tools = [
+            tool for name in self.registry.tool_names
+            if (tool := self.registry.get(name)) and (include_core or not self.is_core(name))
+        ]
+        if not tools or limit <= 0:
+            return []
+        scores = self._scores(query, tools)
+        ranked = sorted(zip(scores, range(len(tools))), key=lambda pair: -pair[0])
+        return [tools[i] for score, i in ranked[:limit] if score >= MIN_SCORE]
+
+    def _scores(self, query: str, tools: list[Tool]) -> list[float]:
+        from nanobot.agent.memory_retrieval import NUMPY_AVAILABLE, make_embedder
+        if not NUMPY_AVAILABLE:
+            query_words = _words(query)
+            return [
+                len(query_words & (words := _words(_tool_text(t)))) / (len(words) ** 0.5 or 1.0)
+                for t in tools
+            ]
+
+        if self._embedder is None:
+            self._embedder = make_embedder(self.embedding_model)
+        names = [t.name for t in tools]
+        if self._index is None or self._index[0] != self.registry.version or self._index[1] != names:
+            self._index = (self.registry.version, names, self._embedder.embed([_tool_text(t) for t in tools]))
+        query_vec = self._embedder.embed([query])[0]
+        return (self._index[2] @ query_vec).tolist()
+
+
+class ListToolsTool(Tool):
+    """
+    Lets the model find and enable tools that routing left out of the turn.
+
+    Tools found are activated in the running turn's `current_selection`.
+    """
+
+    def __init__(self, router: ToolRouter):
+        self._router = router
+
+    @property
+    def name(self) -> str:
+        return "list_tools"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Search all available tools, including ones not currently offered to you "
+            "(e.g. tools from connected MCP servers). Matching tools become callable right away."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "What you want to do, e.g. 'query github issues'. Empty lists every tool name."
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 50,
+                    "description": "Maximum number of tools to return (default: 10)"
+                }
+            }
+        }
+
+    async def execute(self, query: str = "", limit: int = 10, **kwargs: Any) -> str:
+        if not query.strip():
+            names = self._router.registry.tool_names
+            return f"{len(names)} tools available: " + ", ".join(names)
+        tools = self._router.search(query, limit=limit, include_core=True)
+        if not tools:
+            return f"No tools match '{query}'. Call list_tools with an empty query to see every tool name."
+        if selection := current_selection.get():
+            selection.activate([t.name for t in tools])
+        lines = [f"- {t.name}: {t.description[:200]}" for t in tools]
+        return "These tools are now available:\n" + "\n".join(lines)
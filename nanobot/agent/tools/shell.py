@@ -60,6 +60,9 @@ class ExecTool(Tool):
             "required": ["command"]
         }
     
+    def cache_paths(self, params: dict[str, Any]) -> None:
+        return None  # A command may change any file
+    
     async def execute(self, command: str, working_dir: str | None = None, **kwargs: Any) -> str:
         cwd = working_dir or self.working_dir or os.getcwd()
         guard_error = self._guard_command(command, cwd)
@@ -57,6 +57,8 @@ class WebSearchTool(Tool):
         "required": ["query"]
     }
     
+    cacheable = True  # Results are reused for the result cache's TTL
+    
     def __init__(self, api_key: str | None = None, max_results: int = 5):
         self.api_key = api_key or os.environ.get("BRAVE_API_KEY", "")
         self.max_results = max_results
@@ -105,6 +107,8 @@ class WebFetchTool(Tool):
         "required": ["url"]
     }
     
+    cacheable = True  # Results are reused for the result cache's TTL
+    
     def __init__(self, max_chars: int = 50000):
         self.max_chars = max_chars
     
@@ -1,12 +1,20 @@
 """Base channel interface for chat platforms."""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, TypeVar
 
 from loguru import logger
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
+from nanobot.channels.debounce import InboundDebouncer
+from nanobot.channels.ratelimit import RateLimitedError, RateLimiter
+
+if TYPE_CHECKING:
+    from nanobot.providers.transcription import TranscriptionService
+
+T = TypeVar("T")
 
 
 class BaseChannel(ABC):
@@ -18,6 +26,10 @@ class BaseChannel(ABC):
     """
     
     name: str = "base"
+
+    # Outbound API limits as (calls per second, burst); None means unlimited
+    global_rate_limit: tuple[float, float] | None = None
+    chat_rate_limit: tuple[float, float] | None = None
     
     def __init__(self, config: Any, bus: MessageBus):
         """
@@ -30,6 +42,13 @@ class BaseChannel(ABC):
         self.config = config
         self.bus = bus
         self._running = False
+        self.rate_limiter = RateLimiter(self.global_rate_limit, self.chat_rate_limit)
+        self._debouncer: InboundDebouncer[InboundMessage] = InboundDebouncer(
+            lambda: self.debounce_seconds, self._flush_inbound
+        )
+        # Shared voice transcription queue, assigned by the ChannelManager
+        self.transcriber: "TranscriptionService | None" = None
+        self._intake_tails: dict[str, asyncio.Task] = {}
     
     @abstractmethod
     async def start(self) -> None:
@@ -58,6 +77,43 @@ class BaseChannel(ABC):
         """
         pass
     
+    def _rate_limit_error(self, error: Exception) -> RateLimitedError | None:
+        """
+        Recognize a platform's rate-limit error.
+
+        Channels override this to translate SDK-specific errors (e.g. Telegram's
+        RetryAfter) into RateLimitedError.
+        """
+        return error if isinstance(error, RateLimitedError) else None
+
+    async def _call_api(self, chat_id: str, call: Callable[[], Awaitable[T]], retries: int = 3) -> T:
+        """
+        Make one outbound API call within the channel's rate limits.
+
+        Waits for the chat's and the global token bucket, and on a rate-limit
+        error blocks the affected bucket for the server's `retry_after` and
+        retries. Waiting only holds up this chat's outbound lane.
+
+        Args:
+            chat_id: The chat the call targets (used as the per-chat route key).
+            call: Zero-argument coroutine function performing the request.
+            retries: How many times to retry after being rate limited.
+
+        Returns:
+            The result of `call`.
+        """
+        for attempt in range(retries + 1):
+            await self.rate_limiter.acquire(chat_id)
+            try:
+                return await call()
+            except Exception as e:
+                limited = self._rate_limit_error(e)
+                if limited is None or attempt == retries:
+                    raise
+                logger.warning(f"{self.name} rate limited, retrying in {limited.retry_after:.1f}s")
+                self.rate_limiter.block(limited.retry_after, None if limited.is_global else chat_id)
+        raise AssertionError("unreachable")
+
     def is_allowed(self, sender_id: str) -> bool:
         """
         Check if a sender is allowed to use this bot.
@@ -89,7 +145,8 @@ class BaseChannel(ABC):
         chat_id: str,
         content: str,
         media: list[str] | None = None,
-        metadata: dict[str, Any] | None = None
+        metadata: dict[str, Any] | None = None,
+        audio: list[str] | None = None,
     ) -> None:
         """
         Handle an incoming message from the chat platform.
@@ -102,6 +159,8 @@ class BaseChannel(ABC):
             content: Message text content.
             media: Optional list of media URLs.
             metadata: Optional channel-specific metadata.
+            audio: Local audio files to transcribe. The message is published once
+                their transcripts are ready, without holding up further intake.
         """
         if not self.is_allowed(sender_id):
             logger.warning(
@@ -119,7 +178,82 @@ class BaseChannel(ABC):
             metadata=metadata or {}
         )
         
-        await self.bus.publish_inbound(msg)
+        if audio and self.transcriber:
+            self._deliver_later(msg, [self.transcriber.submit(path) for path in audio])
+        elif msg.chat_id in self._intake_tails:
+            # Keep chat order: wait behind a message whose audio is still being transcribed
+            self._deliver_later(msg, [])
+        else:
+            await self._deliver(msg)
+
+    def _deliver_later(self, msg: InboundMessage, transcripts: list[asyncio.Future[str]]) -> None:
+        """Deliver `msg` in the background once its transcripts and earlier messages in the chat are done."""
+        previous = self._intake_tails.get(msg.chat_id)
+
+        async def run() -> None:
+            # Shielded: a transcript may be shared with another message waiting on the same audio
+            texts = await asyncio.gather(*(asyncio.shield(f) for f in transcripts), return_exceptions=True)
+            if previous:
+                await asyncio.wait({previous})
+            notes = [f"[transcription: {t}]" for t in texts if isinstance(t, str) and t]
+            if notes:
+                msg.content = "\n".join([msg.content, *notes]) if msg.content else "\n".join(notes)
+            await self._deliver(msg)
+
+        task = asyncio.create_task(run())
+        self._intake_tails[msg.chat_id] = task
+
+        def done(t: asyncio.Task) -> None:
+            if self._intake_tails.get(msg.chat_id) is t:
+                del self._intake_tails[msg.chat_id]
+            if not t.cancelled() and t.exception():
+                logger.error(f"Failed to deliver {self.name} message: {t.exception()}")
+
+        task.add_done_callback(done)
+
+    async def _deliver(self, msg: InboundMessage) -> None:
+        """Publish an inbound message, coalescing bursts when debouncing is on."""
+        if self.debounce_seconds <= 0:
+            await self.bus.publish_inbound(msg)
+            return
+
+        # Coalesce a burst from the same sender in the same chat into one turn.
+        # Commands are never held back: pending text goes first, then the command.
+        key = f"{msg.chat_id}\x00{msg.sender_id}"
+        if msg.content.lstrip().startswith("/"):
+            await self._debouncer.flush(key, "command")
+            await self.bus.publish_inbound(msg)
+        else:
+            await self._debouncer.add(key, msg)
+
+    async def flush_pending(self) -> None:
+        """Deliver inbound messages still held back by debouncing (called after `stop`)."""
+        if count := await self._debouncer.flush_all("shutdown"):
+            logger.info(f"{self.name}: delivered {count} buffered message batch(es) on stop")
+
+    @property
+    def debounce_seconds(self) -> float:
+        """Quiet period before buffered inbound messages are delivered (0 = off)."""
+        return max(0, getattr(self.config, "debounce_ms", 0) or 0) / 1000.0
+
+    async def _flush_inbound(self, key: str, messages: list[InboundMessage], reason: str) -> None:
+        await self.bus.publish_inbound(self._merge_inbound(messages))
+
+    @staticmethod
+    def _merge_inbound(messages: list[InboundMessage]) -> InboundMessage:
+        """Merge consecutive messages into one, keeping the last one's metadata."""
+        if len(messages) == 1:
+            return messages[0]
+        last = messages[-1]
+        return InboundMessage(
+            channel=last.channel,
+            sender_id=last.sender_id,
+            chat_id=last.chat_id,
+            content="\n".join(m.content for m in messages if m.content),
+            timestamp=last.timestamp,
+            media=[path for m in messages for path in m.media],
+            metadata={**last.metadata, "buffered_count": len(messages)},
+        )
     
     @property
     def is_running(self) -> bool:
@@ -0,0 +1,87 @@
+"""Per-chat buffering of rapid-fire inbound messages."""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class DelayState(Generic[T]):
+    """Per-key delayed message state."""
+    entries: list[T] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    timer: asyncio.Task | None = None
+
+
+class InboundDebouncer(Generic[T]):
+    """
+    Buffers entries per key and flushes them together once the key goes quiet.
+
+    Every `add` restarts the key's timer, so a burst of messages is delivered
+    as one batch `delay()` seconds after the last of them. `flush` delivers a
+    key's pending entries immediately (e.g. on a mention or a command), and
+    `flush_all` delivers everything still buffered (e.g. on shutdown).
+
+    Args:
+        delay: Returns the quiet period in seconds (read on every add, so config changes apply).
+        on_flush: Called with (key, entries, reason) for each non-empty batch.
+    """
+
+    def __init__(
+        self,
+        delay: Callable[[], float],
+        on_flush: Callable[[str, list[T], str], Awaitable[None]],
+    ):
+        self._delay = delay
+        self._on_flush = on_flush
+        self._states: dict[str, DelayState[T]] = {}
+
+    async def add(self, key: str, entry: T) -> None:
+        """Buffer an entry and (re)start the key's timer."""
+        state = self._states.setdefault(key, DelayState())
+        async with state.lock:
+            state.entries.append(entry)
+            if state.timer:
+                state.timer.cancel()
+            state.timer = asyncio.create_task(self._flush_after(key))
+
+    async def _flush_after(self, key: str) -> None:
+        await asyncio.sleep(max(0.0, self._delay()))
+        await self.flush(key, "timer")
+
+    async def flush(self, key: str, reason: str, entry: T | None = None) -> None:
+        """Deliver a key's buffered entries (plus `entry`, if given) now."""
+        state = self._states.get(key)
+        if state is None:
+            if entry is not None:
+                await self._on_flush(key, [entry], reason)
+            return
+        async with state.lock:
+            if entry is not None:
+                state.entries.append(entry)
+            current = asyncio.current_task()
+            if state.timer and state.timer is not current:
+                state.timer.cancel()
+            state.timer = None
+            entries = state.entries[:]
+            state.entries.clear()
+            # Nothing awaits while the lock is held, so no add() can be racing on this state
+            self._states.pop(key, None)
+        if entries:
+            await self._on_flush(key, entries, reason)
+
+    async def flush_all(self, reason: str) -> int:
+        """Deliver every key's buffered entries now and cancel their timers; returns the number of batches."""
+        keys = list(self._states)
+        for key in keys:
+            await self.flush(key, reason)
+        return len(keys)
+
+    async def cancel(self) -> None:
+        """Drop all buffered entries and timers."""
+        for state in self._states.values():
+            if state.timer:
+                state.timer.cancel()
+        self._states.clear()
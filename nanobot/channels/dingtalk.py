@@ -11,6 +11,7 @@ import httpx
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.ratelimit import RateLimitedError
 from nanobot.config.schema import DingTalkConfig
 
 try:
@@ -95,6 +96,9 @@ class DingTalkChannel(BaseChannel):
     """
 
     name = "dingtalk"
+    # Robot messages are throttled per app (QPS) and per user
+    chat_rate_limit = (1.0, 3)
+    global_rate_limit = (20.0, 20)
 
     def __init__(self, config: DingTalkConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -215,8 +219,15 @@ class DingTalkChannel(BaseChannel):
             logger.warning("DingTalk HTTP client not initialized, cannot send")
             return
 
-        try:
+        async def post() -> httpx.Response:
             resp = await self._http.post(url, json=data, headers=headers)
+            # Throttling shows up as HTTP 429 or a 403 with a QpsLimit error code
+            if resp.status_code == 429 or (resp.status_code == 403 and "QpsLimit" in resp.text):
+                raise RateLimitedError(float(resp.headers.get("Retry-After", 1)), is_global=resp.status_code == 403)
+            return resp
+
+        try:
+            resp = await self._call_api(msg.chat_id, post)
             if resp.status_code != 200:
                 logger.error(f"DingTalk send failed: {resp.text}")
             else:
@@ -2,7 +2,7 @@
 
 import asyncio
 import json
-from pathlib import Path
+from functools import partial
 from typing import Any
 
 import httpx
@@ -12,8 +12,9 @@ from loguru import logger
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.ratelimit import RateLimitedError
 from nanobot.config.schema import DiscordConfig
-
+from nanobot.media import get_media_store, guess_extension
 
 DISCORD_API_BASE = "https://discord.com/api/v10"
 MAX_ATTACHMENT_BYTES = 20 * 1024 * 1024  # 20MB
@@ -23,6 +24,9 @@ class DiscordChannel(BaseChannel):
     """Discord channel using Gateway websocket."""
 
     name = "discord"
+    # Message creation: 5 per 5s per channel, 50 req/s per bot
+    chat_rate_limit = (1.0, 5)
+    global_rate_limit = (50.0, 50)
 
     def __init__(self, config: DiscordConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -87,26 +91,32 @@ class DiscordChannel(BaseChannel):
 
         headers = {"Authorization": f"Bot {self.config.token}"}
 
+        async def post() -> None:
+            response = await self._http.post(url, headers=headers, json=payload)
+            if response.status_code == 429:
+                data = response.json()
+                raise RateLimitedError(float(data.get("retry_after", 1.0)), is_global=bool(data.get("global")))
+            response.raise_for_status()
+            self._update_rate_limit(msg.chat_id, response.headers)
+
         try:
-            for attempt in range(3):
-                try:
-                    response = await self._http.post(url, headers=headers, json=payload)
-                    if response.status_code == 429:
-                        data = response.json()
-                        retry_after = float(data.get("retry_after", 1.0))
-                        logger.warning(f"Discord rate limited, retrying in {retry_after}s")
-                        await asyncio.sleep(retry_after)
-                        continue
-                    response.raise_for_status()
-                    return
-                except Exception as e:
-                    if attempt == 2:
-                        logger.error(f"Error sending Discord message: {e}")
-                    else:
-                        await asyncio.sleep(1)
+            await self._call_api(msg.chat_id, post)
+        except Exception as e:
+            logger.error(f"Error sending Discord message: {e}")
         finally:
             await self._stop_typing(msg.chat_id)
 
+    def _update_rate_limit(self, chat_id: str, headers: httpx.Headers) -> None:
+        """Feed Discord's X-RateLimit-* response headers into the channel's bucket."""
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        if remaining is None or reset_after is None:
+            return
+        try:
+            self.rate_limiter.update(chat_id, int(remaining), float(reset_after))
+        except ValueError:
+            pass
+
     async def _gateway_loop(self) -> None:
         """Main gateway loop: identify, heartbeat, dispatch events."""
         if not self._ws:
@@ -199,7 +209,8 @@ class DiscordChannel(BaseChannel):
 
         content_parts = [content] if content else []
         media_paths: list[str] = []
-        media_dir = Path.home() / ".nanobot" / "media"
+        audio_paths: list[str] = []
+        downloads: list[dict[str, Any]] = []
 
         for attachment in payload.get("attachments") or []:
             url = attachment.get("url")
@@ -210,17 +221,26 @@ class DiscordChannel(BaseChannel):
             if size and size > MAX_ATTACHMENT_BYTES:
                 content_parts.append(f"[attachment: {filename} - too large]")
                 continue
-            try:
-                media_dir.mkdir(parents=True, exist_ok=True)
-                file_path = media_dir / f"{attachment.get('id', 'file')}_{filename.replace('/', '_')}"
-                resp = await self._http.get(url)
-                resp.raise_for_status()
-                file_path.write_bytes(resp.content)
-                media_paths.append(str(file_path))
-                content_parts.append(f"[attachment: {file_path}]")
-            except Exception as e:
-                logger.warning(f"Failed to download Discord attachment: {e}")
-                content_parts.append(f"[attachment: {filename} - download failed]")
+            downloads.append(attachment)
+
+        results = await get_media_store().fetch_all([
+            (
+                f"discord:{att.get('id') or att['url']}",
+                partial(self._download, att["url"]),
+                guess_extension(att.get("content_type"), att.get("filename")),
+            )
+            for att in downloads
+        ])
+        for att, result in zip(downloads, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Failed to download Discord attachment: {result}")
+                content_parts.append(f"[attachment: {att.get('filename') or 'attachment'} - download failed]")
+                continue
+            media_paths.append(str(result))
+            content_parts.append(f"[attachment: {result}]")
+            # Voice messages and audio uploads
+            if (att.get("content_type") or "").startswith("audio/"):
+                audio_paths.append(str(result))
 
         reply_to = (payload.get("referenced_message") or {}).get("id")
 
@@ -231,6 +251,7 @@ class DiscordChannel(BaseChannel):
             chat_id=channel_id,
             content="\n".join(p for p in content_parts if p) or "[empty message]",
             media=media_paths,
+            audio=audio_paths,
             metadata={
                 "message_id": str(payload.get("id", "")),
                 "guild_id": payload.get("guild_id"),
@@ -238,6 +259,12 @@ class DiscordChannel(BaseChannel):
             },
         )
 
+    async def _download(self, url: str) -> bytes:
+        """Download an attachment from Discord's CDN."""
+        resp = await self._http.get(url)
+        resp.raise_for_status()
+        return resp.content
+
     async def _start_typing(self, channel_id: str) -> None:
         """Start periodic typing indicator for a channel."""
         await self._stop_typing(channel_id)
@@ -1,11 +1,15 @@
-"""Email channel implementation using IMAP polling + SMTP replies."""
+"""Email channel implementation using IMAP IDLE/polling + SMTP replies."""
 
 import asyncio
 import html
 import imaplib
+import json
 import re
+import select
 import smtplib
 import ssl
+import threading
+import time
 from datetime import date
 from email import policy
 from email.header import decode_header, make_header
@@ -20,6 +24,7 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import EmailConfig
+from nanobot.utils.helpers import get_data_path
 
 
 class EmailChannel(BaseChannel):
@@ -27,11 +32,13 @@ class EmailChannel(BaseChannel):
     Email channel.
 
     Inbound:
-    - Poll IMAP mailbox for unread messages.
+    - Keep one IMAP session open and wait for new mail with IDLE when the
+      server supports it, falling back to polling for unread messages.
     - Convert each message into an inbound event.
 
     Outbound:
-    - Send responses via SMTP back to the sender address.
+    - Send responses via SMTP back to the sender address, reusing one
+      authenticated connection across replies.
     """
 
     name = "email"
@@ -49,14 +56,26 @@ class EmailChannel(BaseChannel):
         "Nov",
         "Dec",
     )
+    _IDLE_REFRESH_SECONDS = 300  # Re-issue IDLE well before servers/NATs drop it (RFC 2177: 29 min)
+    _FETCH_BATCH_SIZE = 50  # Messages per UID FETCH round-trip
 
     def __init__(self, config: EmailConfig, bus: MessageBus):
         super().__init__(config, bus)
         self.config: EmailConfig = config
         self._last_subject_by_chat: dict[str, str] = {}
         self._last_message_id_by_chat: dict[str, str] = {}
-        self._processed_uids: set[str] = set()  # Capped to prevent unbounded growth
-        self._MAX_PROCESSED_UIDS = 100000
+        # High-water mark of processed UIDs, valid only for the mailbox's UIDVALIDITY
+        self._state_path = get_data_path() / "email" / "uid_state.json"
+        self._state_key = f"{config.imap_username}@{config.imap_host}/{config.imap_mailbox or 'INBOX'}"
+        self._uid_validity = 0
+        self._last_uid = 0
+        self._uid_state_loaded = False
+        # Long-lived connections, each used from worker threads under its own lock
+        self._imap: imaplib.IMAP4 | None = None
+        self._imap_idle_capable: bool | None = None  # Probed once per IMAP connection
+        self._imap_lock = threading.Lock()
+        self._smtp: smtplib.SMTP | None = None
+        self._smtp_lock = threading.Lock()
 
     async def start(self) -> None:
         """Start polling IMAP for inbound emails."""
@@ -71,10 +90,11 @@ class EmailChannel(BaseChannel):
             return
 
         self._running = True
-        logger.info("Starting Email channel (IMAP polling mode)...")
+        logger.info("Starting Email channel (IMAP IDLE/polling mode)...")
 
         poll_seconds = max(5, int(self.config.poll_interval_seconds))
         while self._running:
+            idle = False
             try:
                 inbound_items = await asyncio.to_thread(self._fetch_new_messages)
                 for item in inbound_items:
@@ -93,14 +113,21 @@ class EmailChannel(BaseChannel):
                         content=item["content"],
                         metadata=item.get("metadata", {}),
                     )
+
+                idle = self.config.imap_idle and await asyncio.to_thread(self._supports_idle)
+                if idle:
+                    await asyncio.to_thread(self._idle_wait, self._IDLE_REFRESH_SECONDS)
             except Exception as e:
                 logger.error(f"Email polling error: {e}")
+                idle = False
 
-            await asyncio.sleep(poll_seconds)
+            if not idle and self._running:
+                await asyncio.sleep(poll_seconds)
 
     async def stop(self) -> None:
-        """Stop polling loop."""
+        """Stop the inbound loop and close pooled connections."""
         self._running = False
+        await asyncio.to_thread(self._close_connections)
 
     async def send(self, msg: OutboundMessage) -> None:
         """Send email via SMTP."""
@@ -166,32 +193,252 @@ class EmailChannel(BaseChannel):
             return False
         return True
 
-    def _smtp_send(self, msg: EmailMessage) -> None:
+    def _close_connections(self) -> None:
+        with self._imap_lock:
+            self._close_imap()
+        with self._smtp_lock:
+            self._close_smtp()
+
+    # ---- SMTP ----
+
+    def _smtp_connect(self) -> smtplib.SMTP:
         timeout = 30
         if self.config.smtp_use_ssl:
-            with smtplib.SMTP_SSL(
+            smtp = smtplib.SMTP_SSL(
                 self.config.smtp_host,
                 self.config.smtp_port,
                 timeout=timeout,
-            ) as smtp:
-                smtp.login(self.config.smtp_username, self.config.smtp_password)
-                smtp.send_message(msg)
-            return
-
-        with smtplib.SMTP(self.config.smtp_host, self.config.smtp_port, timeout=timeout) as smtp:
+            )
+        else:
+            smtp = smtplib.SMTP(self.config.smtp_host, self.config.smtp_port, timeout=timeout)
             if self.config.smtp_use_tls:
                 smtp.starttls(context=ssl.create_default_context())
-            smtp.login(self.config.smtp_username, self.config.smtp_password)
-            smtp.send_message(msg)
+        smtp.login(self.config.smtp_username, self.config.smtp_password)
+        return smtp
+
+    def _get_smtp(self) -> smtplib.SMTP:
+        """
+        Return the pooled SMTP connection, reconnecting if it was dropped.
+
+        A reused connection is checked with NOOP first, so a connection the
+        server closed while idle is replaced before any message is sent on it.
+        """
+        if self._smtp is not None:
+            try:
+                alive = self._smtp.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                alive = False
+            if not alive:
+                self._close_smtp()
+        if self._smtp is None:
+            self._smtp = self._smtp_connect()
+        return self._smtp
+
+    def _close_smtp(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _smtp_send(self, msg: EmailMessage) -> None:
+        with self._smtp_lock:
+            try:
+                # Never retried: the server may already have accepted the
+                # message when an error (even a disconnect) is raised
+                self._get_smtp().send_message(msg)
+            except Exception:
+                self._close_smtp()
+                raise
+
+    # ---- IMAP ----
+
+    def _imap_connect(self) -> imaplib.IMAP4:
+        """Open an authenticated IMAP connection with the configured mailbox selected."""
+        if self.config.imap_use_ssl:
+            client = imaplib.IMAP4_SSL(self.config.imap_host, self.config.imap_port)
+        else:
+            client = imaplib.IMAP4(self.config.imap_host, self.config.imap_port)
+        try:
+            client.login(self.config.imap_username, self.config.imap_password)
+            status, _ = client.select(self.config.imap_mailbox or "INBOX")
+            if status != "OK":
+                raise imaplib.IMAP4.error(f"cannot select mailbox {self.config.imap_mailbox!r}")
+        except Exception:
+            self._logout(client)
+            raise
+        return client
+
+    @staticmethod
+    def _logout(client: Any) -> None:
+        try:
+            client.logout()
+        except Exception:
+            pass
+
+    def _get_imap(self) -> imaplib.IMAP4:
+        if self._imap is None:
+            client = self._imap_connect()
+            self._check_uid_validity(self._read_uid_validity(client))
+            self._imap = client
+        return self._imap
+
+    @staticmethod
+    def _read_uid_validity(client: Any) -> int:
+        """Get UIDVALIDITY from the untagged responses of the last SELECT (0 if unknown)."""
+        try:
+            _, data = client.response("UIDVALIDITY")
+            return int(data[-1]) if data and data[-1] else 0
+        except Exception:
+            return 0
+
+    def _close_imap(self) -> None:
+        client, self._imap = self._imap, None
+        self._imap_idle_capable = None
+        if client is not None:
+            self._logout(client)
+
+    def _supports_idle(self) -> bool:
+        """Check whether the IMAP server advertises IDLE (capabilities can change after login)."""
+        with self._imap_lock:
+            client = self._get_imap()
+            if self._imap_idle_capable is None:
+                try:
+                    status, data = client.capability()
+                    if status == "OK" and data and data[-1]:
+                        client.capabilities = tuple(data[-1].decode().upper().split())
+                except Exception:
+                    pass
+                self._imap_idle_capable = "IDLE" in getattr(client, "capabilities", ())
+                logger.debug(f"Email IMAP IDLE supported: {self._imap_idle_capable}")
+            return self._imap_idle_capable
+
+    def _idle_wait(self, timeout: float) -> bool:
+        """
+        Block in IMAP IDLE until the mailbox changes, `timeout` elapses or the channel stops.
+
+        Returns True if the server announced new mail. On any protocol error the
+        pooled connection is dropped so the next fetch reconnects.
+        """
+        with self._imap_lock:
+            client = self._get_imap()
+            tag = b"NBIDLE"
+            try:
+                client.send(tag + b" IDLE\r\n")
+                line = client.readline()
+                if not line.startswith(b"+"):
+                    raise imaplib.IMAP4.error(f"IDLE rejected: {line!r}")
+
+                changed = False
+                deadline = time.monotonic() + timeout
+                # Wake up every second to notice stop()
+                while self._running and time.monotonic() < deadline:
+                    if not self._imap_readable(client, 1.0):
+                        continue
+                    line = client.readline()
+                    if not line:
+                        raise imaplib.IMAP4.abort("connection closed during IDLE")
+                    if re.match(rb"\* \d+ (EXISTS|RECENT)", line):
+                        changed = True
+                        break
+
+                client.send(b"DONE\r\n")
+                while not line.startswith(tag):
+                    line = client.readline()
+                    if not line:
+                        raise imaplib.IMAP4.abort("connection closed ending IDLE")
+                return changed
+            except Exception:
+                self._close_imap()
+                raise
+
+    @staticmethod
+    def _imap_readable(client: Any, timeout: float) -> bool:
+        sock = client.sock
+        if isinstance(sock, ssl.SSLSocket) and sock.pending():
+            return True
+        readable, _, _ = select.select([sock], [], [], timeout)
+        return bool(readable)
+
+    # ---- UID high-water mark ----
+
+    def _load_uid_state(self) -> None:
+        self._uid_state_loaded = True
+        try:
+            data = json.loads(self._state_path.read_text("utf-8"))
+            entry = data.get("mailboxes", {}).get(self._state_key, {})
+            self._uid_validity = int(entry.get("uidValidity", 0))
+            self._last_uid = int(entry.get("lastUid", 0))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to read email UID state: {e}")
+
+    def _save_uid_state(self) -> None:
+        try:
+            try:
+                data = json.loads(self._state_path.read_text("utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            data.setdefault("mailboxes", {})[self._state_key] = {
+                "uidValidity": self._uid_validity,
+                "lastUid": self._last_uid,
+            }
+            self._state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._state_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=2) + "\n", "utf-8")
+            tmp.replace(self._state_path)
+        except Exception as e:
+            logger.warning(f"Failed to save email UID state: {e}")
+
+    def _check_uid_validity(self, uid_validity: int) -> None:
+        """Load the stored high-water mark, discarding it if the mailbox's UIDs were reset."""
+        if not self._uid_state_loaded:
+            self._load_uid_state()
+        if uid_validity and uid_validity != self._uid_validity:
+            if self._uid_validity:
+                logger.info(f"Email UIDVALIDITY changed for {self._state_key}, resetting UID high-water mark")
+            self._uid_validity = uid_validity
+            self._last_uid = 0
+            self._save_uid_state()
+
+    @staticmethod
+    def _uid_set(uids: list[int]) -> str:
+        """Compress sorted UIDs into an IMAP sequence set ("1:3,7,9:10")."""
+        ranges: list[str] = []
+        start = prev = uids[0]
+        for uid in uids[1:] + [None]:
+            if uid is not None and uid == prev + 1:
+                prev = uid
+                continue
+            ranges.append(str(start) if start == prev else f"{start}:{prev}")
+            if uid is not None:
+                start = prev = uid
+        return ",".join(ranges)
 
     def _fetch_new_messages(self) -> list[dict[str, Any]]:
-        """Poll IMAP and return parsed unread messages."""
-        return self._fetch_messages(
-            search_criteria=("UNSEEN",),
-            mark_seen=self.config.mark_seen,
-            dedupe=True,
-            limit=0,
-        )
+        """Fetch unread messages over the long-lived IMAP session."""
+        with self._imap_lock:
+            for attempt in range(2):
+                try:
+                    return self._fetch_with_client(
+                        self._get_imap(),
+                        search_criteria=("UNSEEN",),
+                        mark_seen=self.config.mark_seen,
+                        dedupe=True,
+                        limit=0,
+                    )
+                except (imaplib.IMAP4.abort, OSError):
+                    # Stale session (server timeout, network change): reconnect once
+                    self._close_imap()
+                    if attempt:
+                        raise
+        return []
 
     def fetch_messages_between_dates(
         self,
@@ -226,108 +473,120 @@ class EmailChannel(BaseChannel):
         dedupe: bool,
         limit: int,
     ) -> list[dict[str, Any]]:
-        """Fetch messages by arbitrary IMAP search criteria."""
-        messages: list[dict[str, Any]] = []
-        mailbox = self.config.imap_mailbox or "INBOX"
-
-        if self.config.imap_use_ssl:
-            client = imaplib.IMAP4_SSL(self.config.imap_host, self.config.imap_port)
-        else:
-            client = imaplib.IMAP4(self.config.imap_host, self.config.imap_port)
-
+        """Fetch messages by arbitrary IMAP search criteria over a one-off connection."""
         try:
-            client.login(self.config.imap_username, self.config.imap_password)
-            status, _ = client.select(mailbox)
-            if status != "OK":
-                return messages
-
-            status, data = client.search(None, *search_criteria)
-            if status != "OK" or not data:
-                return messages
-
-            ids = data[0].split()
-            if limit > 0 and len(ids) > limit:
-                ids = ids[-limit:]
-            for imap_id in ids:
-                status, fetched = client.fetch(imap_id, "(BODY.PEEK[] UID)")
-                if status != "OK" or not fetched:
-                    continue
+            client = self._imap_connect()
+        except imaplib.IMAP4.error as e:
+            logger.warning(f"Email IMAP connection failed: {e}")
+            return []
+        try:
+            return self._fetch_with_client(client, search_criteria, mark_seen, dedupe, limit)
+        finally:
+            self._logout(client)
 
-                raw_bytes = self._extract_message_bytes(fetched)
-                if raw_bytes is None:
-                    continue
+    def _fetch_with_client(
+        self,
+        client: imaplib.IMAP4,
+        search_criteria: tuple[str, ...],
+        mark_seen: bool,
+        dedupe: bool,
+        limit: int,
+    ) -> list[dict[str, Any]]:
+        """
+        Search by UID and fetch matches in batches.
 
-                uid = self._extract_uid(fetched)
-                if dedupe and uid and uid in self._processed_uids:
-                    continue
+        With `dedupe`, only UIDs above the persisted high-water mark are
+        requested, and the mark advances (and is saved) after each batch.
+        """
+        floor = self._last_uid if dedupe else 0
+        if floor:
+            search_criteria = ("UID", f"{floor + 1}:*", *search_criteria)
+        status, data = client.uid("SEARCH", *search_criteria)
+        if status != "OK" or not data or not data[0]:
+            return []
 
-                parsed = BytesParser(policy=policy.default).parsebytes(raw_bytes)
-                sender = parseaddr(parsed.get("From", ""))[1].strip().lower()
-                if not sender:
-                    continue
+        # "n:*" always matches the highest UID, even when it is below n
+        uids = sorted(int(u) for u in data[0].split() if int(u) > floor)
+        if limit > 0 and len(uids) > limit:
+            uids = uids[-limit:]
 
-                subject = self._decode_header_value(parsed.get("Subject", ""))
-                date_value = parsed.get("Date", "")
-                message_id = parsed.get("Message-ID", "").strip()
-                body = self._extract_text_body(parsed)
-
-                if not body:
-                    body = "(empty email body)"
-
-                body = body[: self.config.max_body_chars]
-                content = (
-                    f"Email received.\n"
-                    f"From: {sender}\n"
-                    f"Subject: {subject}\n"
-                    f"Date: {date_value}\n\n"
-                    f"{body}"
-                )
-
-                metadata = {
-                    "message_id": message_id,
-                    "subject": subject,
-                    "date": date_value,
-                    "sender_email": sender,
-                    "uid": uid,
-                }
-                messages.append(
-                    {
-                        "sender": sender,
-                        "subject": subject,
-                        "message_id": message_id,
-                        "content": content,
-                        "metadata": metadata,
-                    }
-                )
-
-                if dedupe and uid:
-                    self._processed_uids.add(uid)
-                    # mark_seen is the primary dedup; this set is a safety net
-                    if len(self._processed_uids) > self._MAX_PROCESSED_UIDS:
-                        self._processed_uids.clear()
-
-                if mark_seen:
-                    client.store(imap_id, "+FLAGS", "\\Seen")
-        finally:
-            try:
-                client.logout()
-            except Exception:
-                pass
+        messages: list[dict[str, Any]] = []
+        for i in range(0, len(uids), self._FETCH_BATCH_SIZE):
+            batch = uids[i:i + self._FETCH_BATCH_SIZE]
+            status, fetched = client.uid("FETCH", self._uid_set(batch), "(UID BODY.PEEK[])")
+            if status != "OK" or not fetched:
+                continue
+
+            accepted: list[int] = []
+            for uid, raw_bytes in self._split_fetch_response(fetched):
+                item = self._parse_message(raw_bytes, str(uid))
+                if item:
+                    messages.append(item)
+                    accepted.append(uid)
+
+            if mark_seen and accepted:
+                client.uid("STORE", self._uid_set(sorted(accepted)), "+FLAGS", "(\\Seen)")
+            if dedupe:
+                self._last_uid = max(self._last_uid, batch[-1])
+                self._save_uid_state()
 
         return messages
 
+    def _parse_message(self, raw_bytes: bytes, uid: str) -> dict[str, Any] | None:
+        """Turn a raw RFC 822 message into an inbound item (None if it has no sender)."""
+        parsed = BytesParser(policy=policy.default).parsebytes(raw_bytes)
+        sender = parseaddr(parsed.get("From", ""))[1].strip().lower()
+        if not sender:
+            return None
+
+        subject = self._decode_header_value(parsed.get("Subject", ""))
+        date_value = parsed.get("Date", "")
+        message_id = parsed.get("Message-ID", "").strip()
+        body = self._extract_text_body(parsed)
+
+        if not body:
+            body = "(empty email body)"
+
+        body = body[: self.config.max_body_chars]
+        content = (
+            f"Email received.\n"
+            f"From: {sender}\n"
+            f"Subject: {subject}\n"
+            f"Date: {date_value}\n\n"
+            f"{body}"
+        )
+
+        metadata = {
+            "message_id": message_id,
+            "subject": subject,
+            "date": date_value,
+            "sender_email": sender,
+            "uid": uid,
+        }
+        return {
+            "sender": sender,
+            "subject": subject,
+            "message_id": message_id,
+            "content": content,
+            "metadata": metadata,
+        }
+
     @classmethod
     def _format_imap_date(cls, value: date) -> str:
         """Format date for IMAP search (always English month abbreviations)."""
         month = cls._IMAP_MONTHS[value.month - 1]
         return f"{value.day:02d}-{month}-{value.year}"
 
-    @staticmethod
-    def _extract_message_bytes(fetched: list[Any]) -> bytes | None:
+    @classmethod
+    def _split_fetch_response(cls, fetched: list[Any]) -> list[tuple[int, bytes]]:
+        """Pair each message literal in a multi-message FETCH response with its UID."""
+        result = []
         for item in fetched:
             if isinstance(item, tuple) and len(item) >= 2 and isinstance(item[1], (bytes, bytearray)):
-                return bytes(item[1])
-        return None
+                uid = cls._extract_uid([item])
+                if uid:
+                    result.append((int(uid), bytes(item[1])))
+        return result
 
     @staticmethod
     def _extract_uid(fetched: list[Any]) -> str:
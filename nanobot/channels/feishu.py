@@ -4,7 +4,9 @@ import asyncio
 import json
 import re
 import threading
+import time
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from loguru import logger
@@ -13,6 +15,8 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import FeishuConfig
+from nanobot.media import get_media_store, guess_extension
+from nanobot.utils.metrics import LatencyHistogram
 
 try:
     import lark_oapi as lark
@@ -22,6 +26,7 @@ try:
         CreateMessageReactionRequest,
         CreateMessageReactionRequestBody,
         Emoji,
+        GetMessageResourceRequest,
         P2ImMessageReceiveV1,
     )
     FEISHU_AVAILABLE = True
@@ -38,6 +43,9 @@ MSG_TYPE_MAP = {
     "sticker": "[sticker]",
 }
 
+# Message types whose attachment is downloaded through the message resource API
+RESOURCE_MSG_TYPES = ("image", "file", "audio", "media")
+
 
 def _extract_post_text(content_json: dict) -> str:
     """Extract plain text from Feishu post (rich text) message content.
@@ -108,6 +116,8 @@ class FeishuChannel(BaseChannel):
         self._ws_thread: threading.Thread | None = None
         self._processed_message_ids: OrderedDict[str, None] = OrderedDict()  # Ordered dedup cache
         self._loop: asyncio.AbstractEventLoop | None = None
+        self._send_executor: ThreadPoolExecutor | None = None
+        self.send_latency = LatencyHistogram()  # seconds per outbound message, card build included
     
     async def start(self) -> None:
         """Start the Feishu bot with WebSocket long connection."""
@@ -121,6 +131,9 @@ class FeishuChannel(BaseChannel):
         
         self._running = True
         self._loop = asyncio.get_running_loop()
+        # The SDK client is blocking: outbound sends and attachment downloads run on dedicated
+        # threads so a slow Feishu round-trip never stalls the event loop (or the default executor)
+        self._send_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="feishu-send")
         
         # Create Lark client for sending messages
         self._client = lark.Client.builder() \
@@ -153,7 +166,7 @@ class FeishuChannel(BaseChannel):
                 except Exception as e:
                     logger.warning(f"Feishu WebSocket error: {e}")
                 if self._running:
-                    import time; time.sleep(5)
+                    time.sleep(5)
         
         self._ws_thread = threading.Thread(target=run_ws, daemon=True)
         self._ws_thread.start()
@@ -173,6 +186,9 @@ class FeishuChannel(BaseChannel):
                 self._ws_client.stop()
             except Exception as e:
                 logger.warning(f"Error stopping WebSocket client: {e}")
+        if self._send_executor:
+            self._send_executor.shutdown(wait=False, cancel_futures=True)
+            self._send_executor = None
         logger.info("Feishu bot stopped")
     
     def _add_reaction_sync(self, message_id: str, emoji_type: str) -> None:
@@ -284,51 +300,96 @@ class FeishuChannel(BaseChannel):
 
         return elements or [{"tag": "markdown", "content": content}]
 
+    def _send_sync(self, chat_id: str, content: str) -> None:
+        """Build the card and send it (runs in the send executor, off the event loop)."""
+        # Determine receive_id_type based on chat_id format
+        # open_id starts with "ou_", chat_id starts with "oc_"
+        receive_id_type = "chat_id" if chat_id.startswith("oc_") else "open_id"
+
+        # Build card with markdown + table support
+        card = {
+            "config": {"wide_screen_mode": True},
+            "elements": self._build_card_elements(content),
+        }
+        request = CreateMessageRequest.builder() \
+            .receive_id_type(receive_id_type) \
+            .request_body(
+                CreateMessageRequestBody.builder()
+                .receive_id(chat_id)
+                .msg_type("interactive")
+                .content(json.dumps(card, ensure_ascii=False))
+                .build()
+            ).build()
+
+        response = self._client.im.v1.message.create(request)
+        if not response.success():
+            raise RuntimeError(
+                f"code={response.code}, msg={response.msg}, log_id={response.get_log_id()}"
+            )
+
     async def send(self, msg: OutboundMessage) -> None:
-        """Send a message through Feishu."""
-        if not self._client:
+        """Send a message through Feishu (non-blocking)."""
+        if not self._client or not self._send_executor:
             logger.warning("Feishu client not initialized")
             return
         
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        failed = False
         try:
-            # Determine receive_id_type based on chat_id format
-            # open_id starts with "ou_", chat_id starts with "oc_"
-            if msg.chat_id.startswith("oc_"):
-                receive_id_type = "chat_id"
-            else:
-                receive_id_type = "open_id"
-            
-            # Build card with markdown + table support
-            elements = self._build_card_elements(msg.content)
-            card = {
-                "config": {"wide_screen_mode": True},
-                "elements": elements,
-            }
-            content = json.dumps(card, ensure_ascii=False)
-            
-            request = CreateMessageRequest.builder() \
-                .receive_id_type(receive_id_type) \
-                .request_body(
-                    CreateMessageRequestBody.builder()
-                    .receive_id(msg.chat_id)
-                    .msg_type("interactive")
-                    .content(content)
-                    .build()
-                ).build()
-            
-            response = self._client.im.v1.message.create(request)
-            
-            if not response.success():
-                logger.error(
-                    f"Failed to send Feishu message: code={response.code}, "
-                    f"msg={response.msg}, log_id={response.get_log_id()}"
-                )
-            else:
-                logger.debug(f"Feishu message sent to {msg.chat_id}")
-                
+            await loop.run_in_executor(self._send_executor, self._send_sync, msg.chat_id, msg.content)
+            logger.debug(f"Feishu message sent to {msg.chat_id}")
         except Exception as e:
+            failed = True
             logger.error(f"Error sending Feishu message: {e}")
+        finally:
+            self.send_latency.observe(time.perf_counter() - started, error=failed)
     
+    def _download_resource_sync(self, message_id: str, file_key: str, resource_type: str) -> bytes:
+        """Sync helper for downloading a message's image/file (runs in thread pool)."""
+        request = GetMessageResourceRequest.builder() \
+            .message_id(message_id) \
+            .file_key(file_key) \
+            .type(resource_type) \
+            .build()
+        response = self._client.im.v1.message_resource.get(request)
+        if not response.success():
+            raise RuntimeError(f"code={response.code}, msg={response.msg}")
+        return response.file.read()
+
+    async def _download_message_resource(
+        self, message_id: str, msg_type: str, raw_content: str
+    ) -> tuple[str, list[str]]:
+        """Store an image/file/audio message's attachment; returns (content, media paths)."""
+        placeholder = MSG_TYPE_MAP.get(msg_type, f"[{msg_type}]")
+        try:
+            info = json.loads(raw_content or "{}")
+        except json.JSONDecodeError:
+            return placeholder, []
+        file_key = info.get("image_key") if msg_type == "image" else info.get("file_key")
+        if not file_key:
+            return placeholder, []
+
+        if msg_type == "image":
+            ext, resource_type = ".jpg", "image"
+        elif msg_type == "audio":
+            ext, resource_type = ".opus", "file"
+        else:
+            ext, resource_type = guess_extension(None, info.get("file_name")), "file"
+        loop = asyncio.get_running_loop()
+
+        async def download() -> bytes:
+            return await loop.run_in_executor(
+                self._send_executor, self._download_resource_sync, message_id, file_key, resource_type
+            )
+
+        try:
+            path = await get_media_store().fetch(f"feishu:{file_key}", download, ext)
+        except Exception as e:
+            logger.warning(f"Failed to download Feishu {msg_type}: {e}")
+            return f"[{msg_type}: download failed]", []
+        return f"[{msg_type}: {path}]", [str(path)]
+
     def _on_message_sync(self, data: "P2ImMessageReceiveV1") -> None:
         """
         Sync handler for incoming messages (called from WebSocket thread).
@@ -363,6 +424,7 @@ class FeishuChannel(BaseChannel):
             chat_id = message.chat_id
             chat_type = message.chat_type  # "p2p" or "group"
             msg_type = message.message_type
+            media_paths: list[str] = []
             
             # Add reaction to indicate "seen"
             await self._add_reaction(message_id, "THUMBSUP")
@@ -379,6 +441,8 @@ class FeishuChannel(BaseChannel):
                     content = _extract_post_text(content_json)
                 except (json.JSONDecodeError, TypeError):
                     content = message.content or ""
+            elif msg_type in RESOURCE_MSG_TYPES:
+                content, media_paths = await self._download_message_resource(message_id, msg_type, message.content)
             else:
                 content = MSG_TYPE_MAP.get(msg_type, f"[{msg_type}]")
             
@@ -391,6 +455,8 @@ class FeishuChannel(BaseChannel):
                 sender_id=sender_id,
                 chat_id=reply_to,
                 content=content,
+                media=media_paths,
+                audio=media_paths if msg_type == "audio" else None,
                 metadata={
                     "message_id": message_id,
                     "chat_type": chat_type,
@@ -11,6 +11,7 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import Config
+from nanobot.providers.transcription import TranscriptionService, make_transcription_service
 
 
 class ChannelManager:
@@ -20,7 +21,8 @@ class ChannelManager:
     Responsibilities:
     - Initialize enabled channels (Telegram, WhatsApp, etc.)
     - Start/stop channels
-    - Route outbound messages
+    - Route outbound messages (one ordered lane per chat, so a rate-limited
+      chat never holds up the others)
     """
     
     def __init__(self, config: Config, bus: MessageBus):
@@ -28,6 +30,9 @@ class ChannelManager:
         self.bus = bus
         self.channels: dict[str, BaseChannel] = {}
         self._dispatch_task: asyncio.Task | None = None
+        self._lanes: dict[tuple[str, str], asyncio.Queue[OutboundMessage]] = {}
+        self._lane_tasks: dict[tuple[str, str], asyncio.Task] = {}
+        self.transcriber: TranscriptionService | None = None
         
         self._init_channels()
     
@@ -39,9 +44,7 @@ class ChannelManager:
             try:
                 from nanobot.channels.telegram import TelegramChannel
                 self.channels["telegram"] = TelegramChannel(
-                    self.config.channels.telegram,
-                    self.bus,
-                    groq_api_key=self.config.providers.groq.api_key,
+                    self.config.channels.telegram, self.bus
                 )
                 logger.info("Telegram channel enabled")
             except ImportError as e:
@@ -136,6 +139,15 @@ class ChannelManager:
                 logger.info("QQ channel enabled")
             except ImportError as e:
                 logger.warning(f"QQ channel not available: {e}")
+        
+        # One transcription queue shared by every channel that receives voice
+        if self.channels:
+            self.transcriber = make_transcription_service(
+                self.config.channels.transcription,
+                groq_api_key=self.config.providers.groq.api_key,
+            )
+            for channel in self.channels.values():
+                channel.transcriber = self.transcriber
     
     async def _start_channel(self, name: str, channel: BaseChannel) -> None:
         """Start a channel and log any exceptions."""
@@ -173,14 +185,20 @@ class ChannelManager:
                 await self._dispatch_task
             except asyncio.CancelledError:
                 pass
+        for task in list(self._lane_tasks.values()):
+            task.cancel()
         
         # Stop all channels
         for name, channel in self.channels.items():
             try:
                 await channel.stop()
+                await channel.flush_pending()
                 logger.info(f"Stopped {name} channel")
             except Exception as e:
                 logger.error(f"Error stopping {name}: {e}")
+        
+        if self.transcriber:
+            await self.transcriber.close()
     
     async def _dispatch_outbound(self) -> None:
         """Dispatch outbound messages to the appropriate channel."""
@@ -195,10 +213,7 @@ class ChannelManager:
                 
                 channel = self.channels.get(msg.channel)
                 if channel:
-                    try:
-                        await channel.send(msg)
-                    except Exception as e:
-                        logger.error(f"Error sending to {msg.channel}: {e}")
+                    self._enqueue(channel, msg)
                 else:
                     logger.warning(f"Unknown channel: {msg.channel}")
                     
@@ -206,6 +221,30 @@ class ChannelManager:
                 continue
             except asyncio.CancelledError:
                 break
+
+    def _enqueue(self, channel: BaseChannel, msg: OutboundMessage) -> None:
+        """Queue a message on its chat's lane, starting the lane worker if needed."""
+        key = (msg.channel, msg.chat_id)
+        queue = self._lanes.get(key)
+        if queue is None:
+            queue = self._lanes[key] = asyncio.Queue()
+            self._lane_tasks[key] = asyncio.create_task(self._run_lane(key, channel, queue))
+        queue.put_nowait(msg)
+
+    async def _run_lane(
+        self, key: tuple[str, str], channel: BaseChannel, queue: asyncio.Queue[OutboundMessage]
+    ) -> None:
+        """Send one chat's messages in order; exits (and drops the lane) once drained."""
+        try:
+            while not queue.empty():
+                msg = queue.get_nowait()
+                try:
+                    await channel.send(msg)
+                except Exception as e:
+                    logger.error(f"Error sending to {msg.channel}: {e}")
+        finally:
+            self._lanes.pop(key, None)
+            self._lane_tasks.pop(key, None)
     
     def get_channel(self, name: str) -> BaseChannel | None:
         """Get a channel by name."""
@@ -213,13 +252,15 @@ class ChannelManager:
     
     def get_status(self) -> dict[str, Any]:
         """Get status of all channels."""
-        return {
-            name: {
+        status: dict[str, Any] = {}
+        for name, channel in self.channels.items():
+            status[name] = {
                 "enabled": True,
                 "running": channel.is_running
             }
-            for name, channel in self.channels.items()
-        }
+            if latency := getattr(channel, "send_latency", None):
+                status[name]["send_latency"] = latency.snapshot()
+        return status
     
     @property
     def enabled_channels(self) -> list[str]:
@@ -4,8 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import json
-from collections import deque
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
@@ -15,6 +14,9 @@ from loguru import logger
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.debounce import InboundDebouncer
+from nanobot.channels.mochat_poll import AdaptivePoller
+from nanobot.channels.mochat_state import CursorJournal, SeenMessages
 from nanobot.config.schema import MochatConfig
 from nanobot.utils.helpers import get_data_path
 
@@ -31,7 +33,9 @@ try:
 except ImportError:
     MSGPACK_AVAILABLE = False
 
-MAX_SEEN_MESSAGE_IDS = 2000
+MAX_SEEN_MESSAGES = 20000  # Shared across all sessions and panels (both also have watermarks)
+FALLBACK_MIN_INTERVAL_S = 2.0
+FALLBACK_SHORT_WATCH_MS = 1000  # Watch timeout when targets outnumber fallback workers
 CURSOR_SAVE_DEBOUNCE_S = 0.5
 
 
@@ -51,14 +55,6 @@ class MochatBufferedEntry:
     group_id: str = ""
 
 
-@dataclass
-class DelayState:
-    """Per-target delayed message state."""
-    entries: list[MochatBufferedEntry] = field(default_factory=list)
-    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
-    timer: asyncio.Task | None = None
-
-
 @dataclass
 class MochatTarget:
     """Outbound target resolution result."""
@@ -225,8 +221,17 @@ class MochatChannel(BaseChannel):
         self._ws_connected = self._ws_ready = False
 
         self._state_dir = get_data_path() / "mochat"
-        self._cursor_path = self._state_dir / "session_cursors.json"
+        self._cursor_journal = CursorJournal(
+            self._state_dir / "session_cursors.json", self._state_dir / "session_cursors.journal"
+        )
         self._session_cursor: dict[str, int] = {}
+        self._dirty_cursors: dict[str, int] = {}
+        # Panels have no server cursor: their watermark is the newest createdAt (epoch ms) seen
+        self._watermark_journal = CursorJournal(
+            self._state_dir / "panel_watermarks.json", self._state_dir / "panel_watermarks.journal"
+        )
+        self._panel_watermark: dict[str, int] = {}
+        self._dirty_watermarks: dict[str, int] = {}
         self._cursor_save_task: asyncio.Task | None = None
 
         self._session_set: set[str] = set()
@@ -236,13 +241,19 @@ class MochatChannel(BaseChannel):
         self._cold_sessions: set[str] = set()
         self._session_by_converse: dict[str, str] = {}
 
-        self._seen_set: dict[str, set[str]] = {}
-        self._seen_queue: dict[str, deque[str]] = {}
-        self._delay_states: dict[str, DelayState] = {}
+        self._seen = SeenMessages(MAX_SEEN_MESSAGES)
+        self._delayed: InboundDebouncer[MochatBufferedEntry] = InboundDebouncer(
+            lambda: max(0, self.config.reply_delay_ms) / 1000.0, self._on_delayed_flush
+        )
 
         self._fallback_mode = False
-        self._session_fallback_tasks: dict[str, asyncio.Task] = {}
-        self._panel_fallback_tasks: dict[str, asyncio.Task] = {}
+        self._poller = AdaptivePoller(
+            self._poll_target,
+            workers=config.fallback_workers,
+            min_interval=FALLBACK_MIN_INTERVAL_S,
+            max_interval=max(FALLBACK_MIN_INTERVAL_S, config.refresh_interval_ms / 1000.0),
+        )
+        self._panel_latest: dict[str, str] = {}
         self._refresh_task: asyncio.Task | None = None
         self._target_locks: dict[str, asyncio.Lock] = {}
 
@@ -258,6 +269,7 @@ class MochatChannel(BaseChannel):
         self._http = httpx.AsyncClient(timeout=30.0)
         self._state_dir.mkdir(parents=True, exist_ok=True)
         await self._load_session_cursors()
+        self._panel_watermark.update(self._watermark_journal.load())
         self._seed_targets_from_config()
         await self._refresh_targets(subscribe_new=False)
 
@@ -276,7 +288,7 @@ class MochatChannel(BaseChannel):
             self._refresh_task = None
 
         await self._stop_fallback_workers()
-        await self._cancel_delay_timers()
+        await self._delayed.cancel()
 
         if self._socket:
             try:
@@ -289,6 +301,7 @@ class MochatChannel(BaseChannel):
             self._cursor_save_task.cancel()
             self._cursor_save_task = None
         await self._save_session_cursors()
+        await self._save_panel_watermarks()
 
         if self._http:
             await self._http.aclose()
@@ -568,65 +581,61 @@ class MochatChannel(BaseChannel):
         if not self._running:
             return
         self._fallback_mode = True
-        for sid in sorted(self._session_set):
-            t = self._session_fallback_tasks.get(sid)
-            if not t or t.done():
-                self._session_fallback_tasks[sid] = asyncio.create_task(self._session_watch_worker(sid))
-        for pid in sorted(self._panel_set):
-            t = self._panel_fallback_tasks.get(pid)
-            if not t or t.done():
-                self._panel_fallback_tasks[pid] = asyncio.create_task(self._panel_poll_worker(pid))
+        self._poller.set_targets(
+            {("session", sid) for sid in self._session_set} | {("panel", pid) for pid in self._panel_set}
+        )
+        self._poller.start()
 
     async def _stop_fallback_workers(self) -> None:
         self._fallback_mode = False
-        tasks = [*self._session_fallback_tasks.values(), *self._panel_fallback_tasks.values()]
-        for t in tasks:
-            t.cancel()
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
-        self._session_fallback_tasks.clear()
-        self._panel_fallback_tasks.clear()
-
-    async def _session_watch_worker(self, session_id: str) -> None:
-        while self._running and self._fallback_mode:
-            try:
-                payload = await self._post_json("/api/claw/sessions/watch", {
-                    "sessionId": session_id, "cursor": self._session_cursor.get(session_id, 0),
-                    "timeoutMs": self.config.watch_timeout_ms, "limit": self.config.watch_limit,
-                })
-                await self._handle_watch_payload(payload, "session")
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.warning(f"Mochat watch fallback error ({session_id}): {e}")
-                await asyncio.sleep(max(0.1, self.config.retry_delay_ms / 1000.0))
+        await self._poller.stop()
 
-    async def _panel_poll_worker(self, panel_id: str) -> None:
-        sleep_s = max(1.0, self.config.refresh_interval_ms / 1000.0)
-        while self._running and self._fallback_mode:
-            try:
-                resp = await self._post_json("/api/claw/groups/panels/messages", {
-                    "panelId": panel_id, "limit": min(100, max(1, self.config.watch_limit)),
-                })
-                msgs = resp.get("messages")
-                if isinstance(msgs, list):
-                    for m in reversed(msgs):
-                        if not isinstance(m, dict):
-                            continue
-                        evt = _make_synthetic_event(
-                            message_id=str(m.get("messageId") or ""),
-                            author=str(m.get("author") or ""),
-                            content=m.get("content"),
-                            meta=m.get("meta"), group_id=str(resp.get("groupId") or ""),
-                            converse_id=panel_id, timestamp=m.get("createdAt"),
-                            author_info=m.get("authorInfo"),
-                        )
-                        await self._process_inbound_event(panel_id, evt, "panel")
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.warning(f"Mochat panel polling error ({panel_id}): {e}")
-            await asyncio.sleep(sleep_s)
+    async def _poll_target(self, kind: str, target_id: str, long_poll: bool) -> bool | None:
+        if kind == "session":
+            return await self._watch_session(target_id, long_poll)
+        return await self._poll_panel(target_id)
+
+    async def _watch_session(self, session_id: str, long_poll: bool) -> bool | None:
+        timeout_ms = self.config.watch_timeout_ms if long_poll else FALLBACK_SHORT_WATCH_MS
+        try:
+            payload = await self._post_json("/api/claw/sessions/watch", {
+                "sessionId": session_id, "cursor": self._session_cursor.get(session_id, 0),
+                "timeoutMs": timeout_ms, "limit": self.config.watch_limit,
+            })
+        except Exception:
+            await asyncio.sleep(max(0.1, self.config.retry_delay_ms / 1000.0))
+            raise
+        await self._handle_watch_payload(payload, "session")
+        if long_poll:
+            return None
+        return bool(payload.get("events")) if isinstance(payload, dict) else False
+
+    async def _poll_panel(self, panel_id: str) -> bool:
+        resp = await self._post_json("/api/claw/groups/panels/messages", {
+            "panelId": panel_id, "limit": min(100, max(1, self.config.watch_limit)),
+        })
+        msgs = [m for m in resp.get("messages") or [] if isinstance(m, dict)]
+        watermark = self._panel_watermark.get(panel_id, 0)
+        for m in reversed(msgs):
+            ts = parse_timestamp(m.get("createdAt"))
+            if ts is not None and ts <= watermark:
+                continue  # At or below the watermark: delivered before (the LRU may have forgotten it)
+            evt = _make_synthetic_event(
+                message_id=str(m.get("messageId") or ""),
+                author=str(m.get("author") or ""),
+                content=m.get("content"),
+                meta=m.get("meta"), group_id=str(resp.get("groupId") or ""),
+                converse_id=panel_id, timestamp=m.get("createdAt"),
+                author_info=m.get("authorInfo"),
+            )
+            await self._process_inbound_event(panel_id, evt, "panel")
+            if ts is not None:
+                self._mark_panel_watermark(panel_id, ts)
+        # Messages are newest first: activity means the newest one changed
+        latest = str(msgs[0].get("messageId") or "") if msgs else ""
+        active = latest != self._panel_latest.get(panel_id, "")
+        self._panel_latest[panel_id] = latest
+        return active
 
     # ---- inbound event processing ------------------------------------------
 
@@ -655,8 +664,11 @@ class MochatChannel(BaseChannel):
                 if not isinstance(event, dict):
                     continue
                 seq = event.get("seq")
-                if target_kind == "session" and isinstance(seq, int) and seq > self._session_cursor.get(target_id, prev):
-                    self._mark_session_cursor(target_id, seq)
+                if target_kind == "session" and isinstance(seq, int):
+                    if 0 < seq <= prev:
+                        continue  # At or below the watermark: delivered before
+                    if seq > self._session_cursor.get(target_id, prev):
+                        self._mark_session_cursor(target_id, seq)
                 if event.get("type") == "message.add":
                     await self._process_inbound_event(target_id, event, target_kind)
 
@@ -697,11 +709,10 @@ class MochatChannel(BaseChannel):
         )
 
         if use_delay:
-            delay_key = seen_key
             if was_mentioned:
-                await self._flush_delayed_entries(delay_key, target_id, target_kind, "mention", entry)
+                await self._delayed.flush(seen_key, "mention", entry)
             else:
-                await self._enqueue_delayed_entry(delay_key, target_id, target_kind, entry)
+                await self._delayed.add(seen_key, entry)
             return
 
         await self._dispatch_entries(target_id, target_kind, [entry], was_mentioned)
@@ -709,41 +720,11 @@ class MochatChannel(BaseChannel):
     # ---- dedup / buffering -------------------------------------------------
 
     def _remember_message_id(self, key: str, message_id: str) -> bool:
-        seen_set = self._seen_set.setdefault(key, set())
-        seen_queue = self._seen_queue.setdefault(key, deque())
-        if message_id in seen_set:
-            return True
-        seen_set.add(message_id)
-        seen_queue.append(message_id)
-        while len(seen_queue) > MAX_SEEN_MESSAGE_IDS:
-            seen_set.discard(seen_queue.popleft())
-        return False
+        return self._seen.check_and_add(key, message_id)
 
-    async def _enqueue_delayed_entry(self, key: str, target_id: str, target_kind: str, entry: MochatBufferedEntry) -> None:
-        state = self._delay_states.setdefault(key, DelayState())
-        async with state.lock:
-            state.entries.append(entry)
-            if state.timer:
-                state.timer.cancel()
-            state.timer = asyncio.create_task(self._delay_flush_after(key, target_id, target_kind))
-
-    async def _delay_flush_after(self, key: str, target_id: str, target_kind: str) -> None:
-        await asyncio.sleep(max(0, self.config.reply_delay_ms) / 1000.0)
-        await self._flush_delayed_entries(key, target_id, target_kind, "timer", None)
-
-    async def _flush_delayed_entries(self, key: str, target_id: str, target_kind: str, reason: str, entry: MochatBufferedEntry | None) -> None:
-        state = self._delay_states.setdefault(key, DelayState())
-        async with state.lock:
-            if entry:
-                state.entries.append(entry)
-            current = asyncio.current_task()
-            if state.timer and state.timer is not current:
-                state.timer.cancel()
-            state.timer = None
-            entries = state.entries[:]
-            state.entries.clear()
-        if entries:
-            await self._dispatch_entries(target_id, target_kind, entries, reason == "mention")
+    async def _on_delayed_flush(self, key: str, entries: list[MochatBufferedEntry], reason: str) -> None:
+        target_kind, target_id = key.split(":", 1)
+        await self._dispatch_entries(target_id, target_kind, entries, reason == "mention")
 
     async def _dispatch_entries(self, target_id: str, target_kind: str, entries: list[MochatBufferedEntry], was_mentioned: bool) -> None:
         if not entries:
@@ -762,12 +743,6 @@ class MochatChannel(BaseChannel):
             },
         )
 
-    async def _cancel_delay_timers(self) -> None:
-        for state in self._delay_states.values():
-            if state.timer:
-                state.timer.cancel()
-        self._delay_states.clear()
-
     # ---- notify handlers ---------------------------------------------------
 
     async def _handle_notify_chat_message(self, payload: Any) -> None:
@@ -788,6 +763,8 @@ class MochatChannel(BaseChannel):
             timestamp=payload.get("createdAt"), author_info=payload.get("authorInfo"),
         )
         await self._process_inbound_event(panel_id, evt, "panel")
+        if (ts := parse_timestamp(payload.get("createdAt"))) is not None:
+            self._mark_panel_watermark(panel_id, ts)
 
     async def _handle_notify_inbox_append(self, payload: Any) -> None:
         if not isinstance(payload, dict) or payload.get("type") != "message":
@@ -823,36 +800,47 @@ class MochatChannel(BaseChannel):
         if cursor < 0 or cursor < self._session_cursor.get(session_id, 0):
             return
         self._session_cursor[session_id] = cursor
+        self._dirty_cursors[session_id] = cursor
+        if not self._cursor_save_task or self._cursor_save_task.done():
+            self._cursor_save_task = asyncio.create_task(self._save_cursor_debounced())
+
+    def _mark_panel_watermark(self, panel_id: str, created_at: int) -> None:
+        if created_at <= self._panel_watermark.get(panel_id, 0):
+            return
+        self._panel_watermark[panel_id] = created_at
+        self._dirty_watermarks[panel_id] = created_at
         if not self._cursor_save_task or self._cursor_save_task.done():
             self._cursor_save_task = asyncio.create_task(self._save_cursor_debounced())
 
     async def _save_cursor_debounced(self) -> None:
         await asyncio.sleep(CURSOR_SAVE_DEBOUNCE_S)
         await self._save_session_cursors()
+        await self._save_panel_watermarks()
 
     async def _load_session_cursors(self) -> None:
-        if not self._cursor_path.exists():
+        self._session_cursor.update(self._cursor_journal.load())
+
+    async def _save_session_cursors(self) -> None:
+        """Append the cursors changed since the last save to the journal."""
+        if not self._dirty_cursors:
             return
+        updates, self._dirty_cursors = self._dirty_cursors, {}
         try:
-            data = json.loads(self._cursor_path.read_text("utf-8"))
+            self._cursor_journal.append(updates, self._session_cursor)
         except Exception as e:
-            logger.warning(f"Failed to read Mochat cursor file: {e}")
-            return
-        cursors = data.get("cursors") if isinstance(data, dict) else None
-        if isinstance(cursors, dict):
-            for sid, cur in cursors.items():
-                if isinstance(sid, str) and isinstance(cur, int) and cur >= 0:
-                    self._session_cursor[sid] = cur
+            logger.warning(f"Failed to save Mochat cursor file: {e}")
+            self._dirty_cursors = {**updates, **self._dirty_cursors}
 
-    async def _save_session_cursors(self) -> None:
+    async def _save_panel_watermarks(self) -> None:
+        """Append the panel watermarks changed since the last save to their journal."""
+        if not self._dirty_watermarks:
+            return
+        updates, self._dirty_watermarks = self._dirty_watermarks, {}
         try:
-            self._state_dir.mkdir(parents=True, exist_ok=True)
-            self._cursor_path.write_text(json.dumps({
-                "schemaVersion": 1, "updatedAt": datetime.utcnow().isoformat(),
-                "cursors": self._session_cursor,
-            }, ensure_ascii=False, indent=2) + "\n", "utf-8")
+            self._watermark_journal.append(updates, self._panel_watermark)
         except Exception as e:
-            logger.warning(f"Failed to save Mochat cursor file: {e}")
+            logger.warning(f"Failed to save Mochat panel watermarks: {e}")
+            self._dirty_watermarks = {**updates, **self._dirty_watermarks}
 
     # ---- HTTP helpers ------------------------------------------------------
 
@@ -0,0 +1,134 @@
+"""Fixed-size worker pool that polls many Mochat targets with adaptive intervals."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+# (target kind, target id), e.g. ("session", "session_123") or ("panel", "abc")
+Target = tuple[str, str]
+
+# poll(kind, target_id, long_poll) -> whether the target had new activity,
+# or None if the call was a long-poll that already waited for it
+PollFn = Callable[[str, str, bool], Awaitable[bool | None]]
+
+
+class AdaptivePoller:
+    """
+    Polls any number of targets using at most `workers` concurrent requests.
+
+    Targets wait in a min-heap ordered by when they are next due. A target
+    that just had activity is polled again after `min_interval`; each quiet
+    poll doubles its interval, up to `max_interval`. While every target fits
+    in its own worker, polls may be long-polls, which are re-issued at once
+    (as with one worker per target). With more targets than workers they
+    become short polls, so one idle target never holds a worker for a full
+    watch timeout.
+
+    Args:
+        poll: Performs one poll and reports whether anything new arrived.
+        workers: Number of concurrent polls (and so HTTP connections).
+        min_interval: Seconds between polls of an active target.
+        max_interval: Upper bound on the interval of an idle target.
+    """
+
+    def __init__(self, poll: PollFn, workers: int = 4, min_interval: float = 1.0, max_interval: float = 30.0):
+        self._poll = poll
+        self.workers = max(1, workers)
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self._targets: set[Target] = set()
+        self._intervals: dict[Target, float] = {}
+        self._heap: list[tuple[float, int, Target]] = []
+        self._queued: set[Target] = set()  # In the heap or being polled
+        self._order = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def long_poll(self) -> bool:
+        """Whether polls may block for the server's watch timeout."""
+        return len(self._targets) <= self.workers
+
+    def set_targets(self, targets: set[Target]) -> None:
+        """Replace the polled targets; new ones are due immediately."""
+        for target in targets - self._targets:
+            self._intervals[target] = self.min_interval
+            if target not in self._queued:
+                self._queued.add(target)
+                self._schedule(target, 0.0)
+        for target in self._targets - targets:
+            self._intervals.pop(target, None)  # Its heap entry is dropped when popped
+        self._targets = set(targets)
+
+    def start(self) -> None:
+        """Start the workers (idempotent)."""
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self) -> None:
+        """Cancel the workers and wait for them to exit."""
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        # In-flight targets were lost with their workers: start over on the next set_targets
+        self._targets.clear()
+        self._intervals.clear()
+        self._heap.clear()
+        self._queued.clear()
+
+    def interval(self, target: Target) -> float | None:
+        """Current polling interval of a target (None if not polled)."""
+        return self._intervals.get(target)
+
+    def _schedule(self, target: Target, delay: float) -> None:
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._order), target))
+        self._wakeup.set()
+
+    async def _next_due(self) -> Target:
+        while True:
+            if self._heap:
+                due, _, target = self._heap[0]
+                wait = due - time.monotonic()
+                if wait <= 0:
+                    heapq.heappop(self._heap)
+                    if target in self._targets:
+                        return target
+                    self._queued.discard(target)
+                    continue
+            else:
+                wait = None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self) -> None:
+        while True:
+            target = await self._next_due()
+            try:
+                active = await self._poll(target[0], target[1], self.long_poll)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Mochat poll error ({target[0]} {target[1]}): {e}")
+                active = False
+            if target not in self._targets:
+                self._queued.discard(target)
+                continue
+            if active is None:
+                self._intervals[target] = self.min_interval
+                self._schedule(target, 0.0)
+                continue
+            interval = self.min_interval if active else min(self.max_interval, self._intervals[target] * 2)
+            self._intervals[target] = interval
+            self._schedule(target, interval)
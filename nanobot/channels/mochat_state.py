@@ -0,0 +1,130 @@
+"""Bounded dedupe and append-only cursor persistence for the Mochat channel."""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+from loguru import logger
+
+
+class SeenMessages:
+    """
+    One LRU of recently seen (target, message id) pairs shared by all targets.
+
+    Memory is bounded by `capacity` no matter how many sessions and panels are
+    subscribed: busy targets simply occupy more of the shared window than
+    quiet ones. Entries are stored as 64-bit hashes rather than strings.
+    Sessions additionally get exact replay protection from their cursors (see
+    `MochatChannel._handle_watch_payload`) and panels from their createdAt
+    watermarks (see `MochatChannel._poll_panel`), so this only has to cover
+    the recent past.
+    """
+
+    def __init__(self, capacity: int = 20000):
+        self.capacity = capacity
+        self._entries: OrderedDict[int, None] = OrderedDict()
+
+    def check_and_add(self, key: str, message_id: str) -> bool:
+        """Record a message; returns True if it was already seen."""
+        h = hash((key, message_id))
+        if h in self._entries:
+            self._entries.move_to_end(h)
+            return True
+        self._entries[h] = None
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CursorJournal:
+    """
+    Session cursors (or panel watermarks) persisted as a snapshot plus an append-only journal.
+
+    Each save appends one line per cursor that changed since the last save,
+    so the write cost follows activity rather than the number of subscribed
+    sessions. The journal is folded into the snapshot once it holds more
+    lines than `compact_ratio` times the number of cursors (and at least
+    `compact_min` lines).
+
+    Args:
+        snapshot_path: JSON snapshot (`{"schemaVersion", "updatedAt", "cursors"}`).
+        journal_path: Newline-delimited `{"s": session_id, "c": cursor}` records.
+    """
+
+    def __init__(self, snapshot_path: Path, journal_path: Path, compact_min: int = 1000, compact_ratio: int = 4):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compact_min = compact_min
+        self.compact_ratio = compact_ratio
+        self._journal_lines = 0
+        self._torn_tail = False
+
+    def load(self) -> dict[str, int]:
+        """Read the snapshot and replay the journal on top of it."""
+        cursors: dict[str, int] = {}
+        if self.snapshot_path.exists():
+            try:
+                data = json.loads(self.snapshot_path.read_text("utf-8"))
+                raw = data.get("cursors") if isinstance(data, dict) else None
+                if isinstance(raw, dict):
+                    cursors.update(
+                        (sid, cur) for sid, cur in raw.items()
+                        if isinstance(sid, str) and isinstance(cur, int) and cur >= 0
+                    )
+            except Exception as e:
+                logger.warning(f"Failed to read Mochat cursor file: {e}")
+
+        self._journal_lines = 0
+        if self.journal_path.exists():
+            try:
+                with open(self.journal_path, encoding="utf-8") as f:
+                    for line in f:
+                        self._journal_lines += 1
+                        self._torn_tail = not line.endswith("\n")
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # Torn final line from a crash mid-write
+                        sid, cur = record.get("s"), record.get("c")
+                        if isinstance(sid, str) and isinstance(cur, int) and cur >= cursors.get(sid, 0):
+                            cursors[sid] = cur
+            except OSError as e:
+                logger.warning(f"Failed to read Mochat cursor journal: {e}")
+        return cursors
+
+    def append(self, updates: dict[str, int], cursors: dict[str, int]) -> None:
+        """Journal changed cursors, compacting when the journal outgrows `cursors`."""
+        if not updates:
+            return
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        lines = "".join(
+            json.dumps({"s": sid, "c": cur}, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for sid, cur in updates.items()
+        )
+        if self._torn_tail:
+            lines = "\n" + lines  # Don't extend a partial record left by a crash
+            self._torn_tail = False
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        self._journal_lines += len(updates)
+        if self._journal_lines > max(self.compact_min, self.compact_ratio * len(cursors)):
+            self.compact(cursors)
+
+    def compact(self, cursors: dict[str, int]) -> None:
+        """Write a fresh snapshot and truncate the journal."""
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "schemaVersion": 1, "updatedAt": datetime.utcnow().isoformat(),
+            "cursors": cursors,
+        }, ensure_ascii=False, indent=2) + "\n", "utf-8")
+        os.replace(tmp, self.snapshot_path)
+        self.journal_path.unlink(missing_ok=True)
+        self._journal_lines = 0
@@ -49,6 +49,7 @@ class QQChannel(BaseChannel):
     """QQ channel using botpy SDK with WebSocket connection."""
 
     name = "qq"
+    chat_rate_limit = (1.0, 3)
 
     def __init__(self, config: QQConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -102,11 +103,11 @@ class QQChannel(BaseChannel):
             logger.warning("QQ client not initialized")
             return
         try:
-            await self._client.api.post_c2c_message(
+            await self._call_api(msg.chat_id, lambda: self._client.api.post_c2c_message(
                 openid=msg.chat_id,
                 msg_type=0,
                 content=msg.content,
-            )
+            ))
         except Exception as e:
             logger.error(f"Error sending QQ message: {e}")
 
@@ -0,0 +1,120 @@
+"""Token-bucket rate limiting for channel outbound APIs."""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class RateLimitedError(Exception):
+    """Raised (or translated to) when a platform rejects a call for exceeding its rate limit."""
+
+    def __init__(self, retry_after: float, is_global: bool = False):
+        super().__init__(f"rate limited, retry after {retry_after:.2f}s")
+        self.retry_after = max(0.0, float(retry_after))
+        self.is_global = is_global
+
+
+class TokenBucket:
+    """
+    A token bucket refilled at `rate` tokens per second, holding at most `burst`.
+
+    Besides the steady-state rate, the bucket can be blocked until a point in
+    time (server-provided `retry_after`) or drained to match the remaining
+    quota a server reported in its response headers.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        now = time.monotonic()
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Wait for and take one token."""
+        while (wait := self.delay()) > 0:
+            await asyncio.sleep(wait)
+        self.tokens -= 1
+
+    def block(self, seconds: float) -> None:
+        """Refuse tokens for the next `seconds`."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def update(self, remaining: int, reset_after: float) -> None:
+        """Sync with a server-reported quota (e.g. `X-RateLimit-Remaining` / `-Reset-After`)."""
+        self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0:
+            self.block(reset_after)
+
+    @property
+    def idle(self) -> bool:
+        """Whether the bucket is full and unblocked, i.e. indistinguishable from a new one."""
+        now = time.monotonic()
+        self._refill(now)
+        return self.tokens >= self.burst and self.blocked_until <= now
+
+
+class RateLimiter:
+    """
+    Per-channel rate limiter with a global bucket and one bucket per chat.
+
+    Limits are `(rate per second, burst)` tuples; `None` disables that level.
+    Idle per-chat buckets are pruned so memory stays bounded.
+    """
+
+    MAX_CHAT_BUCKETS = 1024
+
+    def __init__(
+        self,
+        global_limit: tuple[float, float] | None = None,
+        chat_limit: tuple[float, float] | None = None,
+    ):
+        self.chat_limit = chat_limit
+        self._global = TokenBucket(*global_limit) if global_limit else None
+        self._chats: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def _bucket(self, chat_id: str | None) -> TokenBucket | None:
+        if chat_id is None or not self.chat_limit:
+            return self._global
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.MAX_CHAT_BUCKETS:
+                for key in [k for k, b in self._chats.items() if b.idle]:
+                    del self._chats[key]
+            bucket = self._chats[chat_id] = TokenBucket(*self.chat_limit)
+        self._chats.move_to_end(chat_id)
+        return bucket
+
+    async def acquire(self, chat_id: str) -> None:
+        """Wait until both the chat's and the global bucket allow one more call."""
+        if self.chat_limit:
+            await self._bucket(chat_id).acquire()
+        if self._global:
+            await self._global.acquire()
+
+    def block(self, seconds: float, chat_id: str | None = None) -> None:
+        """Block a chat (or everything, if `chat_id` is None or no per-chat limit is set)."""
+        if bucket := self._bucket(chat_id):
+            bucket.block(seconds)
+        else:
+            # No bucket at that level: fall back to a temporary global block
+            self._global = self._global or TokenBucket(rate=1e9, burst=1e9)
+            self._global.block(seconds)
+
+    def update(self, chat_id: str | None, remaining: int, reset_after: float) -> None:
+        """Apply a server-reported remaining quota to a chat's (or the global) bucket."""
+        if bucket := self._bucket(chat_id):
+            bucket.update(remaining, reset_after)
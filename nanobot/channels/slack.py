@@ -2,9 +2,12 @@
 
 import asyncio
 import re
+from functools import partial
 from typing import Any
 
+import httpx
 from loguru import logger
+from slack_sdk.errors import SlackApiError
 from slack_sdk.socket_mode.websockets import SocketModeClient
 from slack_sdk.socket_mode.request import SocketModeRequest
 from slack_sdk.socket_mode.response import SocketModeResponse
@@ -15,13 +18,19 @@ from slackify_markdown import slackify_markdown
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.ratelimit import RateLimitedError
 from nanobot.config.schema import SlackConfig
+from nanobot.media import get_media_store, guess_extension
+
+MAX_FILE_BYTES = 20 * 1024 * 1024  # 20MB
 
 
 class SlackChannel(BaseChannel):
     """Slack channel using Socket Mode."""
 
     name = "slack"
+    # chat.postMessage: ~1 message/s per channel with short bursts
+    chat_rate_limit = (1.0, 3)
 
     def __init__(self, config: SlackConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -29,6 +38,7 @@ class SlackChannel(BaseChannel):
         self._web_client: AsyncWebClient | None = None
         self._socket_client: SocketModeClient | None = None
         self._bot_user_id: str | None = None
+        self._http: httpx.AsyncClient | None = None
 
     async def start(self) -> None:
         """Start the Slack Socket Mode client."""
@@ -41,6 +51,7 @@ class SlackChannel(BaseChannel):
 
         self._running = True
 
+        self._http = httpx.AsyncClient(timeout=30.0, follow_redirects=True)
         self._web_client = AsyncWebClient(token=self.config.bot_token)
         self._socket_client = SocketModeClient(
             app_token=self.config.app_token,
@@ -72,6 +83,9 @@ class SlackChannel(BaseChannel):
             except Exception as e:
                 logger.warning(f"Slack socket close failed: {e}")
             self._socket_client = None
+        if self._http:
+            await self._http.aclose()
+            self._http = None
 
     async def send(self, msg: OutboundMessage) -> None:
         """Send a message through Slack."""
@@ -84,14 +98,21 @@ class SlackChannel(BaseChannel):
             channel_type = slack_meta.get("channel_type")
             # Only reply in thread for channel/group messages; DMs don't use threads
             use_thread = thread_ts and channel_type != "im"
-            await self._web_client.chat_postMessage(
+            text = self._to_mrkdwn(msg.content)
+            await self._call_api(msg.chat_id, lambda: self._web_client.chat_postMessage(
                 channel=msg.chat_id,
-                text=self._to_mrkdwn(msg.content),
+                text=text,
                 thread_ts=thread_ts if use_thread else None,
-            )
+            ))
         except Exception as e:
             logger.error(f"Error sending Slack message: {e}")
 
+    def _rate_limit_error(self, error: Exception) -> RateLimitedError | None:
+        response = getattr(error, "response", None)
+        if isinstance(error, SlackApiError) and response is not None and response.status_code == 429:
+            return RateLimitedError(float(response.headers.get("Retry-After", 1)))
+        return super()._rate_limit_error(error)
+
     async def _on_socket_request(
         self,
         client: SocketModeClient,
@@ -117,8 +138,8 @@ class SlackChannel(BaseChannel):
         sender_id = event.get("user")
         chat_id = event.get("channel")
 
-        # Ignore bot/system messages (any subtype = not a normal user message)
-        if event.get("subtype"):
+        # Ignore bot/system messages (any other subtype = not a normal user message)
+        if event.get("subtype") not in (None, "file_share"):
             return
         if self._bot_user_id and sender_id == self._bot_user_id:
             return
@@ -164,10 +185,15 @@ class SlackChannel(BaseChannel):
         except Exception as e:
             logger.debug(f"Slack reactions_add failed: {e}")
 
+        media_paths, audio_paths, notes = await self._download_files(event.get("files") or [])
+        content = "\n".join(p for p in [text, *notes] if p) or "[empty message]"
+
         await self._handle_message(
             sender_id=sender_id,
             chat_id=chat_id,
-            content=text,
+            content=content,
+            media=media_paths,
+            audio=audio_paths,
             metadata={
                 "slack": {
                     "event": event,
@@ -177,6 +203,46 @@ class SlackChannel(BaseChannel):
             },
         )
 
+    async def _download_files(self, files: list[dict[str, Any]]) -> tuple[list[str], list[str], list[str]]:
+        """Download shared files concurrently; returns (media paths, audio paths, content notes)."""
+        downloads: list[dict[str, Any]] = []
+        notes: list[str] = []
+        for f in files:
+            name = f.get("name") or "file"
+            if not f.get("url_private_download") or not self._http:
+                continue
+            if (f.get("size") or 0) > MAX_FILE_BYTES:
+                notes.append(f"[file: {name} - too large]")
+                continue
+            downloads.append(f)
+
+        results = await get_media_store().fetch_all([
+            (
+                f"slack:{f.get('id') or f['url_private_download']}",
+                partial(self._download, f["url_private_download"]),
+                guess_extension(f.get("mimetype"), f.get("name")),
+            )
+            for f in downloads
+        ])
+        paths: list[str] = []
+        audio: list[str] = []
+        for f, result in zip(downloads, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Failed to download Slack file: {result}")
+                notes.append(f"[file: {f.get('name') or 'file'} - download failed]")
+            else:
+                paths.append(str(result))
+                notes.append(f"[file: {result}]")
+                if (f.get("mimetype") or "").startswith("audio/"):
+                    audio.append(str(result))
+        return paths, audio, notes
+
+    async def _download(self, url: str) -> bytes:
+        """Download a private Slack file using the bot token."""
+        resp = await self._http.get(url, headers={"Authorization": f"Bearer {self.config.bot_token}"})
+        resp.raise_for_status()
+        return resp.content
+
     def _is_allowed(self, sender_id: str, chat_id: str, channel_type: str) -> bool:
         if channel_type == "im":
             if not self.config.dm.enabled:
@@ -6,13 +6,16 @@ import asyncio
 import re
 from loguru import logger
 from telegram import BotCommand, Update
+from telegram.error import RetryAfter
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from telegram.request import HTTPXRequest
 
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.ratelimit import RateLimitedError
 from nanobot.config.schema import TelegramConfig
+from nanobot.media import get_media_store, guess_extension
 
 
 def _markdown_to_telegram_html(text: str) -> str:
@@ -106,23 +109,21 @@ class TelegramChannel(BaseChannel):
     """
     
     name = "telegram"
+    # Bot API guidance: ~1 message/s per chat, ~30 messages/s overall
+    chat_rate_limit = (1.0, 3)
+    global_rate_limit = (30.0, 30)
     
     # Commands registered with Telegram's command menu
     BOT_COMMANDS = [
         BotCommand("start", "Start the bot"),
         BotCommand("new", "Start a new conversation"),
+        BotCommand("tasks", "Show background tasks"),
         BotCommand("help", "Show available commands"),
     ]
     
-    def __init__(
-        self,
-        config: TelegramConfig,
-        bus: MessageBus,
-        groq_api_key: str = "",
-    ):
+    def __init__(self, config: TelegramConfig, bus: MessageBus):
         super().__init__(config, bus)
         self.config: TelegramConfig = config
-        self.groq_api_key = groq_api_key
         self._app: Application | None = None
         self._chat_ids: dict[str, int] = {}  # Map sender_id to chat_id for replies
         self._typing_tasks: dict[str, asyncio.Task] = {}  # chat_id -> typing loop task
@@ -146,6 +147,7 @@ class TelegramChannel(BaseChannel):
         # Add command handlers
         self._app.add_handler(CommandHandler("start", self._on_start))
         self._app.add_handler(CommandHandler("new", self._forward_command))
+        self._app.add_handler(CommandHandler("tasks", self._forward_command))
         self._app.add_handler(CommandHandler("help", self._forward_command))
         
         # Add message handler for text, photos, voice, documents
@@ -234,25 +236,44 @@ class TelegramChannel(BaseChannel):
                     "audio": self._app.bot.send_audio,
                 }.get(media_type, self._app.bot.send_document)
                 param = "photo" if media_type == "photo" else media_type if media_type in ("voice", "audio") else "document"
-                with open(media_path, 'rb') as f:
-                    await sender(chat_id=chat_id, **{param: f})
+
+                async def send_media(sender=sender, param=param, media_path=media_path):
+                    with open(media_path, 'rb') as f:
+                        return await sender(chat_id=chat_id, **{param: f})
+
+                await self._call_api(msg.chat_id, send_media)
             except Exception as e:
                 filename = media_path.rsplit("/", 1)[-1]
                 logger.error(f"Failed to send media {media_path}: {e}")
-                await self._app.bot.send_message(chat_id=chat_id, text=f"[Failed to send: {filename}]")
+                await self._call_api(
+                    msg.chat_id,
+                    lambda: self._app.bot.send_message(chat_id=chat_id, text=f"[Failed to send: {filename}]"),
+                )
 
         # Send text content
         if msg.content and msg.content != "[empty message]":
             for chunk in _split_message(msg.content):
                 try:
                     html = _markdown_to_telegram_html(chunk)
-                    await self._app.bot.send_message(chat_id=chat_id, text=html, parse_mode="HTML")
+                    await self._call_api(
+                        msg.chat_id,
+                        lambda: self._app.bot.send_message(chat_id=chat_id, text=html, parse_mode="HTML"),
+                    )
                 except Exception as e:
                     logger.warning(f"HTML parse failed, falling back to plain text: {e}")
                     try:
-                        await self._app.bot.send_message(chat_id=chat_id, text=chunk)
+                        await self._call_api(
+                            msg.chat_id, lambda: self._app.bot.send_message(chat_id=chat_id, text=chunk)
+                        )
                     except Exception as e2:
                         logger.error(f"Error sending Telegram message: {e2}")
+
+    def _rate_limit_error(self, error: Exception) -> RateLimitedError | None:
+        if isinstance(error, RetryAfter):
+            retry_after = error.retry_after
+            seconds = retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else retry_after
+            return RateLimitedError(float(seconds))
+        return super()._rate_limit_error(error)
     
     async def _on_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /start command."""
@@ -298,6 +319,7 @@ class TelegramChannel(BaseChannel):
         # Build content from text and/or media
         content_parts = []
         media_paths = []
+        audio_paths = []
         
         # Text content
         if message.text:
@@ -325,33 +347,21 @@ class TelegramChannel(BaseChannel):
         # Download media if present
         if media_file and self._app:
             try:
-                file = await self._app.bot.get_file(media_file.file_id)
                 ext = self._get_extension(media_type, getattr(media_file, 'mime_type', None))
                 
-                # Save to workspace/media/
-                from pathlib import Path
-                media_dir = Path.home() / ".nanobot" / "media"
-                media_dir.mkdir(parents=True, exist_ok=True)
-                
-                file_path = media_dir / f"{media_file.file_id[:16]}{ext}"
-                await file.download_to_drive(str(file_path))
+                async def download(file_id=media_file.file_id) -> bytes:
+                    file = await self._app.bot.get_file(file_id)
+                    return bytes(await file.download_as_bytearray())
                 
+                file_path = await get_media_store().fetch(
+                    f"telegram:{media_file.file_unique_id}", download, ext
+                )
                 media_paths.append(str(file_path))
-                
-                # Handle voice transcription
+                content_parts.append(f"[{media_type}: {file_path}]")
                 if media_type == "voice" or media_type == "audio":
-                    from nanobot.providers.transcription import GroqTranscriptionProvider
-                    transcriber = GroqTranscriptionProvider(api_key=self.groq_api_key)
-                    transcription = await transcriber.transcribe(file_path)
-                    if transcription:
-                        logger.info(f"Transcribed {media_type}: {transcription[:50]}...")
-                        content_parts.append(f"[transcription: {transcription}]")
-                    else:
-                        content_parts.append(f"[{media_type}: {file_path}]")
-                else:
-                    content_parts.append(f"[{media_type}: {file_path}]")
-                    
-                logger.debug(f"Downloaded {media_type} to {file_path}")
+                    audio_paths.append(str(file_path))
+                
+                logger.debug(f"Stored {media_type} at {file_path}")
             except Exception as e:
                 logger.error(f"Failed to download media: {e}")
                 content_parts.append(f"[{media_type}: download failed]")
@@ -371,6 +381,7 @@ class TelegramChannel(BaseChannel):
             chat_id=str_chat_id,
             content=content,
             media=media_paths,
+            audio=audio_paths,
             metadata={
                 "message_id": message.message_id,
                 "user_id": user.id,
@@ -416,6 +427,8 @@ class TelegramChannel(BaseChannel):
             }
             if mime_type in ext_map:
                 return ext_map[mime_type]
+            if ext := guess_extension(mime_type):
+                return ext
         
         type_map = {"image": ".jpg", "voice": ".ogg", "audio": ".mp3", "file": ""}
         return type_map.get(media_type, "")
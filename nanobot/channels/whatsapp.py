@@ -1,6 +1,8 @@
 """WhatsApp channel implementation using Node.js bridge."""
 
 import asyncio
+import base64
+import binascii
 import json
 from typing import Any
 
@@ -10,6 +12,12 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import WhatsAppConfig
+from nanobot.media import get_media_store, guess_extension
+
+# Largest websocket frame accepted from the bridge (MAX_FRAME_BYTES in
+# bridge/src/server.ts). Bridges hand media over by path; this still fits a
+# 20MB attachment as base64 from bridges that inline it.
+BRIDGE_MAX_FRAME_BYTES = 32 * 1024 * 1024
 
 
 class WhatsAppChannel(BaseChannel):
@@ -40,7 +48,7 @@ class WhatsAppChannel(BaseChannel):
         
         while self._running:
             try:
-                async with websockets.connect(bridge_url) as ws:
+                async with websockets.connect(bridge_url, max_size=BRIDGE_MAX_FRAME_BYTES) as ws:
                     self._ws = ws
                     # Send auth token if configured
                     if self.config.bridge_token:
@@ -91,6 +99,36 @@ class WhatsAppChannel(BaseChannel):
         except Exception as e:
             logger.error(f"Error sending WhatsApp message: {e}")
     
+    @staticmethod
+    async def _store_media(items: list[dict[str, Any]]) -> tuple[list[str], list[str]]:
+        """Collect media forwarded by the bridge; returns (media paths, audio paths)."""
+        store = get_media_store()
+        paths, audio = [], []
+        for item in items:
+            if item.get("path"):
+                # The bridge already wrote it into the store
+                path = await asyncio.to_thread(store.adopt, item["path"])
+                if path is None:
+                    logger.warning(
+                        f"Bridge media {item['path']} is not in the media store at {store.root}; "
+                        "start the bridge with MEDIA_DIR set to it"
+                    )
+                    continue
+            else:
+                try:
+                    data = base64.b64decode(item.get("data") or "")
+                except (binascii.Error, ValueError) as e:
+                    logger.warning(f"Invalid media from bridge: {e}")
+                    continue
+                if not data:
+                    continue
+                ext = guess_extension(item.get("mimetype"), item.get("fileName"))
+                path = await asyncio.to_thread(store.put_bytes, data, ext)
+            paths.append(str(path))
+            if (item.get("mimetype") or "").startswith("audio/"):
+                audio.append(str(path))
+        return paths, audio
+    
     async def _handle_bridge_message(self, raw: str) -> None:
         """Handle a message from the bridge."""
         try:
@@ -114,15 +152,20 @@ class WhatsAppChannel(BaseChannel):
             sender_id = user_id.split("@")[0] if "@" in user_id else user_id
             logger.info(f"Sender {sender}")
             
-            # Handle voice transcription if it's a voice message
-            if content == "[Voice Message]":
-                logger.info(f"Voice message received from {sender_id}, but direct download from bridge is not yet supported.")
+            media_paths, audio_paths = await self._store_media(data.get("media") or [])
+            if media_paths:
+                content = "\n".join([content, *(f"[media: {p}]" for p in media_paths)])
+            elif content == "[Voice Message]":
+                # Older bridges don't forward the audio itself
+                logger.info(f"Voice message received from {sender_id}, but the bridge did not forward the audio.")
                 content = "[Voice Message: Transcription not available for WhatsApp yet]"
             
             await self._handle_message(
                 sender_id=sender_id,
                 chat_id=sender,  # Use full LID for replies
                 content=content,
+                media=media_paths,
+                audio=audio_paths,
                 metadata={
                     "message_id": data.get("id"),
                     "timestamp": data.get("timestamp"),
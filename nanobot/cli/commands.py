@@ -1,6 +1,7 @@
 """CLI commands for nanobot."""
 
 import asyncio
+from functools import partial
 import os
 import signal
 from pathlib import Path
@@ -359,6 +360,14 @@ def gateway(
         restrict_to_workspace=config.tools.restrict_to_workspace,
         session_manager=session_manager,
         mcp_servers=config.tools.mcp_servers,
+        tool_routing=config.tools.routing,
+        tool_cache=config.tools.result_cache,
+        result_spill=config.tools.result_spill,
+        consolidation_model=config.agents.defaults.consolidation_model,
+        memory_retrieval=config.agents.defaults.memory_retrieval,
+        preempt_turns=config.agents.defaults.preempt_turns,
+        subagent_config=config.agents.defaults.subagents,
+        provider_factory=partial(_make_provider, config),
     )
     
     # Set cron callback (needs agent)
@@ -417,7 +426,7 @@ def gateway(
         except KeyboardInterrupt:
             console.print("\nShutting down...")
         finally:
-            await agent.close_mcp()
+            await agent.close()
             heartbeat.stop()
             cron.stop()
             agent.stop()
@@ -475,6 +484,14 @@ def agent(
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
         mcp_servers=config.tools.mcp_servers,
+        tool_routing=config.tools.routing,
+        tool_cache=config.tools.result_cache,
+        result_spill=config.tools.result_spill,
+        consolidation_model=config.agents.defaults.consolidation_model,
+        memory_retrieval=config.agents.defaults.memory_retrieval,
+        preempt_turns=config.agents.defaults.preempt_turns,
+        subagent_config=config.agents.defaults.subagents,
+        provider_factory=partial(_make_provider, config),
     )
     
     # Show spinner when logs are off (no output to miss); skip when logs are on
@@ -491,7 +508,7 @@ def agent(
             with _thinking_ctx():
                 response = await agent_loop.process_direct(message, session_id)
             _print_agent_response(response, render_markdown=markdown)
-            await agent_loop.close_mcp()
+            await agent_loop.close()
         
         asyncio.run(run_once())
     else:
@@ -533,7 +550,7 @@ def agent(
                         console.print("\nGoodbye!")
                         break
             finally:
-                await agent_loop.close_mcp()
+                await agent_loop.close()
         
         asyncio.run(run_interactive())
 
@@ -676,6 +693,7 @@ def channels_login():
     """Link device via QR code."""
     import subprocess
     from nanobot.config.loader import load_config
+    from nanobot.media import get_media_store
     
     config = load_config()
     bridge_dir = _get_bridge_dir()
@@ -686,6 +704,7 @@ def channels_login():
     env = {**os.environ}
     if config.channels.whatsapp.bridge_token:
         env["BRIDGE_TOKEN"] = config.channels.whatsapp.bridge_token
+    env.setdefault("MEDIA_DIR", str(get_media_store().root))  # Bridge writes attachments here
     
     try:
         subprocess.run(["npm", "start"], cwd=bridge_dir, check=True, env=env)
@@ -19,6 +19,7 @@ class WhatsAppConfig(Base):
     bridge_url: str = "ws://localhost:3001"
     bridge_token: str = ""  # Shared token for bridge auth (optional, recommended)
     allow_from: list[str] = Field(default_factory=list)  # Allowed phone numbers
+    debounce_ms: int = 0  # Merge messages sent within this window into one turn (0 = off)
 
 
 class TelegramConfig(Base):
@@ -27,6 +28,7 @@ class TelegramConfig(Base):
     enabled: bool = False
     token: str = ""  # Bot token from @BotFather
     allow_from: list[str] = Field(default_factory=list)  # Allowed user IDs or usernames
+    debounce_ms: int = 0  # Merge messages sent within this window into one turn (0 = off)
     proxy: str | None = None  # HTTP/SOCKS5 proxy URL, e.g. "http://127.0.0.1:7890" or "socks5://127.0.0.1:1080"
 
 
@@ -39,6 +41,7 @@ class FeishuConfig(Base):
     encrypt_key: str = ""  # Encrypt Key for event subscription (optional)
     verification_token: str = ""  # Verification Token for event subscription (optional)
     allow_from: list[str] = Field(default_factory=list)  # Allowed user open_ids
+    debounce_ms: int = 0  # Merge messages sent within this window into one turn (0 = off)
 
 
 class DingTalkConfig(Base):
@@ -48,6 +51,7 @@ class DingTalkConfig(Base):
     client_id: str = ""  # AppKey
     client_secret: str = ""  # AppSecret
     allow_from: list[str] = Field(default_factory=list)  # Allowed staff_ids
+    debounce_ms: int = 0  # Merge messages sent within this window into one turn (0 = off)
 
 
 class DiscordConfig(Base):
@@ -56,6 +60,7 @@ class DiscordConfig(Base):
     enabled: bool = False
     token: str = ""  # Bot token from Discord Developer Portal
     allow_from: list[str] = Field(default_factory=list)  # Allowed user IDs
+    debounce_ms: int = 0  # Merge messages sent within this window into one turn (0 = off)
     gateway_url: str = "wss://gateway.discord.gg/?v=10&encoding=json"
     intents: int = 37377  # GUILDS + GUILD_MESSAGES + DIRECT_MESSAGES + MESSAGE_CONTENT
 
@@ -73,6 +78,7 @@ class EmailConfig(Base):
     imap_password: str = ""
     imap_mailbox: str = "INBOX"
     imap_use_ssl: bool = True
+    imap_idle: bool = True  # Wait for new mail with IMAP IDLE when supported; otherwise poll
 
     # SMTP (send)
     smtp_host: str = ""
@@ -118,6 +124,7 @@ class MochatConfig(Base):
     refresh_interval_ms: int = 30000
     watch_timeout_ms: int = 25000
     watch_limit: int = 100
+    fallback_workers: int = 4  # Concurrent HTTP polls in fallback mode, regardless of target count
     retry_delay_ms: int = 500
     max_retry_attempts: int = 0  # 0 means unlimited retries
     claw_token: str = ""
@@ -150,6 +157,7 @@ class SlackConfig(Base):
     user_token_read_only: bool = True
     group_policy: str = "mention"  # "mention", "open", "allowlist"
     group_allow_from: list[str] = Field(default_factory=list)  # Allowed channel IDs if allowlist
+    debounce_ms: int = 0  # Merge messages sent within this window into one turn (0 = off)
     dm: SlackDMConfig = Field(default_factory=SlackDMConfig)
 
 
@@ -160,6 +168,16 @@ class QQConfig(Base):
     app_id: str = ""  # 机器人 ID (AppID) from q.qq.com
     secret: str = ""  # 机器人密钥 (AppSecret) from q.qq.com
     allow_from: list[str] = Field(default_factory=list)  # Allowed user openids (empty = public access)
+    debounce_ms: int = 0  # Merge messages sent within this window into one turn (0 = off)
+
+
+class TranscriptionConfig(Base):
+    """Voice message transcription shared by all channels."""
+
+    engine: str = "auto"  # "auto" (Groq, with local fallback), "groq", "local" (faster-whisper), or "off"
+    local_model: str = "base"  # faster-whisper model size or path
+    concurrency: int = 2  # Transcriptions running at once
+    max_queue: int = 32  # Waiting voice notes beyond this are not transcribed
 
 
 class ChannelsConfig(Base):
@@ -174,6 +192,32 @@ class ChannelsConfig(Base):
     email: EmailConfig = Field(default_factory=EmailConfig)
     slack: SlackConfig = Field(default_factory=SlackConfig)
     qq: QQConfig = Field(default_factory=QQConfig)
+    transcription: TranscriptionConfig = Field(default_factory=TranscriptionConfig)
+
+
+class MemoryRetrievalConfig(Base):
+    """Relevance-based memory injection (needs numpy)."""
+
+    enabled: bool = True
+    max_memory_chars: int = 4000  # MEMORY.md up to this size is injected whole
+    top_k: int = 5  # Chunks injected per message once MEMORY.md is larger
+    embedding_model: str = ""  # fastembed model name; empty uses the built-in hashing embedder
+
+
+class SubagentConfig(Base):
+    """Scheduling limits and per-task budgets for background subagents."""
+
+    max_concurrent: int = 3  # Subagents running at once across all chats
+    max_per_session: int = 2  # Subagents running at once for one chat
+    max_queued: int = 20  # Further spawns are refused
+    max_iterations: int = 15
+    max_task_tokens: int = 200000  # Provider-reported tokens per task (0 = unlimited)
+    timeout_seconds: float = 900  # Wall-clock limit per task (0 = unlimited)
+    mode: str = "inline"  # "inline" or "process" (run subagents in worker processes)
+    workers: int = 2  # Worker processes in "process" mode
+    checkpoints: bool = True  # Save each task after every iteration and resume it after a restart
+    progress_updates: bool = False  # Post "step N (tools...)" notes to the chat that spawned the task
+    progress_interval_seconds: float = 30  # Minimum gap between progress notes for one task
 
 
 class AgentDefaults(Base):
@@ -185,6 +229,10 @@ class AgentDefaults(Base):
     temperature: float = 0.7
     max_tool_iterations: int = 20
     memory_window: int = 50
+    consolidation_model: str | None = None  # Cheaper model for memory consolidation (defaults to model)
+    memory_retrieval: MemoryRetrievalConfig = Field(default_factory=MemoryRetrievalConfig)
+    preempt_turns: bool = True  # A newer message for the same chat interrupts the turn in progress
+    subagents: SubagentConfig = Field(default_factory=SubagentConfig)
 
 
 class AgentsConfig(Base):
@@ -254,6 +302,35 @@ class MCPServerConfig(Base):
     args: list[str] = Field(default_factory=list)  # Stdio: command arguments
     env: dict[str, str] = Field(default_factory=dict)  # Stdio: extra env vars
     url: str = ""  # HTTP: streamable HTTP endpoint URL
+    connect_timeout: float = 30  # Seconds to start, initialize and list tools before retrying in the background
+    tool_timeout: float = 120  # Seconds per tool call (0 = unlimited)
+    health_interval: float = 30  # Seconds between pings while idle (0 = no pings)
+    idempotent_tools: list[str] = Field(default_factory=list)  # Safe to retry after a reconnect (besides annotated ones)
+
+
+class ToolRoutingConfig(Base):
+    """Send only relevant tools per turn once many (e.g. MCP) tools are registered."""
+
+    enabled: bool = True
+    max_tools: int = 24  # Routing kicks in above this many tools
+    core_tools: list[str] = Field(default_factory=list)  # MCP tool names (or "prefix*") always sent
+
+
+class ToolResultCacheConfig(Base):
+    """Reuse results of repeated read_file, list_dir, web_search and web_fetch calls."""
+
+    enabled: bool = True
+    ttl_seconds: float = 300  # How long web results are reused (file results last until the file changes)
+    max_entries: int = 256
+
+
+class ResultSpillConfig(Base):
+    """Store oversized tool results in the workspace and send a preview plus handle instead."""
+
+    enabled: bool = True
+    threshold_chars: int = 8000  # Results longer than this are spilled (also the read_result page size)
+    preview_chars: int = 2000  # How much of a spilled result is sent
+    retention_hours: float = 24  # Spilled results are deleted after this long
 
 
 class ToolsConfig(Base):
@@ -263,6 +340,9 @@ class ToolsConfig(Base):
     exec: ExecToolConfig = Field(default_factory=ExecToolConfig)
     restrict_to_workspace: bool = False  # If true, restrict all tool access to workspace directory
     mcp_servers: dict[str, MCPServerConfig] = Field(default_factory=dict)
+    routing: ToolRoutingConfig = Field(default_factory=ToolRoutingConfig)
+    result_cache: ToolResultCacheConfig = Field(default_factory=ToolResultCacheConfig)
+    result_spill: ResultSpillConfig = Field(default_factory=ResultSpillConfig)
 
 
 class Config(BaseSettings):
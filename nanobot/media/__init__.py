@@ -0,0 +1,5 @@
+"""Shared storage for media received by channels."""
+
+from nanobot.media.store import MediaStore, get_media_store, guess_extension
+
+__all__ = ["MediaStore", "get_media_store", "guess_extension"]
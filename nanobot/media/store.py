@@ -0,0 +1,339 @@
+"""Content-addressed media storage shared by all channels."""
+
+import asyncio
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from nanobot.utils.helpers import get_data_path
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    Image = None
+
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024  # 500MB
+MAX_IMAGE_SIDE = 1568  # Longest side vision models use without further downscaling
+DOWNLOAD_CONCURRENCY = 4
+_ALIAS_CACHE_SIZE = 2048
+_DATA_URL_CACHE_SIZE = 32
+_DATA_URL_CACHE_BYTES = 64 * 1024 * 1024  # Total size of cached data URLs
+
+Loader = Callable[[], Awaitable[bytes]]
+
+
+class MediaStore:
+    """
+    Stores inbound media once per unique content, keyed by its SHA-256.
+
+    Files live at `root/<hash[:2]>/<hash><ext>`, so the same photo forwarded
+    twice (or by two channels) occupies disk once. Downloads are deduplicated
+    by a channel-provided source key (e.g. Telegram `file_unique_id`) and run
+    concurrently up to a fixed limit. Images are prepared for the model once:
+    downscaled to `max_image_side` when Pillow is installed, and the resulting
+    data URL is cached on disk and in memory. When the store grows past
+    `max_bytes`, the least recently used files are evicted.
+
+    Args:
+        root: Storage directory (defaults to `~/.nanobot/media`).
+        max_bytes: Size budget for all stored and derived files.
+        max_image_side: Longest side, in pixels, of images sent to the model.
+        concurrency: Maximum simultaneous downloads.
+    """
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_image_side: int = MAX_IMAGE_SIDE,
+        concurrency: int = DOWNLOAD_CONCURRENCY,
+    ):
+        self.root = root or get_data_path() / "media"
+        self.max_bytes = max_bytes
+        self.max_image_side = max_image_side
+        self._concurrency = concurrency
+        self._semaphore: asyncio.Semaphore | None = None
+        self._aliases: OrderedDict[str, Path] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[Path]] = {}
+        self._data_urls: OrderedDict[Path, tuple[float, str]] = OrderedDict()  # Guarded by _lock
+        self._data_url_bytes = 0
+        self._usage: int | None = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Storing
+    # ------------------------------------------------------------------
+
+    def path_for(self, digest: str, ext: str = "") -> Path:
+        """Location of the file with content hash `digest`."""
+        return self.root / digest[:2] / f"{digest}{ext}"
+
+    def put_bytes(self, data: bytes, ext: str = "") -> Path:
+        """
+        Store `data` and return its content-addressed path.
+
+        Storing content that already exists only refreshes its recency.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, _normalize_ext(ext))
+        if path.exists():
+            path.touch()
+            return path
+        self._write_atomic(path, data)
+        self._account(len(data))
+        return path
+
+    def adopt(self, path: str | Path) -> Path | None:
+        """
+        Take over a file another process wrote into the store.
+
+        The file must already sit at its content-addressed location under
+        `root`. Used by the WhatsApp bridge, which stores attachments itself
+        instead of sending their bytes over the websocket.
+
+        Returns:
+            The path, or None if it is not a stored file.
+        """
+        p = Path(path)
+        digest = p.name.split(".", 1)[0]
+        if (
+            len(digest) != 64
+            or p.parent.name != digest[:2]
+            or p.parent.parent.resolve() != self.root.resolve()
+            or not p.is_file()
+        ):
+            return None
+        p.touch()
+        self._account(p.stat().st_size)
+        return p
+
+    async def fetch(self, key: str, loader: Loader, ext: str = "") -> Path:
+        """
+        Return the stored path for a remote file, downloading it at most once.
+
+        Args:
+            key: Stable identifier of the remote file, unique across channels
+                (e.g. "telegram:<file_unique_id>").
+            loader: Coroutine function returning the file's bytes.
+            ext: File extension to store it under.
+        """
+        if (path := self._aliases.get(key)) and path.exists():
+            self._aliases.move_to_end(key)
+            path.touch()
+            return path
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+
+        future: asyncio.Future[Path] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            async with self._download_slot():
+                data = await loader()
+            path = await asyncio.to_thread(self.put_bytes, data, ext)
+            self._remember(key, path)
+            future.set_result(path)
+            return path
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved so a failure nobody else awaited doesn't warn
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def fetch_all(
+        self, items: list[tuple[str, Loader, str]]
+    ) -> list[Path | BaseException]:
+        """Fetch several files concurrently; failures are returned in place of paths."""
+        return await asyncio.gather(
+            *(self.fetch(key, loader, ext) for key, loader, ext in items),
+            return_exceptions=True,
+        )
+
+    def _download_slot(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        return self._semaphore
+
+    def _remember(self, key: str, path: Path) -> None:
+        self._aliases[key] = path
+        self._aliases.move_to_end(key)
+        while len(self._aliases) > _ALIAS_CACHE_SIZE:
+            self._aliases.popitem(last=False)
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def _files(self) -> list[tuple[Path, os.stat_result]]:
+        if not self.root.exists():
+            return []
+        return [(p, p.stat()) for p in self.root.rglob("*") if p.is_file() and not p.name.startswith(".tmp-")]
+
+    def _account(self, added: int) -> None:
+        with self._lock:
+            if self._usage is None:
+                self._usage = sum(st.st_size for _, st in self._files())
+            else:
+                self._usage += added
+            if self._usage > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used files until usage is below 90% of the budget."""
+        files = sorted(self._files(), key=lambda item: item[1].st_mtime)
+        usage = sum(st.st_size for _, st in files)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for path, st in files:
+            if usage <= target:
+                break
+            path.unlink(missing_ok=True)
+            self._forget_data_url(path)
+            usage -= st.st_size
+            removed += 1
+        self._usage = usage
+        if removed:
+            logger.info(f"Media store evicted {removed} file(s), {usage / 1e6:.1f}MB in use")
+
+    # ------------------------------------------------------------------
+    # Images for the model
+    # ------------------------------------------------------------------
+
+    def image_data_url(self, path: str | Path) -> str | None:
+        """
+        Return a `data:` URL for an image, downscaled for the model.
+
+        The prepared image is written next to the original store entries
+        (under `root/derived/`) and its data URL kept in an in-memory LRU
+        bounded by count and total size, so an image referenced on every turn
+        is only encoded once. This reads and encodes files; from async code
+        use `image_data_urls`.
+
+        Returns:
+            The data URL, or None if `path` is not a readable image.
+        """
+        p = Path(path)
+        mime, _ = mimetypes.guess_type(p.name)
+        if not mime or not mime.startswith("image/") or not p.is_file():
+            return None
+
+        mtime = p.stat().st_mtime
+        with self._lock:
+            cached = self._data_urls.get(p)
+            if cached and cached[0] == mtime:
+                self._data_urls.move_to_end(p)
+                return cached[1]
+
+        try:
+            data, mime = self._prepare_image(p, mime)
+        except Exception as e:
+            logger.warning(f"Failed to prepare image {p}: {e}")
+            return None
+        url = f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+        if len(url) <= _DATA_URL_CACHE_BYTES // 4:  # A few huge images would flush everything else
+            with self._lock:
+                self._forget_data_url(p)
+                self._data_urls[p] = (mtime, url)
+                self._data_url_bytes += len(url)
+                while len(self._data_urls) > _DATA_URL_CACHE_SIZE or self._data_url_bytes > _DATA_URL_CACHE_BYTES:
+                    _, (_, evicted) = self._data_urls.popitem(last=False)
+                    self._data_url_bytes -= len(evicted)
+        return url
+
+    async def image_data_urls(self, paths: list[str]) -> list[str]:
+        """Data URLs of the images among `paths`, prepared in worker threads."""
+        urls = await asyncio.gather(*(asyncio.to_thread(self.image_data_url, p) for p in paths))
+        return [url for url in urls if url]
+
+    def _forget_data_url(self, path: Path) -> None:
+        """Drop a cached data URL; the caller holds `_lock`."""
+        if (entry := self._data_urls.pop(path, None)) is not None:
+            self._data_url_bytes -= len(entry[1])
+
+    def _prepare_image(self, path: Path, mime: str) -> tuple[bytes, str]:
+        """Return the (bytes, mime) to send for an image, using the derived cache."""
+        if not PIL_AVAILABLE or mime == "image/gif":
+            return path.read_bytes(), mime
+
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        for ext, derived_mime in ((".jpg", "image/jpeg"), (".png", "image/png")):
+            derived = self.root / "derived" / f"{digest}_{self.max_image_side}{ext}"
+            if derived.exists():
+                derived.touch()
+                return derived.read_bytes(), derived_mime
+
+        with Image.open(io.BytesIO(raw)) as img:
+            if max(img.size) <= self.max_image_side and mime in ("image/jpeg", "image/png"):
+                return raw, mime
+            img.thumbnail((self.max_image_side, self.max_image_side))
+            buf = io.BytesIO()
+            if img.mode in ("RGBA", "LA", "P"):
+                img.save(buf, format="PNG", optimize=True)
+                ext, mime = ".png", "image/png"
+            else:
+                img.convert("RGB").save(buf, format="JPEG", quality=85)
+                ext, mime = ".jpg", "image/jpeg"
+
+        data = buf.getvalue()
+        derived = self.root / "derived" / f"{digest}_{self.max_image_side}{ext}"
+        self._write_atomic(derived, data)
+        self._account(len(data))
+        return data, mime
+
+
+def _normalize_ext(ext: str) -> str:
+    ext = (ext or "").strip().lower()
+    if ext and not ext.startswith("."):
+        ext = "." + ext
+    return ext if len(ext) <= 10 and ext[1:].isalnum() else ""
+
+
+_store: MediaStore | None = None
+
+
+def get_media_store() -> MediaStore:
+    """Return the process-wide media store."""
+    global _store
+    if _store is None:
+        _store = MediaStore()
+    return _store
+
+
+def guess_extension(mime_type: str | None, filename: str | None = None) -> str:
+    """Pick a file extension from a filename or MIME type."""
+    if filename and (suffix := Path(filename).suffix):
+        return _normalize_ext(suffix)
+    if mime_type:
+        mime = mime_type.split(";")[0].strip().lower()
+        overrides = {"image/jpeg": ".jpg", "audio/ogg": ".ogg", "audio/mpeg": ".mp3", "audio/mp4": ".m4a"}
+        return overrides.get(mime) or _normalize_ext(mimetypes.guess_extension(mime) or "")
+    return ""
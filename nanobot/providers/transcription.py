@@ -1,65 +1,403 @@
-"""Voice transcription provider using Groq."""
+"""Voice transcription: Groq's Whisper API, an optional local engine, and a shared queue."""
 
+import asyncio
+import hashlib
+import json
 import os
+import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Protocol
 
 import httpx
 from loguru import logger
 
+from nanobot.utils.helpers import get_data_path
+
+if TYPE_CHECKING:
+    from nanobot.config.schema import TranscriptionConfig
+
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+    WhisperModel = None
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+CACHE_FLUSH_DELAY_S = 1.0  # New transcripts are appended to the cache log in batches this often
+
+
+class TranscriptionProvider(Protocol):
+    """Anything that turns an audio file into text ("" when it cannot)."""
+
+    async def transcribe(self, file_path: str | Path) -> str: ...
+
+    async def aclose(self) -> None: ...
+
 
 class GroqTranscriptionProvider:
     """
     Voice transcription provider using Groq's Whisper API.
-    
+
     Groq offers extremely fast transcription with a generous free tier.
+    The HTTP client is created once and reused across requests.
     """
-    
+
     def __init__(self, api_key: str | None = None):
         self.api_key = api_key or os.environ.get("GROQ_API_KEY")
         self.api_url = "https://api.groq.com/openai/v1/audio/transcriptions"
-    
+        self._client: httpx.AsyncClient | None = None
+
     async def transcribe(self, file_path: str | Path) -> str:
         """
         Transcribe an audio file using Groq.
-        
+
         Args:
             file_path: Path to the audio file.
-            
+
         Returns:
             Transcribed text.
         """
         if not self.api_key:
             logger.warning("Groq API key not configured for transcription")
             return ""
-        
+
         path = Path(file_path)
         if not path.exists():
             logger.error(f"Audio file not found: {file_path}")
             return ""
-        
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=60.0)
+
         try:
-            async with httpx.AsyncClient() as client:
-                with open(path, "rb") as f:
-                    files = {
-                        "file": (path.name, f),
-                        "model": (None, "whisper-large-v3"),
-                    }
-                    headers = {
-                        "Authorization": f"Bearer {self.api_key}",
-                    }
-                    
-                    response = await client.post(
-                        self.api_url,
-                        headers=headers,
-                        files=files,
-                        timeout=60.0
-                    )
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    return data.get("text", "")
-                    
+            with open(path, "rb") as f:
+                files = {
+                    "file": (path.name, f),
+                    "model": (None, "whisper-large-v3"),
+                }
+                headers = {
+                    "Authorization": f"Bearer {self.api_key}",
+                }
+
+                response = await self._client.post(self.api_url, headers=headers, files=files)
+
+                response.raise_for_status()
+                data = response.json()
+                return data.get("text", "")
+
         except Exception as e:
             logger.error(f"Groq transcription error: {e}")
             return ""
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+
+class LocalWhisperProvider:
+    """
+    Offline transcription on the CPU using faster-whisper (optional dependency).
+
+    The model is loaded on first use and shared by all calls; transcription
+    runs in a worker thread so the event loop stays responsive.
+
+    Args:
+        model: faster-whisper model size ("tiny", "base", "small", ...) or a local model path.
+        compute_type: CTranslate2 compute type; "int8" is the fastest on most CPUs.
+    """
+
+    def __init__(self, model: str = "base", compute_type: str = "int8"):
+        self.model_name = model
+        self.compute_type = compute_type
+        self._model: Any = None
+        self._lock = threading.Lock()
+
+    async def transcribe(self, file_path: str | Path) -> str:
+        """Transcribe an audio file locally; returns "" if unavailable or on error."""
+        if not FASTER_WHISPER_AVAILABLE:
+            logger.warning("Local transcription unavailable: faster-whisper is not installed")
+            return ""
+        try:
+            return await asyncio.to_thread(self._transcribe_sync, str(file_path))
+        except Exception as e:
+            logger.error(f"Local transcription error: {e}")
+            return ""
+
+    def _transcribe_sync(self, file_path: str) -> str:
+        # One transcription at a time per model: CTranslate2 already uses every core
+        with self._lock:
+            if self._model is None:
+                logger.info(f"Loading local Whisper model '{self.model_name}'")
+                self._model = WhisperModel(self.model_name, device="cpu", compute_type=self.compute_type)
+            segments, _ = self._model.transcribe(file_path, beam_size=1, vad_filter=True)
+            return " ".join(s.text.strip() for s in segments).strip()
+
+    async def aclose(self) -> None:
+        pass
+
+
+class TranscriptionService:
+    """
+    Shared transcription queue for all channels.
+
+    `submit` returns immediately with a future, so channels never hold up
+    message intake while audio is transcribed. Requests are processed by a
+    fixed number of workers from a bounded queue (overflow resolves to ""),
+    identical audio is transcribed once (results are cached by SHA-256 and
+    persisted), and providers are tried in order until one returns text, so
+    a local engine can back up a cloud API.
+
+    Hashing audio and all cache file I/O happen in worker threads. New
+    transcripts are appended to a JSONL log in batches, which is compacted
+    once it holds twice `cache_size` lines.
+
+    Args:
+        providers: Engines to try in order.
+        concurrency: Number of transcriptions running at once.
+        max_queue: Maximum waiting requests before new ones are dropped.
+        cache_path: JSONL log of cached transcripts (None keeps them in memory only).
+        cache_size: Maximum number of cached transcripts.
+    """
+
+    def __init__(
+        self,
+        providers: list[TranscriptionProvider],
+        concurrency: int = 2,
+        max_queue: int = 32,
+        cache_path: Path | None = None,
+        cache_size: int = 1000,
+    ):
+        self.providers = providers
+        self.concurrency = max(1, concurrency)
+        self.cache_path = cache_path
+        self.cache_size = cache_size
+        self._max_queue = max_queue
+        self._queue: asyncio.Queue[tuple[str | None, Path, asyncio.Future[str]]] | None = None
+        self._workers: list[asyncio.Task] = []
+        self._inflight: dict[str, asyncio.Future[str]] = {}
+        self._cache: OrderedDict[str, str] | None = None
+        self._pending: list[tuple[str, str]] = []  # Transcripts not yet written to the log
+        self._log_lines = 0
+        self._log_lock = threading.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    def submit(self, file_path: str | Path) -> asyncio.Future[str]:
+        """
+        Queue an audio file for transcription.
+
+        Returns:
+            A future resolving to the transcript ("" if it could not be produced).
+        """
+        loop = asyncio.get_running_loop()
+        path = Path(file_path)
+        # Media store files are named by their SHA-256; other files are hashed by a worker
+        key = path.stem if _SHA256_RE.match(path.stem) else None
+        if key is not None:
+            if self._cache is not None and (text := self._cache_get(key)) is not None:
+                return self._resolved(loop, text)
+            if key in self._inflight:
+                return self._inflight[key]
+
+        self._ensure_workers()
+        future: asyncio.Future[str] = loop.create_future()
+        try:
+            self._queue.put_nowait((key, path, future))
+        except asyncio.QueueFull:
+            logger.warning(f"Transcription queue full, skipping {path.name}")
+            future.set_result("")
+            return future
+        if key is not None:
+            self._inflight[key] = future
+        return future
+
+    async def transcribe(self, file_path: str | Path) -> str:
+        """Transcribe an audio file through the queue."""
+        return await asyncio.shield(self.submit(file_path))
+
+    async def close(self) -> None:
+        """Stop the workers, write pending transcripts and release provider resources."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        for future in self._inflight.values():
+            if not future.done():
+                future.set_result("")
+        self._inflight.clear()
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self._flush()
+        for provider in self.providers:
+            await provider.aclose()
+
+    def _ensure_workers(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._max_queue)
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def _worker(self) -> None:
+        while True:
+            key, path, future = await self._queue.get()
+            try:
+                await self._ensure_cache()
+                if key is None:
+                    key = await asyncio.to_thread(self._audio_key, path)
+                    if key in self._inflight:
+                        # Same audio under another name is already being transcribed
+                        self._inflight[key].add_done_callback(lambda f, future=future: _copy_result(f, future))
+                        key = None  # Not ours to clear from _inflight
+                        continue
+                    self._inflight[key] = future
+                if (text := self._cache_get(key)) is None:
+                    text = await self._run_providers(path)
+                    if text:
+                        self._cache_put(key, text)
+                        logger.info(f"Transcribed {path.name}: {text[:50]}...")
+                if not future.done():
+                    future.set_result(text)
+            except Exception as e:
+                logger.error(f"Transcription failed for {path.name}: {e}")
+                if not future.done():
+                    future.set_result("")
+            finally:
+                if key is not None:
+                    self._inflight.pop(key, None)
+                self._queue.task_done()
+
+    async def _run_providers(self, path: Path) -> str:
+        for provider in self.providers:
+            if text := (await provider.transcribe(path)).strip():
+                return text
+        return ""
+
+    @staticmethod
+    def _resolved(loop: asyncio.AbstractEventLoop, text: str) -> asyncio.Future[str]:
+        future = loop.create_future()
+        future.set_result(text)
+        return future
+
+    @staticmethod
+    def _audio_key(path: Path) -> str:
+        """SHA-256 of the audio file's contents."""
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+
+    def _cache_get(self, key: str) -> str | None:
+        cache = self._cache
+        if cache is not None and key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        return None
+
+    def _cache_put(self, key: str, text: str) -> None:
+        cache = self._cache
+        cache[key] = text
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        if self.cache_path:
+            self._pending.append((key, text))
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _ensure_cache(self) -> None:
+        if self._cache is None:
+            cache, lines = await asyncio.to_thread(self._read_log)
+            if self._cache is None:
+                self._cache, self._log_lines = cache, lines
+
+    async def _flush_later(self) -> None:
+        while self._pending:
+            await asyncio.sleep(CACHE_FLUSH_DELAY_S)
+            await self._flush()
+
+    async def _flush(self) -> None:
+        """Append pending transcripts to the log, or rewrite it once it has grown too long."""
+        pending, self._pending = self._pending, []
+        if not pending or not self.cache_path:
+            return
+        compact = self._log_lines + len(pending) > 2 * self.cache_size
+        entries = list(self._cache.items()) if compact else pending
+        if await asyncio.to_thread(self._write_log, entries, compact):
+            self._log_lines = len(entries) if compact else self._log_lines + len(entries)
+
+    def _write_log(self, entries: list[tuple[str, str]], rewrite: bool) -> bool:
+        data = "".join(json.dumps({"key": k, "text": t}, ensure_ascii=False) + "\n" for k, t in entries)
+        try:
+            with self._log_lock:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                if rewrite:
+                    tmp = self.cache_path.with_suffix(".tmp")
+                    tmp.write_text(data, encoding="utf-8")
+                    tmp.replace(self.cache_path)
+                else:
+                    with open(self.cache_path, "a", encoding="utf-8") as f:
+                        f.write(data)
+            return True
+        except OSError as e:
+            logger.warning(f"Failed to save transcription cache: {e}")
+            return False
+
+    def _read_log(self) -> tuple[OrderedDict[str, str], int]:
+        cache: OrderedDict[str, str] = OrderedDict()
+        lines = 0
+        if self.cache_path and self.cache_path.exists():
+            try:
+                with open(self.cache_path, encoding="utf-8") as f:
+                    for line in f:
+                        lines += 1
+                        try:
+                            entry = json.loads(line)
+                            cache[entry["key"]] = entry["text"]
+                            cache.move_to_end(entry["key"])
+                        except (ValueError, KeyError, TypeError):
+                            continue  # e.g. a line cut short by a crash
+            except OSError as e:
+                logger.warning(f"Ignoring unreadable transcription cache: {e}")
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return cache, lines
+
+
+def _copy_result(source: asyncio.Future[str], target: asyncio.Future[str]) -> None:
+    if not target.done():
+        target.set_result("" if source.cancelled() else source.result())
+
+
+def make_transcription_service(
+    config: "TranscriptionConfig", groq_api_key: str = ""
+) -> TranscriptionService | None:
+    """
+    Build the transcription service from config.
+
+    "auto" uses Groq when an API key is available and the local engine when
+    faster-whisper is installed (as the fallback, or alone when offline).
+
+    Returns:
+        The service, or None if transcription is off or no engine is available.
+    """
+    engine = config.engine
+    if engine == "off":
+        return None
+
+    groq_key = groq_api_key or os.environ.get("GROQ_API_KEY", "")
+    providers: list[TranscriptionProvider] = []
+    if engine in ("auto", "groq") and groq_key:
+        providers.append(GroqTranscriptionProvider(api_key=groq_key))
+    if engine == "local" or (engine == "auto" and FASTER_WHISPER_AVAILABLE):
+        providers.append(LocalWhisperProvider(model=config.local_model))
+
+    if not providers:
+        logger.info("Voice transcription disabled: no Groq API key and faster-whisper is not installed")
+        return None
+    return TranscriptionService(
+        providers,
+        concurrency=config.concurrency,
+        max_queue=config.max_queue,
+        cache_path=get_data_path() / "transcriptions.jsonl",
+    )
@@ -1,5 +1,6 @@
 """Session management module."""
 
 from nanobot.session.manager import SessionManager, Session
+from nanobot.session.message import SessionMessage
 
-__all__ = ["SessionManager", "Session"]
+__all__ = ["SessionManager", "Session", "SessionMessage"]
@@ -1,6 +1,7 @@
 """Session management for conversation history."""
 
 import json
+import os
 from pathlib import Path
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -8,6 +9,7 @@ from typing import Any
 
 from loguru import logger
 
+from nanobot.session.message import SessionMessage
 from nanobot.utils.helpers import ensure_dir, safe_filename
 
 
@@ -24,39 +26,82 @@ class Session:
     """
 
     key: str  # channel:chat_id
-    messages: list[dict[str, Any]] = field(default_factory=list)
+    messages: list[SessionMessage] = field(default_factory=list)
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
     metadata: dict[str, Any] = field(default_factory=dict)
     last_consolidated: int = 0  # Number of messages already consolidated to files
+    offset: int = 0  # Number of older messages left on disk (not loaded into `messages`)
+
+    # Cached LLM-format dicts for messages[_view_start:], extended on append
+    _view: list[dict[str, Any]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _view_start: int = field(default=0, init=False, repr=False, compare=False)
+    _view_src: list | None = field(default=None, init=False, repr=False, compare=False)
+    # Messages already in the session file, so save() only has to append the rest
+    _persisted: int = field(default=0, init=False, repr=False, compare=False)
+    _persisted_src: list | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def total_messages(self) -> int:
+        """Total number of messages, including those not loaded from disk."""
+        return self.offset + len(self.messages)
     
     def add_message(self, role: str, content: str, **kwargs: Any) -> None:
         """Add a message to the session."""
-        msg = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-            **kwargs
-        }
-        self.messages.append(msg)
+        tools_used = kwargs.pop("tools_used", None)
+        self.messages.append(SessionMessage(
+            role,
+            content,
+            tools_used=tuple(tools_used) if tools_used else None,
+            extra=kwargs or None,
+        ))
         self.updated_at = datetime.now()
     
     def get_history(self, max_messages: int = 500) -> list[dict[str, Any]]:
-        """Get recent messages in LLM format (role + content only)."""
-        return [{"role": m["role"], "content": m["content"]} for m in self.messages[-max_messages:]]
+        """
+        Get recent messages in LLM format (role + content only).
+
+        The returned dicts are cached and shared between calls; treat them as read-only.
+        """
+        messages = self.messages
+        start = max(len(messages) - max_messages, 0)
+        view_end = self._view_start + len(self._view)
+        if self._view_src is not messages or start < self._view_start or view_end > len(messages):
+            self._view = [_to_llm(m) for m in messages[start:]]
+            self._view_start = start
+            self._view_src = messages
+        else:
+            self._view.extend(_to_llm(m) for m in messages[view_end:])
+            if start - self._view_start > max_messages:
+                # Drop the part of the view that slid out of the window
+                del self._view[:start - self._view_start]
+                self._view_start = start
+        return self._view[start - self._view_start:]
     
     def clear(self) -> None:
         """Clear all messages and reset session to initial state."""
         self.messages = []
         self.last_consolidated = 0
+        self.offset = 0
         self.updated_at = datetime.now()
 
 
+_HEADER_BLOCK = 512  # Metadata lines are padded to a multiple of this...
+_HEADER_SLACK = 256  # ...with at least this much room to grow in place
+
+
+def _to_llm(m: SessionMessage | dict[str, Any]) -> dict[str, Any]:
+    return m.to_llm() if isinstance(m, SessionMessage) else {"role": m["role"], "content": m["content"]}
+
+
 class SessionManager:
     """
     Manages conversation sessions.
 
-    Sessions are stored as JSONL files in the sessions directory.
+    Sessions are stored as JSONL files in the sessions directory. The first
+    line holds metadata, padded with spaces to a fixed width, so a save
+    appends the new messages and rewrites that line in place instead of
+    rewriting the whole file.
     """
 
     def __init__(self, workspace: Path):
@@ -69,12 +114,14 @@ class SessionManager:
         safe_key = safe_filename(key.replace(":", "_"))
         return self.sessions_dir / f"{safe_key}.jsonl"
     
-    def get_or_create(self, key: str) -> Session:
+    def get_or_create(self, key: str, tail: int | None = None) -> Session:
         """
         Get an existing session or create a new one.
         
         Args:
             key: Session key (usually channel:chat_id).
+            tail: If set, only the last `tail` messages are loaded from disk;
+                older ones stay on disk and can be read with `load_messages`.
         
         Returns:
             The session.
@@ -82,69 +129,215 @@ class SessionManager:
         if key in self._cache:
             return self._cache[key]
         
-        session = self._load(key)
+        session = self._load(key, tail)
         if session is None:
             session = Session(key=key)
         
         self._cache[key] = session
         return session
     
-    def _load(self, key: str) -> Session | None:
-        """Load a session from disk."""
+    def _load(self, key: str, tail: int | None = None) -> Session | None:
+        """Load a session from disk, optionally materializing only the last `tail` messages."""
         path = self._get_session_path(key)
 
         if not path.exists():
             return None
 
         try:
-            messages = []
-            metadata = {}
-            created_at = None
-            last_consolidated = 0
-
-            with open(path) as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    data = json.loads(line)
-
-                    if data.get("_type") == "metadata":
-                        metadata = data.get("metadata", {})
-                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-                        last_consolidated = data.get("last_consolidated", 0)
-                    else:
-                        messages.append(data)
-
-            return Session(
+            with open(path, "rb") as f:
+                data = json.loads(f.readline().strip() or b"{}")
+                if data.get("_type") != "metadata":
+                    # No metadata line: treat the file as plain messages
+                    data = {}
+                    f.seek(0)
+                body_start = f.tell()
+
+                count = data.get("message_count")
+                if data.get("size") is not None and os.fstat(f.fileno()).st_size != data["size"]:
+                    count = None  # Interrupted append: count the messages instead of trusting the header
+                if tail is None or count is None or count <= tail:
+                    lines = [line for line in f if line.strip()]
+                    offset = 0
+                else:
+                    lines = self._read_tail_lines(f, body_start, tail)
+                    offset = count - len(lines)
+
+            session = Session(
                 key=key,
-                messages=messages,
-                created_at=created_at or datetime.now(),
-                metadata=metadata,
-                last_consolidated=last_consolidated
+                messages=[SessionMessage.from_dict(json.loads(line)) for line in lines],
+                created_at=datetime.fromisoformat(data["created_at"]) if data.get("created_at") else datetime.now(),
+                metadata=data.get("metadata", {}),
+                last_consolidated=data.get("last_consolidated", 0),
+                offset=offset,
             )
+            session._persisted = session.total_messages
+            session._persisted_src = session.messages
+            return session
         except Exception as e:
             logger.warning(f"Failed to load session {key}: {e}")
             return None
+
+    @staticmethod
+    def _read_tail_lines(f, body_start: int, count: int, block_size: int = 65536) -> list[bytes]:
+        """Read the last `count` non-empty lines of a file by seeking backwards from the end."""
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        buf = b""
+        while pos > body_start:
+            step = min(block_size, pos - body_start)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            # One extra newline guarantees the earliest kept line is complete
+            if buf.count(b"\n") > count:
+                break
+        lines = [line for line in buf.split(b"\n") if line.strip()]
+        return lines[-count:]
+
+    def load_messages(self, session: Session, start: int = 0, end: int | None = None) -> list[SessionMessage]:
+        """
+        Get messages by absolute index, paging in older ones from disk if needed.
+
+        The session itself is not modified, so paged-in messages do not stay
+        in memory.
+
+        Args:
+            session: The session to read from.
+            start: Absolute index of the first message.
+            end: Absolute index past the last message (defaults to all).
+
+        Returns:
+            The messages in `[start, end)`.
+        """
+        total = session.total_messages
+        start, end, _ = slice(start, end).indices(total)
+        if start >= end:
+            return []
+
+        older: list[SessionMessage] = []
+        if start < session.offset:
+            path = self._get_session_path(session.key)
+            stop = min(end, session.offset)
+            with open(path, "rb") as f:
+                for index, line in enumerate(self._iter_message_lines(f)):
+                    if index >= stop:
+                        break
+                    if index >= start:
+                        older.append(SessionMessage.from_dict(json.loads(line)))
+
+        loaded = session.messages[max(start - session.offset, 0):max(end - session.offset, 0)]
+        return older + loaded
     
     def save(self, session: Session) -> None:
-        """Save a session to disk."""
+        """
+        Save a session to disk.
+
+        Messages added since the last save or load are appended and the
+        metadata line is rewritten in place. The whole file is only rewritten
+        when that isn't possible: a new or cleared session, metadata that
+        outgrew its padding, or a file changed behind the manager's back.
+        """
         path = self._get_session_path(session.key)
+        if not self._append(path, session):
+            self._rewrite(path, session)
+        session._persisted = session.total_messages
+        session._persisted_src = session.messages
+        self._cache[session.key] = session
 
-        with open(path, "w") as f:
-            metadata_line = {
-                "_type": "metadata",
-                "created_at": session.created_at.isoformat(),
-                "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata,
-                "last_consolidated": session.last_consolidated
-            }
-            f.write(json.dumps(metadata_line) + "\n")
-            for msg in session.messages:
-                f.write(json.dumps(msg) + "\n")
+    @staticmethod
+    def _header(session: Session, size: int, width: int | None = None) -> bytes | None:
+        """
+        Metadata line padded to `width` bytes (newline included), or None if it doesn't fit.
 
-        self._cache[session.key] = session
+        Without a width, one with room for the metadata to grow is chosen.
+        """
+        line = json.dumps({
+            "_type": "metadata",
+            "key": session.key,
+            "created_at": session.created_at.isoformat(),
+            "updated_at": session.updated_at.isoformat(),
+            "metadata": session.metadata,
+            "last_consolidated": session.last_consolidated,
+            "message_count": session.total_messages,
+            "size": size,
+        }).encode()
+        if width is None:
+            width = -(-(len(line) + _HEADER_SLACK) // _HEADER_BLOCK) * _HEADER_BLOCK
+        if len(line) >= width:
+            return None
+        return line.ljust(width - 1) + b"\n"
+
+    @staticmethod
+    def _encode(messages: list) -> bytes:
+        return b"".join(
+            (json.dumps(m.to_dict() if isinstance(m, SessionMessage) else m) + "\n").encode()
+            for m in messages
+        )
+
+    def _append(self, path: Path, session: Session) -> bool:
+        """Append unsaved messages and update the metadata line in place; False if not possible."""
+        if session._persisted_src is not session.messages or session._persisted < session.offset:
+            return False
+        try:
+            with open(path, "r+b") as f:
+                old = f.readline()
+                data = json.loads(old)
+                end = f.seek(0, os.SEEK_END)
+                if (
+                    data.get("_type") != "metadata"
+                    or data.get("size") != end
+                    or data.get("message_count") != session._persisted
+                ):
+                    return False
+                body = self._encode(session.messages[session._persisted - session.offset:])
+                header = self._header(session, end + len(body), len(old))
+                if header is None:
+                    return False
+                # Messages first: if this is interrupted, the stale size makes the next load recount
+                f.write(body)
+                f.seek(0)
+                f.write(header)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _rewrite(self, path: Path, session: Session) -> None:
+        """Write the whole session file, copying messages that were never loaded."""
+        tmp_path = path.with_suffix(".jsonl.tmp")
+        header = self._header(session, 0)
+        with open(tmp_path, "wb") as f:
+            f.write(b" " * (len(header) - 1) + b"\n")  # Filled in once the size is known
+            if session.offset:
+                # Copy messages that were never loaded verbatim, without parsing
+                self._copy_message_lines(path, f, session.offset)
+            f.write(self._encode(session.messages))
+            size = f.tell()
+            f.seek(0)
+            f.write(self._header(session, size, len(header)))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _iter_message_lines(f):
+        """Yield the raw message lines of a session file, skipping metadata and blanks."""
+        for i, line in enumerate(f):
+            if not line.strip():
+                continue
+            if i == 0 and b'"_type": "metadata"' in line:
+                continue
+            yield line
+
+    @staticmethod
+    def _copy_message_lines(src: Path, dst, count: int) -> None:
+        """Copy the first `count` message lines of a session file into `dst`."""
+        copied = 0
+        with open(src, "rb") as f:
+            for line in SessionManager._iter_message_lines(f):
+                if copied >= count:
+                    break
+                dst.write(line if line.endswith(b"\n") else line + b"\n")
+                copied += 1
+        if copied < count:
+            logger.warning(f"Session file {src} is missing {count - copied} older messages")
     
     def invalidate(self, key: str) -> None:
         """Remove a session from the in-memory cache."""
@@ -168,7 +361,8 @@ class SessionManager:
                         data = json.loads(first_line)
                         if data.get("_type") == "metadata":
                             sessions.append({
-                                "key": path.stem.replace("_", ":"),
+                                # File names are a lossy encoding of the key; legacy files lack it
+                                "key": data.get("key") or path.stem.replace("_", ":"),
                                 "created_at": data.get("created_at"),
                                 "updated_at": data.get("updated_at"),
                                 "path": str(path)
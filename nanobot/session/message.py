@@ -0,0 +1,105 @@
+"""Compact in-memory representation of a session message."""
+
+import sys
+import time
+from datetime import datetime
+from typing import Any
+
+
+class SessionMessage:
+    """
+    A single conversation message.
+
+    Uses __slots__, interned roles and an epoch timestamp instead of a dict
+    with an ISO string, which keeps long sessions small in memory. Supports
+    read-only mapping access (`msg["content"]`, `msg.get("timestamp")`) so
+    it can be used wherever message dicts were used before.
+    """
+
+    __slots__ = ("role", "content", "ts", "tools_used", "extra")
+
+    def __init__(
+        self,
+        role: str,
+        content: Any,
+        ts: float | None = None,
+        tools_used: tuple[str, ...] | None = None,
+        extra: dict[str, Any] | None = None,
+    ):
+        self.role = sys.intern(role)
+        self.content = content
+        self.ts = time.time() if ts is None else ts
+        self.tools_used = tools_used
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "SessionMessage":
+        """Build a message from its persisted (JSONL) dict form."""
+        data = dict(data)
+        role = data.pop("role", "user")
+        content = data.pop("content", "")
+        timestamp = data.pop("timestamp", None)
+        tools_used = data.pop("tools_used", None)
+        try:
+            ts = datetime.fromisoformat(timestamp).timestamp() if timestamp else 0.0
+        except (TypeError, ValueError):
+            ts = 0.0
+        return cls(
+            role,
+            content,
+            ts=ts,
+            tools_used=tuple(tools_used) if tools_used else None,
+            extra=data or None,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to the persisted dict form (ISO timestamp)."""
+        data: dict[str, Any] = {"role": self.role, "content": self.content}
+        if self.ts:
+            data["timestamp"] = datetime.fromtimestamp(self.ts).isoformat()
+        if self.tools_used:
+            data["tools_used"] = list(self.tools_used)
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def to_llm(self) -> dict[str, Any]:
+        """Get the message in LLM format (role + content only)."""
+        return {"role": self.role, "content": self.content}
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "role":
+            return self.role
+        if key == "content":
+            return self.content
+        if key == "timestamp" and self.ts:
+            return datetime.fromtimestamp(self.ts).isoformat()
+        if key == "tools_used" and self.tools_used:
+            return list(self.tools_used)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def copy(self) -> dict[str, Any]:
+        return self.to_dict()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, SessionMessage):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"SessionMessage(role={self.role!r}, content={str(self.content)[:40]!r})"
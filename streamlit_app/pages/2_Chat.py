@@ -70,6 +70,8 @@ def init_agent():
             cron_service=cron,
             restrict_to_workspace=config.tools.restrict_to_workspace,
             mcp_servers=config.tools.mcp_servers,
+            consolidation_model=config.agents.defaults.consolidation_model,
+            memory_retrieval=config.agents.defaults.memory_retrieval,
         )
         
         st.session_state.agent_loop = agent_loop
@@ -237,6 +237,7 @@ try:
             imap_password = st.text_input("IMAP Password", value=em.imap_password, type="password")
             imap_use_ssl = st.checkbox("Use SSL", value=em.imap_use_ssl)
             imap_mailbox = st.text_input("Mailbox", value=em.imap_mailbox)
+            imap_idle = st.checkbox("Use IMAP IDLE", value=em.imap_idle, help="Receive new mail instantly when the server supports IDLE; otherwise poll")
         
         with col2:
             st.markdown("**SMTP Settings**")
@@ -261,6 +262,7 @@ try:
                 imap_password=imap_password,
                 imap_use_ssl=imap_use_ssl,
                 imap_mailbox=imap_mailbox,
+                imap_idle=imap_idle,
                 smtp_host=smtp_host,
                 smtp_port=smtp_port,
                 smtp_username=smtp_username,
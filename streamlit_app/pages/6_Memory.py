@@ -14,6 +14,7 @@ st.markdown("View and manage your agent's persistent memory")
 try:
     from nanobot.config.loader import load_config
     from nanobot.agent.memory import MemoryStore
+    from nanobot.agent.memory_index import MemoryIndex
     
     config = load_config()
     workspace = config.workspace_path
@@ -43,7 +44,7 @@ try:
     
     with tab2:
         st.subheader("HISTORY.md")
-        st.markdown("Append-only log of conversation events and decisions (grep-searchable).")
+        st.markdown("Append-only log of conversation events and decisions (full-text indexed).")
         
         if memory.history_file.exists():
             history_content = memory.history_file.read_text(encoding="utf-8")
@@ -52,16 +53,15 @@ try:
                 search = st.text_input("Search history", placeholder="Enter search term...")
                 
                 if search:
-                    lines = history_content.split("\n")
-                    matching = [l for l in lines if search.lower() in l.lower()]
+                    index = MemoryIndex(workspace)
+                    matching = index.search(search, source="history", limit=50)
                     
-                    st.markdown(f"**Found {len(matching)} matching lines:**")
-                    for line in matching[:50]:
-                        if line.strip():
-                            st.markdown(f"> {line}")
+                    st.markdown(f"**Found {len(matching)} matching entries:**")
+                    for hit in matching:
+                        st.markdown(f"> {hit.snippet}")
                     
-                    if len(matching) > 50:
-                        st.info(f"Showing 50 of {len(matching)} results")
+                    if len(matching) == 50:
+                        st.info("Showing the 50 best matches")
                 else:
                     with st.expander("View Full History", expanded=False):
                         st.markdown(history_content)
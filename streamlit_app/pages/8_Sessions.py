@@ -58,13 +58,13 @@ try:
             selected_key = st.selectbox("Select Session", session_keys)
             
             if selected_key:
-                session = session_manager.get_or_create(selected_key)
+                session = session_manager.get_or_create(selected_key, tail=50)
                 
                 st.markdown(f"**Session Key:** `{selected_key}`")
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.metric("Messages", len(session.messages))
+                    st.metric("Messages", session.total_messages)
                 with col2:
                     st.metric("Last Consolidated", session.last_consolidated)
                 with col3:
@@ -97,16 +97,17 @@ try:
                             if timestamp:
                                 st.caption(f"Time: {timestamp[:19]}")
                     
-                    if len(messages_to_show) > 50:
-                        st.info(f"Showing last 50 of {len(messages_to_show)} messages")
+                    if session.offset:
+                        st.info(f"Showing last {len(session.messages)} of {session.total_messages} messages")
                     
                     st.markdown("---")
                     
                     with st.expander("Export Session"):
                         export_format = st.selectbox("Format", ["JSON", "Markdown"])
                         
+                        all_messages = session_manager.load_messages(session)
                         if export_format == "JSON":
-                            export_data = json.dumps(session.messages, indent=2)
+                            export_data = json.dumps([m.to_dict() for m in all_messages], indent=2)
                             st.download_button(
                                 "Download JSON",
                                 export_data,
@@ -115,7 +116,7 @@ try:
                             )
                         else:
                             md_lines = []
-                            for msg in session.messages:
+                            for msg in all_messages:
                                 role = msg.get("role", "unknown")
                                 content = msg.get("content", "")
                                 md_lines.append(f"**{role.upper()}:** {content}\n")
@@ -0,0 +1,104 @@
+"""Test outbound rate limiting and per-chat send lanes."""
+
+import asyncio
+import time
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.base import BaseChannel
+from nanobot.channels.manager import ChannelManager
+from nanobot.channels.ratelimit import RateLimitedError, RateLimiter, TokenBucket
+from nanobot.config.schema import Config
+
+
+class FakeChannel(BaseChannel):
+    name = "fake"
+    chat_rate_limit = (20.0, 1)
+
+    def __init__(self, bus: MessageBus):
+        super().__init__(None, bus)
+        self.sent: list[tuple[str, str, float]] = []
+        self.fail_times = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def send(self, msg: OutboundMessage) -> None:
+        async def call() -> None:
+            if self.fail_times:
+                self.fail_times -= 1
+                raise RateLimitedError(0.05)
+            self.sent.append((msg.chat_id, msg.content, time.monotonic()))
+
+        await self._call_api(msg.chat_id, call)
+
+
+async def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=50.0, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    # 2 from the burst, then 2 more at 50/s
+    assert 0.03 <= time.monotonic() - start < 0.2
+
+
+async def test_server_quota_blocks_bucket():
+    limiter = RateLimiter(chat_limit=(100.0, 10))
+    limiter.update("c1", remaining=0, reset_after=0.1)
+    start = time.monotonic()
+    await limiter.acquire("c1")
+    assert time.monotonic() - start >= 0.09
+    # Other chats are unaffected
+    start = time.monotonic()
+    await limiter.acquire("c2")
+    assert time.monotonic() - start < 0.05
+
+
+async def test_call_api_retries_after_rate_limit():
+    channel = FakeChannel(MessageBus())
+    channel.fail_times = 2
+    await channel.send(OutboundMessage(channel="fake", chat_id="c1", content="hi"))
+    assert [m[1] for m in channel.sent] == ["hi"]
+
+
+async def test_rate_limited_chat_does_not_block_others():
+    bus = MessageBus()
+    manager = ChannelManager(Config(), bus)
+    channel = FakeChannel(bus)
+    manager.channels["fake"] = channel
+    channel.rate_limiter.block(0.3, "slow")
+
+    dispatcher = asyncio.create_task(manager._dispatch_outbound())
+    for i in range(3):
+        await bus.publish_outbound(OutboundMessage(channel="fake", chat_id="slow", content=f"s{i}"))
+    await bus.publish_outbound(OutboundMessage(channel="fake", chat_id="fast", content="f0"))
+    await asyncio.sleep(0.5)
+    dispatcher.cancel()
+
+    assert channel.sent[0][:2] == ("fast", "f0")
+    assert [c for chat, c, _ in channel.sent if chat == "slow"] == ["s0", "s1", "s2"]
+    assert manager._lanes == {}
+
+
+async def test_discord_429_is_retried_only_by_call_api():
+    import httpx
+
+    from nanobot.channels.discord import DiscordChannel
+    from nanobot.config.schema import DiscordConfig
+
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(429, json={"retry_after": 0.01, "global": False})
+
+    channel = DiscordChannel(DiscordConfig(token="t"), MessageBus())
+    channel._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        await channel.send(OutboundMessage(channel="discord", chat_id="c1", content="hi"))
+    finally:
+        await channel._http.aclose()
+    assert len(requests) == 4  # One call plus _call_api's 3 retries
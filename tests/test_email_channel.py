@@ -9,6 +9,11 @@ from nanobot.channels.email import EmailChannel
 from nanobot.config.schema import EmailConfig
 
 
+@pytest.fixture(autouse=True)
+def _isolated_data_path(monkeypatch, tmp_path):
+    monkeypatch.setattr("nanobot.channels.email.get_data_path", lambda: tmp_path)
+
+
 def _make_config() -> EmailConfig:
     return EmailConfig(
         enabled=True,
@@ -44,7 +49,8 @@ def test_fetch_new_messages_parses_unseen_and_marks_seen(monkeypatch) -> None:
 
     class FakeIMAP:
         def __init__(self) -> None:
-            self.store_calls: list[tuple[bytes, str, str]] = []
+            self.search_args: list[tuple] = []
+            self.store_calls: list[tuple[str, str, str]] = []
 
         def login(self, _user: str, _pw: str):
             return "OK", [b"logged in"]
@@ -52,14 +58,16 @@ def test_fetch_new_messages_parses_unseen_and_marks_seen(monkeypatch) -> None:
         def select(self, _mailbox: str):
             return "OK", [b"1"]
 
-        def search(self, *_args):
-            return "OK", [b"1"]
-
-        def fetch(self, _imap_id: bytes, _parts: str):
-            return "OK", [(b"1 (UID 123 BODY[] {200})", raw), b")"]
+        def response(self, code: str):
+            return code, [b"7"]
 
-        def store(self, imap_id: bytes, op: str, flags: str):
-            self.store_calls.append((imap_id, op, flags))
+        def uid(self, command: str, *args):
+            if command == "SEARCH":
+                self.search_args.append(args)
+                return "OK", [b"123"]
+            if command == "FETCH":
+                return "OK", [(b"1 (UID 123 BODY[] {200})", raw), b")"]
+            self.store_calls.append(args)
             return "OK", [b""]
 
         def logout(self):
@@ -75,11 +83,16 @@ def test_fetch_new_messages_parses_unseen_and_marks_seen(monkeypatch) -> None:
     assert items[0]["sender"] == "alice@example.com"
     assert items[0]["subject"] == "Invoice"
     assert "Please pay" in items[0]["content"]
-    assert fake.store_calls == [(b"1", "+FLAGS", "\\Seen")]
+    assert fake.store_calls == [("123", "+FLAGS", "(\\Seen)")]
 
-    # Same UID should be deduped in-process.
+    # Same UID is below the high-water mark now, and only newer UIDs are searched.
     items_again = channel._fetch_new_messages()
     assert items_again == []
+    assert fake.search_args[-1] == ("UID", "124:*", "UNSEEN")
+
+    # The high-water mark survives a restart.
+    restarted = EmailChannel(_make_config(), MessageBus())
+    assert restarted._fetch_new_messages() == []
 
 
 def test_extract_text_body_falls_back_to_html() -> None:
@@ -279,15 +292,13 @@ def test_fetch_messages_between_dates_uses_imap_since_before_without_mark_seen(m
         def select(self, _mailbox: str):
             return "OK", [b"1"]
 
-        def search(self, *_args):
-            self.search_args = _args
-            return "OK", [b"5"]
-
-        def fetch(self, _imap_id: bytes, _parts: str):
-            return "OK", [(b"5 (UID 999 BODY[] {200})", raw), b")"]
-
-        def store(self, imap_id: bytes, op: str, flags: str):
-            self.store_calls.append((imap_id, op, flags))
+        def uid(self, command: str, *args):
+            if command == "SEARCH":
+                self.search_args = args
+                return "OK", [b"999"]
+            if command == "FETCH":
+                return "OK", [(b"5 (UID 999 BODY[] {200})", raw), b")"]
+            self.store_calls.append(args)
             return "OK", [b""]
 
         def logout(self):
@@ -305,7 +316,166 @@ def test_fetch_messages_between_dates_uses_imap_since_before_without_mark_seen(m
 
     assert len(items) == 1
     assert items[0]["subject"] == "Status"
-    # search(None, "SINCE", "06-Feb-2026", "BEFORE", "07-Feb-2026")
-    assert fake.search_args is not None
-    assert fake.search_args[1:] == ("SINCE", "06-Feb-2026", "BEFORE", "07-Feb-2026")
+    # uid("SEARCH", "SINCE", "06-Feb-2026", "BEFORE", "07-Feb-2026")
+    assert fake.search_args == ("SINCE", "06-Feb-2026", "BEFORE", "07-Feb-2026")
     assert fake.store_calls == []
+
+
+class _PersistentIMAP:
+    """Fake IMAP server session that records connection reuse."""
+
+    def __init__(self, raw_by_uid: dict[int, bytes], idle_lines: list[bytes] | None = None) -> None:
+        self.raw_by_uid = raw_by_uid
+        self.idle_lines = list(idle_lines or [])
+        self.logins = 0
+        self.sent: list[bytes] = []
+        self.uid_commands: list[tuple] = []
+        self.capabilities = ("IMAP4REV1", "IDLE")
+
+    def login(self, _user: str, _pw: str):
+        self.logins += 1
+        return "OK", [b"logged in"]
+
+    def select(self, _mailbox: str):
+        return "OK", [b"1"]
+
+    def capability(self):
+        return "OK", [b"IMAP4rev1 IDLE"]
+
+    def response(self, code: str):
+        return code, [b"1"]
+
+    def uid(self, command: str, *args):
+        self.uid_commands.append((command, *args))
+        if command == "SEARCH":
+            return "OK", [b" ".join(str(uid).encode() for uid in self.raw_by_uid)]
+        if command == "FETCH":
+            fetched: list = []
+            for part in args[0].split(","):
+                lo, _, hi = part.partition(":")
+                for uid in range(int(lo), int(hi or lo) + 1):
+                    fetched += [(f"{uid} (UID {uid} BODY[] {{200}})".encode(), self.raw_by_uid[uid]), b")"]
+            return "OK", fetched
+        return "OK", [b""]
+
+    def send(self, data: bytes):
+        self.sent.append(data)
+
+    def readline(self) -> bytes:
+        return self.idle_lines.pop(0) if self.idle_lines else b""
+
+    def logout(self):
+        return "BYE", [b""]
+
+
+def test_imap_session_reused_across_polls(monkeypatch) -> None:
+    fake = _PersistentIMAP({1: _make_raw_email(subject="First")})
+    connects: list[_PersistentIMAP] = []
+    monkeypatch.setattr(
+        "nanobot.channels.email.imaplib.IMAP4_SSL", lambda _h, _p: connects.append(fake) or fake
+    )
+
+    channel = EmailChannel(_make_config(), MessageBus())
+    assert len(channel._fetch_new_messages()) == 1
+    fake.raw_by_uid[2] = _make_raw_email(subject="Second")
+    assert [m["subject"] for m in channel._fetch_new_messages()] == ["Second"]
+    assert len(connects) == 1 and fake.logins == 1
+
+
+def test_catch_up_fetches_in_uid_batches(monkeypatch) -> None:
+    fake = _PersistentIMAP({uid: _make_raw_email(subject=f"M{uid}") for uid in range(1, 121)})
+    monkeypatch.setattr("nanobot.channels.email.imaplib.IMAP4_SSL", lambda _h, _p: fake)
+
+    channel = EmailChannel(_make_config(), MessageBus())
+    items = channel._fetch_new_messages()
+
+    assert len(items) == 120
+    fetches = [c for c in fake.uid_commands if c[0] == "FETCH"]
+    stores = [c for c in fake.uid_commands if c[0] == "STORE"]
+    assert [c[1] for c in fetches] == ["1:50", "51:100", "101:120"]
+    assert [c[1] for c in stores] == ["1:50", "51:100", "101:120"]
+    assert channel._last_uid == 120
+
+
+def test_uid_validity_change_resets_high_water_mark(tmp_path) -> None:
+    channel = EmailChannel(_make_config(), MessageBus())
+    channel._check_uid_validity(1)
+    channel._last_uid = 500
+    channel._save_uid_state()
+
+    restarted = EmailChannel(_make_config(), MessageBus())
+    restarted._check_uid_validity(1)
+    assert restarted._last_uid == 500
+    restarted._check_uid_validity(2)
+    assert restarted._last_uid == 0
+
+
+def test_uid_set_compresses_ranges() -> None:
+    assert EmailChannel._uid_set([1, 2, 3, 7, 9, 10]) == "1:3,7,9:10"
+    assert EmailChannel._uid_set([4]) == "4"
+
+
+def test_idle_wait_returns_on_new_mail(monkeypatch) -> None:
+    fake = _PersistentIMAP({}, idle_lines=[b"+ idling\r\n", b"* 3 EXISTS\r\n", b"NBIDLE OK IDLE terminated\r\n"])
+    monkeypatch.setattr("nanobot.channels.email.imaplib.IMAP4_SSL", lambda _h, _p: fake)
+    monkeypatch.setattr(EmailChannel, "_imap_readable", staticmethod(lambda _c, _t: True))
+
+    channel = EmailChannel(_make_config(), MessageBus())
+    channel._running = True
+    assert channel._supports_idle() is True
+    assert channel._idle_wait(timeout=5) is True
+    assert fake.sent == [b"NBIDLE IDLE\r\n", b"DONE\r\n"]
+    assert channel._imap is fake
+
+
+@pytest.mark.asyncio
+async def test_smtp_connection_pooled_and_reconnected(monkeypatch) -> None:
+    import smtplib
+
+    class FakeSMTP:
+        def __init__(self) -> None:
+            self.sent: list[EmailMessage] = []
+            self.dropped = False
+            self.rejected = False
+
+        def starttls(self, context=None):
+            return None
+
+        def login(self, _user: str, _pw: str):
+            return None
+
+        def noop(self):
+            if self.dropped:
+                raise smtplib.SMTPServerDisconnected("gone")
+            return 250, b"OK"
+
+        def send_message(self, msg: EmailMessage):
+            if self.rejected:
+                raise smtplib.SMTPDataError(451, b"try later")
+            self.sent.append(msg)
+
+        def quit(self):
+            return None
+
+    instances: list[FakeSMTP] = []
+
+    def _smtp_factory(_host: str, _port: int, timeout: int = 30):
+        instances.append(FakeSMTP())
+        return instances[-1]
+
+    monkeypatch.setattr("nanobot.channels.email.smtplib.SMTP", _smtp_factory)
+    channel = EmailChannel(_make_config(), MessageBus())
+
+    for text in ("one", "two"):
+        await channel.send(OutboundMessage(channel="email", chat_id="alice@example.com", content=text))
+    assert len(instances) == 1 and len(instances[0].sent) == 2
+
+    instances[0].dropped = True
+    await channel.send(OutboundMessage(channel="email", chat_id="alice@example.com", content="three"))
+    assert len(instances) == 2 and len(instances[1].sent) == 1
+
+    # Errors once the transaction started are not retried: the message may have been accepted
+    instances[1].rejected = True
+    with pytest.raises(smtplib.SMTPDataError):
+        channel._smtp_send(EmailMessage())
+    assert len(instances) == 2 and channel._smtp is None
@@ -0,0 +1,75 @@
+"""Test that Feishu sends run off the event loop."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels import feishu
+from nanobot.channels.feishu import FeishuChannel
+from nanobot.config.schema import FeishuConfig
+from nanobot.utils.metrics import LatencyHistogram
+
+pytestmark = pytest.mark.skipif(not feishu.FEISHU_AVAILABLE, reason="lark-oapi not installed")
+
+
+class _Response:
+    code, msg = 0, "ok"
+
+    def success(self) -> bool:
+        return True
+
+
+class _SlowMessageApi:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str]] = []
+
+    def create(self, request):
+        time.sleep(0.2)
+        self.calls.append((threading.current_thread().name, request.request_body.content))
+        return _Response()
+
+
+def make_channel() -> tuple[FeishuChannel, _SlowMessageApi]:
+    channel = FeishuChannel(FeishuConfig(app_id="a", app_secret="b"), MessageBus())
+    api = _SlowMessageApi()
+    channel._client = type("C", (), {"im": type("I", (), {"v1": type("V", (), {"message": api})})})()
+    channel._send_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feishu-send")
+    return channel, api
+
+
+async def test_send_does_not_block_event_loop():
+    channel, api = make_channel()
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await channel.send(OutboundMessage(channel="feishu", chat_id="oc_1", content="| a |\n|---|\n| 1 |"))
+    task.cancel()
+
+    assert ticks >= 5
+    thread, content = api.calls[0]
+    assert thread.startswith("feishu-send")
+    assert '"tag": "table"' in content
+    assert channel.send_latency.count == 1 and channel.send_latency.errors == 0
+    await channel.stop()
+
+
+def test_latency_histogram_snapshot():
+    hist = LatencyHistogram(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.05, 0.5, 3.0):
+        hist.observe(seconds)
+    hist.observe(0.2, error=True)
+    snap = hist.snapshot()
+    assert snap["count"] == 5 and snap["errors"] == 1
+    assert snap["buckets"] == {"<=0.1s": 2, "<=1.0s": 2, ">1.0s": 1}
+    assert snap["p50"] == 1.0 and snap["p95"] == 3.0
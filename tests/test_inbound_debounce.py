@@ -0,0 +1,90 @@
+"""Test coalescing of rapid-fire inbound messages."""
+
+import asyncio
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.base import BaseChannel
+from nanobot.config.schema import TelegramConfig
+
+
+class FakeChannel(BaseChannel):
+    name = "fake"
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def send(self, msg: OutboundMessage) -> None:
+        pass
+
+
+def make_channel(debounce_ms: int) -> tuple[FakeChannel, MessageBus]:
+    bus = MessageBus()
+    return FakeChannel(TelegramConfig(debounce_ms=debounce_ms), bus), bus
+
+
+def drain(bus: MessageBus) -> list:
+    items = []
+    while bus.inbound.qsize():
+        items.append(bus.inbound.get_nowait())
+    return items
+
+
+async def test_burst_merged_into_one_turn():
+    channel, bus = make_channel(debounce_ms=50)
+    await channel._handle_message("u1", "c1", "hey", metadata={"message_id": 1})
+    await asyncio.sleep(0.02)
+    await channel._handle_message("u1", "c1", "quick question", media=["/tmp/a.png"], metadata={"message_id": 2})
+    await channel._handle_message("u1", "c1", "about invoices", metadata={"message_id": 3})
+    assert drain(bus) == []
+
+    await asyncio.sleep(0.1)
+    [msg] = drain(bus)
+    assert msg.content == "hey\nquick question\nabout invoices"
+    assert msg.media == ["/tmp/a.png"]
+    assert msg.metadata == {"message_id": 3, "buffered_count": 3}
+
+
+async def test_command_flushes_pending_and_is_not_delayed():
+    channel, bus = make_channel(debounce_ms=1000)
+    await channel._handle_message("u1", "c1", "some text")
+    await channel._handle_message("u1", "c1", "/new")
+    assert [m.content for m in drain(bus)] == ["some text", "/new"]
+
+
+async def test_senders_buffered_separately():
+    channel, bus = make_channel(debounce_ms=30)
+    await channel._handle_message("u1", "group", "from one")
+    await channel._handle_message("u2", "group", "from two")
+    await asyncio.sleep(0.08)
+    assert sorted((m.sender_id, m.content) for m in drain(bus)) == [("u1", "from one"), ("u2", "from two")]
+
+
+async def test_disabled_by_default():
+    channel, bus = make_channel(debounce_ms=0)
+    await channel._handle_message("u1", "c1", "hello")
+    assert [m.content for m in drain(bus)] == ["hello"]
+
+
+async def test_stopping_channel_delivers_pending_burst():
+    from nanobot.channels.manager import ChannelManager
+    from nanobot.config.schema import Config
+
+    channel, bus = make_channel(debounce_ms=10_000)
+    manager = ChannelManager(Config(), bus)
+    manager.channels["fake"] = channel
+    await channel._handle_message("u1", "c1", "first")
+    await channel._handle_message("u1", "c1", "second")
+    await channel._handle_message("u2", "c1", "other sender")
+    timers = [state.timer for state in channel._debouncer._states.values()]
+
+    await manager.stop_all()
+
+    delivered = drain(bus)
+    assert sorted(m.content for m in delivered) == ["first\nsecond", "other sender"]
+    assert not channel._debouncer._states
+    await asyncio.sleep(0)
+    assert all(timer.cancelled() for timer in timers)
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from mcp import types
+
+from nanobot.agent.tools.mcp import MCPManager, MCPServer
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.config.schema import MCPServerConfig
+
+
+class _FakeSession:
+    def __init__(self, tools: list[str], broken: bool = False, delay: float = 0.0):
+        self.tools = tools
+        self.broken = broken
+        self.delay = delay
+
+    async def send_ping(self):
+        if self.broken:
+            raise ConnectionResetError("server went away")
+
+    async def list_tools(self):
+        return SimpleNamespace(tools=[
+            SimpleNamespace(name=t, description=f"{t} tool", inputSchema={"type": "object", "properties": {}})
+            for t in self.tools
+        ])
+
+    async def call_tool(self, name, arguments=None):
+        if self.broken:
+            raise ConnectionResetError("server went away")
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(content=[types.TextContent(type="text", text=f"{name} ok")])
+
+
+def _fake_open(delays: dict[str, float], opened: list[str]):
+    async def _open(self: MCPServer, stack):
+        opened.append(self.name)
+        await asyncio.sleep(delays.get(self.name, 0))
+        return _FakeSession(["search", "fetch"])
+    return _open
+
+
+SERVERS = {"a": MCPServerConfig(command="a-server"), "b": MCPServerConfig(command="b-server")}
+
+
+async def test_servers_connect_concurrently_and_cache_schemas(tmp_path, monkeypatch) -> None:
+    opened: list[str] = []
+    monkeypatch.setattr(MCPServer, "_open", _fake_open({"a": 0.2, "b": 0.2}, opened))
+    registry = ToolRegistry()
+    manager = MCPManager(cache_dir=tmp_path)
+
+    started = time.monotonic()
+    await manager.start(SERVERS, registry)
+    assert time.monotonic() - started < 0.35
+    assert sorted(registry.tool_names) == ["mcp_a_fetch", "mcp_a_search", "mcp_b_fetch", "mcp_b_search"]
+    assert len(list(tmp_path.glob("*.json"))) == 2
+    await manager.close()
+
+
+async def test_cached_schemas_register_at_once_and_connect_on_first_call(tmp_path, monkeypatch) -> None:
+    opened: list[str] = []
+    monkeypatch.setattr(MCPServer, "_open", _fake_open({}, opened))
+    warm = MCPManager(cache_dir=tmp_path)
+    await warm.start(SERVERS, ToolRegistry())
+    await warm.close()
+    opened.clear()
+
+    registry = ToolRegistry()
+    manager = MCPManager(cache_dir=tmp_path)
+    await manager.start(SERVERS, registry)
+    assert opened == []
+    assert "mcp_b_search" in registry
+
+    assert await registry.execute("mcp_b_search", {}) == "search ok"
+    assert opened == ["b"]
+    await manager.close()
+
+
+async def test_hanging_server_does_not_block_startup(tmp_path, monkeypatch) -> None:
+    opened: list[str] = []
+    monkeypatch.setattr(MCPServer, "_open", _fake_open({"a": 60}, opened))
+    registry = ToolRegistry()
+    manager = MCPManager(cache_dir=tmp_path)
+    servers = {**SERVERS, "a": MCPServerConfig(command="a-server", connect_timeout=0.1)}
+
+    started = time.monotonic()
+    await manager.start(servers, registry)
+    assert time.monotonic() - started < 1
+    assert registry.tool_names == ["mcp_b_search", "mcp_b_fetch"]
+    assert not manager.servers["a"].connected
+    await manager.close()
+
+
+def _sessions_open(sessions: list[_FakeSession], opened: list[str]):
+    async def _open(self: MCPServer, stack):
+        opened.append(self.name)
+        return sessions.pop(0) if len(sessions) > 1 else sessions[0]
+    return _open
+
+
+async def test_broken_session_reconnects_and_retries_idempotent_tools(tmp_path, monkeypatch) -> None:
+    opened: list[str] = []
+    sessions = [_FakeSession(["search", "fetch"], broken=True), _FakeSession(["search", "fetch"])]
+    monkeypatch.setattr(MCPServer, "_open", _sessions_open(sessions, opened))
+    monkeypatch.setattr("nanobot.agent.tools.mcp.RECONNECT_MIN_S", 0.01)
+    registry = ToolRegistry()
+    manager = MCPManager(cache_dir=tmp_path)
+    await manager.start({"a": MCPServerConfig(command="a-server", idempotent_tools=["search"])}, registry)
+
+    assert await registry.execute("mcp_a_search", {}) == "search ok"
+    assert opened == ["a", "a"]
+    stats = manager.stats()["a"]
+    assert (stats["reconnects"], stats["latency"]["count"], stats["failure_rate"]) == (1, 2, 0.5)
+    await manager.close()
+
+
+async def test_failed_ping_triggers_reconnect_and_slow_calls_time_out(tmp_path, monkeypatch) -> None:
+    opened: list[str] = []
+    sessions = [_FakeSession(["search"], broken=True), _FakeSession(["search"], delay=1.0)]
+    monkeypatch.setattr(MCPServer, "_open", _sessions_open(sessions, opened))
+    monkeypatch.setattr("nanobot.agent.tools.mcp.RECONNECT_MIN_S", 0.01)
+    registry = ToolRegistry()
+    manager = MCPManager(cache_dir=tmp_path)
+    cfg = MCPServerConfig(command="a-server", health_interval=0.02, tool_timeout=0.05)
+    await manager.start({"a": cfg}, registry)
+
+    await asyncio.sleep(0.2)
+    assert opened == ["a", "a"]
+    assert manager.servers["a"].connected
+
+    result = await registry.execute("mcp_a_search", {})
+    assert "timed out" in result
+    assert manager.servers["a"].connected  # A slow call is not a broken connection
+    await manager.close()
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import time
+
+from nanobot.media.store import MediaStore, guess_extension
+
+
+def test_put_bytes_dedupes_by_content(tmp_path) -> None:
+    store = MediaStore(root=tmp_path)
+
+    a = store.put_bytes(b"same photo", ".JPG")
+    b = store.put_bytes(b"same photo", "jpg")
+    c = store.put_bytes(b"other photo", ".jpg")
+
+    assert a == b != c
+    assert a.suffix == ".jpg"
+    assert a.parent.name == a.stem[:2]
+    assert len([p for p in tmp_path.rglob("*") if p.is_file()]) == 2
+
+
+async def test_fetch_downloads_each_source_once(tmp_path) -> None:
+    store = MediaStore(root=tmp_path, concurrency=2)
+    calls = 0
+
+    async def loader() -> bytes:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b"voice"
+
+    first, second = await asyncio.gather(
+        store.fetch("telegram:abc", loader, ".ogg"),
+        store.fetch("telegram:abc", loader, ".ogg"),
+    )
+    third = await store.fetch("telegram:abc", loader, ".ogg")
+
+    assert first == second == third
+    assert first.read_bytes() == b"voice"
+    assert calls == 1
+
+
+async def test_fetch_all_runs_concurrently_and_reports_failures(tmp_path) -> None:
+    store = MediaStore(root=tmp_path, concurrency=4)
+    active = peak = 0
+
+    def make_loader(data: bytes):
+        async def loader() -> bytes:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            if not data:
+                raise RuntimeError("boom")
+            return data
+        return loader
+
+    results = await store.fetch_all([
+        (f"k{i}", make_loader(f"file {i}".encode() if i != 2 else b""), ".bin")
+        for i in range(4)
+    ])
+
+    assert peak > 1
+    assert isinstance(results[2], RuntimeError)
+    assert [r.read_bytes() for i, r in enumerate(results) if i != 2] == [b"file 0", b"file 1", b"file 3"]
+
+
+def test_eviction_removes_least_recently_used(tmp_path) -> None:
+    store = MediaStore(root=tmp_path, max_bytes=250)
+    old = store.put_bytes(b"a" * 100, ".bin")
+    recent = store.put_bytes(b"b" * 100, ".bin")
+    past = time.time() - 100
+    os.utime(old, (past, past))
+
+    newest = store.put_bytes(b"c" * 100, ".bin")
+
+    assert not old.exists()
+    assert recent.exists() and newest.exists()
+
+
+def test_image_data_url_is_cached(tmp_path, monkeypatch) -> None:
+    store = MediaStore(root=tmp_path)
+    path = store.put_bytes(b"GIF89a fake", ".gif")
+    prepared = []
+    original = store._prepare_image
+    monkeypatch.setattr(store, "_prepare_image", lambda p, mime: prepared.append(p) or original(p, mime))
+
+    url = store.image_data_url(path)
+
+    assert url == "data:image/gif;base64,R0lGODlhIGZha2U="
+    assert store.image_data_url(str(path)) == url
+    assert prepared == [path]
+    assert store.image_data_url(store.put_bytes(b"text", ".txt")) is None
+    assert store.image_data_url(tmp_path / "missing.png") is None
+
+
+
+async def test_data_url_cache_is_bounded_by_bytes(tmp_path, monkeypatch) -> None:
+    from nanobot.media import store as store_module
+
+    monkeypatch.setattr(store_module, "_DATA_URL_CACHE_BYTES", 300)
+    store = MediaStore(root=tmp_path)
+    paths = [store.put_bytes(b"GIF89a" + bytes([i]) * 30, ".gif") for i in range(6)]  # ~70-char URLs
+
+    urls = await store.image_data_urls([str(p) for p in paths] + [str(tmp_path / "notes.txt")])
+    assert len(urls) == 6 and all(url.startswith("data:image/gif;base64,") for url in urls)
+
+    for path in paths:
+        store.image_data_url(path)
+    assert list(store._data_urls) == paths[2:]
+    assert store._data_url_bytes == sum(len(url) for _, url in store._data_urls.values()) <= 300
+
+def test_guess_extension() -> None:
+    assert guess_extension("image/jpeg") == ".jpg"
+    assert guess_extension("audio/ogg; codecs=opus") == ".ogg"
+    assert guess_extension(None, "report.PDF") == ".pdf"
+    assert guess_extension(None, "no-extension") == ""
+
+
+def test_adopt_accepts_only_files_stored_by_content(tmp_path) -> None:
+    store = MediaStore(root=tmp_path / "media")
+    stored = store.put_bytes(b"bridge photo", ".jpg")
+    stray = tmp_path / "photo.jpg"
+    stray.write_bytes(b"bridge photo")
+
+    assert store.adopt(str(stored)) == stored
+    assert store.adopt(stray) is None
+    assert store.adopt(stored.with_name("0" * 64 + ".jpg")) is None
+
+
+async def test_whatsapp_media_is_handed_over_by_path(tmp_path, monkeypatch) -> None:
+    from nanobot.channels import whatsapp
+
+    store = MediaStore(root=tmp_path / "media")
+    monkeypatch.setattr(whatsapp, "get_media_store", lambda: store)
+    voice = store.put_bytes(b"voice", ".ogg")
+
+    paths, audio = await whatsapp.WhatsAppChannel._store_media([
+        {"mimetype": "audio/ogg", "path": str(voice), "size": 5},
+        {"mimetype": "image/jpeg", "path": str(tmp_path / "elsewhere.jpg")},
+        {"mimetype": "image/png", "data": "aW1hZ2U="},  # Older bridges inline base64
+    ])
+
+    assert paths[0] == audio[0] == str(voice)
+    assert len(paths) == 2 and paths[1].endswith(".png")
@@ -0,0 +1,113 @@
+"""Test the background memory consolidation worker."""
+
+import asyncio
+import json
+
+import pytest
+
+from nanobot.agent.memory import MemoryConsolidator
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.session.manager import Session, SessionManager
+
+
+class SlowProvider(LLMProvider):
+    """Fake provider that counts calls and blocks until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls: list[str | None] = []
+        self.release = asyncio.Event()
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self.calls.append(model)
+        await self.release.wait()
+        return LLMResponse(content=json.dumps({
+            "history_entry": f"[2026-01-01 00:00] call {len(self.calls)}",
+            "memory_update": "facts",
+        }))
+
+    def get_default_model(self) -> str:
+        return "main-model"
+
+
+@pytest.fixture
+async def consolidator(tmp_path):
+    sessions = SessionManager(tmp_path)
+    sessions.sessions_dir = tmp_path
+    consolidator = MemoryConsolidator(
+        provider=SlowProvider(),
+        workspace=tmp_path,
+        sessions=sessions,
+        memory_window=10,
+        model="cheap-model",
+    )
+    yield consolidator
+    await consolidator.stop()
+
+
+def make_session(count: int) -> Session:
+    session = Session(key="test:consolidate")
+    for i in range(count):
+        session.add_message("user", f"msg{i}")
+    return session
+
+
+async def test_below_window_not_scheduled(consolidator):
+    consolidator.schedule(make_session(9))
+    assert consolidator._worker is None
+
+
+async def test_repeated_schedules_are_coalesced(consolidator):
+    session = make_session(12)
+    for _ in range(5):
+        consolidator.schedule(session)
+        session.add_message("user", "more")
+        await asyncio.sleep(0)
+
+    consolidator.provider.release.set()
+    await consolidator.join()
+
+    # One call for the first request, the rest coalesce and find nothing new to do
+    assert consolidator.provider.calls == ["cheap-model"]
+    assert session.last_consolidated == session.total_messages - consolidator.keep_count - 4
+
+
+async def test_archive_writes_memory_files(consolidator, tmp_path):
+    consolidator.archive("test:consolidate", make_session(3).messages)
+    consolidator.provider.release.set()
+    await consolidator.join()
+
+    assert len(consolidator.provider.calls) == 1
+    history = (tmp_path / "memory" / "HISTORY.md").read_text()
+    assert "call 1" in history
+    assert (tmp_path / "memory" / "MEMORY.md").read_text() == "facts"
+    assert not (tmp_path / "memory" / "MEMORY.md.tmp").exists()
+
+
+async def test_cleared_session_keeps_offset(consolidator):
+    session = make_session(12)
+    consolidator.schedule(session)
+    await asyncio.sleep(0)
+    session.clear()
+
+    consolidator.provider.release.set()
+    await consolidator.join()
+    assert session.last_consolidated == 0
+
+
+async def test_shutdown_finishes_queued_work_then_stops(consolidator, tmp_path):
+    consolidator.archive("test:consolidate", make_session(3).messages)
+    asyncio.get_running_loop().call_later(0.05, consolidator.provider.release.set)
+
+    await consolidator.shutdown(timeout=5)
+
+    assert "call 1" in (tmp_path / "memory" / "HISTORY.md").read_text()
+    assert consolidator._worker is None
+
+
+async def test_shutdown_gives_up_after_timeout(consolidator):
+    consolidator.archive("test:consolidate", make_session(3).messages)
+    consolidator.archive("test:other", make_session(2).messages)
+
+    await asyncio.wait_for(consolidator.shutdown(timeout=0.05), 1)  # Provider never answers
+    assert consolidator._worker is None
@@ -0,0 +1,119 @@
+"""Test the full-text memory index and search_memory tool."""
+
+import pytest
+
+from nanobot.agent.memory import MemoryStore
+from nanobot.agent.memory_index import MemoryIndex
+from nanobot.agent.tools.memory import SearchMemoryTool
+from nanobot.session.manager import Session, SessionManager
+
+
+@pytest.fixture
+def sessions(tmp_path) -> SessionManager:
+    manager = SessionManager(tmp_path)
+    manager.sessions_dir = tmp_path / "sessions"
+    manager.sessions_dir.mkdir()
+    return manager
+
+
+@pytest.fixture
+def index(tmp_path, sessions) -> MemoryIndex:
+    return MemoryIndex(tmp_path, sessions_dir=sessions.sessions_dir)
+
+
+def test_history_search_ranked_with_snippets(tmp_path, index):
+    store = MemoryStore(tmp_path)
+    store.append_history("[2026-01-05 10:00] User planned a trip to Lisbon in May.")
+    store.append_history("[2026-02-01 09:30] User asked about Python packaging.")
+    store.append_history("[2026-03-01 08:00] User booked Lisbon flights; Lisbon hotel pending.")
+
+    hits = index.search("lisbon")
+    assert [h.ts for h in hits] == ["2026-03-01 08:00", "2026-01-05 10:00"]
+    assert "**Lisbon**" in hits[0].snippet
+
+
+def test_history_indexed_incrementally(tmp_path, index):
+    store = MemoryStore(tmp_path)
+    store.append_history("[2026-01-01 00:00] first entry about cats")
+    assert index.sync() == 1
+    assert index.sync() == 0
+
+    store.append_history("[2026-01-02 00:00] second entry about dogs")
+    assert index.sync() == 1
+    assert len(index.search("cats")) == 1
+
+
+def test_history_rewrite_reindexes(tmp_path, index):
+    store = MemoryStore(tmp_path)
+    store.append_history("[2026-01-01 00:00] old entry about cats")
+    index.sync()
+
+    store.history_file.write_text("[2026-01-03 00:00] replaced entry about owls\n\n")
+    assert index.search("cats") == []
+    assert len(index.search("owls")) == 1
+
+
+def test_date_filters(tmp_path, index):
+    store = MemoryStore(tmp_path)
+    store.append_history("[2026-01-05 10:00] meeting notes")
+    store.append_history("[2026-02-05 10:00] meeting notes again")
+
+    assert len(index.search("meeting", since="2026-02-01")) == 1
+    assert len(index.search("meeting", until="2026-01-31")) == 1
+    assert len(index.search("meeting", since="2026-01-01", until="2026-12-31")) == 2
+
+
+def test_session_messages_indexed_across_saves(index, sessions):
+    session = Session(key="telegram:42")
+    session.add_message("user", "remind me about the dentist")
+    session.add_message("assistant", "Sure, dentist noted")
+    sessions.save(session)
+
+    hits = index.search("dentist", source="sessions")
+    assert len(hits) == 2
+    assert hits[0].source == "session:telegram:42"
+
+    session.add_message("user", "also the plumber")
+    sessions.save(session)
+    assert index.sync() == 1
+    assert len(index.search("dentist")) == 2
+
+
+def test_cleared_session_reindexed(index, sessions):
+    session = Session(key="cli:direct")
+    session.add_message("user", "talk about volcanoes")
+    sessions.save(session)
+    index.sync()
+
+    session.clear()
+    session.add_message("user", "now glaciers")
+    session.add_message("user", "and more glaciers")
+    sessions.save(session)
+
+    assert index.search("volcanoes") == []
+    assert len(index.search("glaciers")) == 2
+
+
+def test_any_word_fallback(tmp_path, index):
+    MemoryStore(tmp_path).append_history("[2026-01-01 00:00] bought a red bicycle")
+    assert len(index.search("red car")) == 1
+
+
+async def test_search_memory_tool(tmp_path, index):
+    MemoryStore(tmp_path).append_history("[2026-01-01 00:00] the wifi password is in the drawer")
+    tool = SearchMemoryTool(index)
+
+    result = await tool.execute(query="wifi password")
+    assert "HISTORY.md" in result
+    assert "2026-01-01 00:00" in result
+    assert "No memory entries" in await tool.execute(query="nonexistent")
+
+
+def test_session_source_uses_key_from_metadata(index, sessions):
+    session = Session(key="slack:C01_general")
+    session.add_message("user", "the quarterly roadmap")
+    sessions.save(session)
+
+    hits = index.search("roadmap", source="sessions")
+    assert [h.source for h in hits] == ["session:slack:C01_general"]
+    assert sessions.list_sessions()[0]["key"] == "slack:C01_general"
@@ -0,0 +1,95 @@
+"""Test relevance-based memory retrieval."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from nanobot.agent.memory import MemoryStore
+from nanobot.agent.memory_retrieval import HashingEmbedder, MemoryRetriever, chunk_markdown
+
+
+def write_memory(store: MemoryStore, sections: dict[str, str]) -> None:
+    store.write_long_term("\n\n".join(f"## {title}\n{body}" for title, body in sections.items()))
+
+
+def test_chunk_markdown_keeps_headings():
+    chunks = chunk_markdown("## Pets\nHas a cat named Miso.\n\n## Work\nBackend engineer.", max_chars=40)
+    assert chunks == ["[Pets] Has a cat named Miso.", "[Work] Backend engineer."]
+
+
+def test_hashing_embedder_normalized_and_similar():
+    emb = HashingEmbedder(dim=256)
+    vectors = emb.embed(["the cat sat", "a cat sat down", "quarterly tax report"])
+    assert vectors.shape == (3, 256)
+    assert abs(float((vectors[0] ** 2).sum()) - 1.0) < 1e-5
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+
+def test_retrieves_relevant_chunks(tmp_path):
+    store = MemoryStore(tmp_path)
+    write_memory(store, {
+        "Pets": "User has a cat named Miso who likes tuna.",
+        "Work": "User works as a backend engineer on payment systems.",
+        "Travel": "User is planning a trip to Lisbon in May.",
+    })
+    store.append_history("[2026-01-01 10:00] Discussed Lisbon hotel options near the river.")
+
+    retriever = MemoryRetriever(tmp_path, chunk_chars=60)
+    retriever.sync()
+    hits = retriever.search("where am I going in Lisbon", top_k=2)
+    assert {source for source, _, _ in hits} == {"memory", "history"}
+    assert all("Lisbon" in text for _, text, _ in hits)
+
+
+def test_history_embedded_incrementally(tmp_path):
+    store = MemoryStore(tmp_path)
+    store.append_history("[2026-01-01 10:00] first entry")
+    retriever = MemoryRetriever(tmp_path)
+    retriever.sync()
+    assert retriever._history_vectors.rows == 1
+
+    store.append_history("[2026-01-02 10:00] second entry about bicycles")
+    retriever.sync()
+    assert retriever._history_vectors.rows == 2
+    assert retriever.search("bicycles", top_k=1)[0][1].endswith("bicycles")
+
+    # A fresh instance reuses the vectors on disk
+    assert MemoryRetriever(tmp_path)._history_vectors.rows == 2
+
+
+def test_memory_context_bounded(tmp_path):
+    retriever = MemoryRetriever(tmp_path, chunk_chars=200)
+    store = MemoryStore(tmp_path, retriever=retriever, max_memory_chars=500, top_k=3)
+    write_memory(store, {f"Topic {i}": f"Fact number {i} about subject{i}." for i in range(200)})
+    retriever.sync()
+
+    context = store.get_memory_context("tell me about subject42")
+    assert context.startswith("## Relevant Memory")
+    assert "subject42" in context
+    assert len(context) < 1000
+
+
+def test_small_memory_injected_whole(tmp_path):
+    store = MemoryStore(tmp_path, retriever=MemoryRetriever(tmp_path), max_memory_chars=500)
+    store.write_long_term("User likes tea.")
+    assert store.get_memory_context("anything") == "## Long-term Memory\nUser likes tea."
+
+
+async def test_search_never_indexes_on_the_event_loop(tmp_path, monkeypatch):
+    retriever = MemoryRetriever(tmp_path, chunk_chars=200)
+    store = MemoryStore(tmp_path, retriever=retriever, max_memory_chars=100)
+    write_memory(store, {f"Topic {i}": f"Fact number {i} about subject{i}." for i in range(20)})
+
+    # Nothing indexed yet: the whole memory is injected while indexing runs in a thread
+    assert store.get_memory_context("subject7").startswith("## Long-term Memory")
+    await retriever.wait_synced()
+    assert "subject7" in store.get_memory_context("subject7")
+
+    store.append_history("[2026-01-02 10:00] Talked about bicycles.")
+    calls = []
+    monkeypatch.setattr(retriever, "sync", lambda: calls.append("sync"))
+    hits = retriever.search("bicycles")
+    assert not any("bicycles" in text for _, text, _ in hits)  # Not indexed yet
+    assert calls == []  # Sync is scheduled, not run inline
+    await retriever.wait_synced()
+    assert calls == ["sync"]
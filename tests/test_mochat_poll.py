@@ -0,0 +1,70 @@
+import asyncio
+
+from nanobot.channels.mochat_poll import AdaptivePoller
+
+
+async def test_pool_bounds_concurrency_and_uses_short_polls() -> None:
+    active = peak = 0
+    calls: list[tuple[str, bool]] = []
+
+    async def poll(kind: str, target_id: str, long_poll: bool) -> bool:
+        nonlocal active, peak
+        calls.append((target_id, long_poll))
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return False
+
+    poller = AdaptivePoller(poll, workers=3, min_interval=0.05, max_interval=1.0)
+    poller.set_targets({("session", f"s{i}") for i in range(20)})
+    poller.start()
+    await asyncio.sleep(0.2)
+    await poller.stop()
+
+    assert peak == 3
+    assert {target for target, _ in calls} == {f"s{i}" for i in range(20)}
+    assert not any(long_poll for _, long_poll in calls)
+
+
+async def test_intervals_back_off_when_idle_and_reset_on_activity() -> None:
+    results = {"busy": True, "quiet": False}
+
+    async def poll(kind: str, target_id: str, long_poll: bool) -> bool:
+        return results[target_id]
+
+    poller = AdaptivePoller(poll, workers=1, min_interval=0.01, max_interval=0.04)
+    poller.set_targets({("panel", "busy"), ("panel", "quiet")})
+    poller.start()
+    await asyncio.sleep(0.2)
+
+    assert poller.interval(("panel", "busy")) == 0.01
+    assert poller.interval(("panel", "quiet")) == 0.04
+
+    results["quiet"] = True
+    await asyncio.sleep(0.1)
+    assert poller.interval(("panel", "quiet")) == 0.01
+    await poller.stop()
+
+
+async def test_long_polls_repeat_immediately_and_removed_targets_stop() -> None:
+    polled: list[str] = []
+
+    async def poll(kind: str, target_id: str, long_poll: bool) -> None:
+        assert long_poll
+        polled.append(target_id)
+        await asyncio.sleep(0.01)
+        return None
+
+    poller = AdaptivePoller(poll, workers=2, min_interval=10.0)
+    poller.set_targets({("session", "a"), ("session", "b")})
+    poller.start()
+    await asyncio.sleep(0.1)
+    assert polled.count("a") > 3
+
+    poller.set_targets({("session", "a")})
+    await asyncio.sleep(0.02)
+    before = polled.count("b")
+    await asyncio.sleep(0.05)
+    assert polled.count("b") == before
+    await poller.stop()
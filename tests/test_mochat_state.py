@@ -0,0 +1,108 @@
+import json
+
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.mochat import MochatChannel
+from nanobot.channels.mochat_state import CursorJournal, SeenMessages
+from nanobot.config.schema import MochatConfig
+
+
+def test_seen_messages_is_one_bounded_window_for_all_targets() -> None:
+    seen = SeenMessages(capacity=3)
+
+    assert seen.check_and_add("session:a", "m1") is False
+    assert seen.check_and_add("session:a", "m1") is True
+    assert seen.check_and_add("session:b", "m1") is False  # Same id, different target
+    seen.check_and_add("panel:c", "m2")
+    seen.check_and_add("panel:c", "m3")
+
+    assert len(seen) == 3
+    assert seen.check_and_add("session:a", "m1") is False  # Evicted as least recently used
+
+
+def test_cursor_journal_appends_changes_and_compacts(tmp_path) -> None:
+    snapshot, journal = tmp_path / "session_cursors.json", tmp_path / "session_cursors.journal"
+    snapshot.write_text(json.dumps({"schemaVersion": 1, "cursors": {"s1": 5, "s2": 7}}))
+    store = CursorJournal(snapshot, journal, compact_min=4, compact_ratio=1)
+
+    cursors = store.load()
+    assert cursors == {"s1": 5, "s2": 7}
+
+    cursors["s1"] = 9
+    store.append({"s1": 9}, cursors)
+    with open(journal, "a") as f:
+        f.write('{"s": "s2", "c"')  # Torn write from a crash
+    assert json.loads(snapshot.read_text())["cursors"] == {"s1": 5, "s2": 7}
+    store = CursorJournal(snapshot, journal, compact_min=3, compact_ratio=1)
+    assert store.load() == {"s1": 9, "s2": 7}
+
+    cursors.update(s2=8, s3=1)
+    store.append({"s2": 8, "s3": 1}, cursors)  # Exceeds compact_min: folded into the snapshot
+    assert not journal.exists()
+    assert json.loads(snapshot.read_text())["cursors"] == {"s1": 9, "s2": 8, "s3": 1}
+    assert CursorJournal(snapshot, journal).load() == {"s1": 9, "s2": 8, "s3": 1}
+
+
+async def test_watch_payload_skips_events_below_cursor(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("nanobot.channels.mochat.get_data_path", lambda: tmp_path)
+    channel = MochatChannel(MochatConfig(claw_token="t"), MessageBus())
+    channel._session_cursor["s1"] = 10
+    processed: list[int] = []
+
+    async def record(target_id, event, target_kind) -> None:
+        processed.append(event["seq"])
+
+    monkeypatch.setattr(channel, "_process_inbound_event", record)
+    events = [{"seq": seq, "type": "message.add", "payload": {}} for seq in (9, 10, 11, 12)]
+    await channel._handle_watch_payload({"sessionId": "s1", "cursor": 12, "events": events}, "session")
+
+    assert processed == [11, 12]
+    assert channel._dirty_cursors == {"s1": 12}
+    await channel._save_session_cursors()
+    assert CursorJournal(tmp_path / "mochat" / "session_cursors.json",
+                         tmp_path / "mochat" / "session_cursors.journal").load() == {"s1": 12}
+    channel._cursor_save_task.cancel()
+
+
+async def test_panel_watermarks_stop_replays_beyond_the_lru(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("nanobot.channels.mochat.get_data_path", lambda: tmp_path)
+    panels = [f"p{i}" for i in range(10)]
+    history = {
+        p: [{"messageId": f"{p}-m{j}", "author": "u1", "content": f"hello {j}",
+             "createdAt": f"2026-01-01T10:00:{j:02d}Z"} for j in range(10)]
+        for p in panels
+    }
+
+    def make_channel() -> tuple[MochatChannel, list[str]]:
+        channel = MochatChannel(MochatConfig(claw_token="t", reply_delay_mode="off"), MessageBus())
+        channel._seen = SeenMessages(capacity=50)  # Fewer than one cycle's 100 messages
+        channel._panel_watermark.update(channel._watermark_journal.load())
+        dispatched: list[str] = []
+
+        async def post_json(path, payload):
+            return {"messages": list(reversed(history[payload["panelId"]])), "groupId": ""}
+
+        async def dispatch(target_id, target_kind, entries, was_mentioned) -> None:
+            dispatched.extend(e.message_id for e in entries)
+
+        monkeypatch.setattr(channel, "_post_json", post_json)
+        monkeypatch.setattr(channel, "_dispatch_entries", dispatch)
+        return channel, dispatched
+
+    channel, dispatched = make_channel()
+    for _ in range(2):
+        for p in panels:
+            await channel._poll_panel(p)
+    assert len(dispatched) == 100  # Second cycle replayed nothing
+
+    history["p3"].append({"messageId": "p3-new", "author": "u1", "content": "new",
+                          "createdAt": "2026-01-01T10:01:00Z"})
+    await channel._poll_panel("p3")
+    assert dispatched[-1] == "p3-new" and len(dispatched) == 101
+    channel._cursor_save_task.cancel()
+    await channel._save_panel_watermarks()
+
+    # Watermarks survive a restart, when the LRU starts out empty
+    restarted, replayed = make_channel()
+    for p in panels:
+        await restarted._poll_panel(p)
+    assert replayed == []
@@ -0,0 +1,158 @@
+"""Test tail-only session loading and on-demand paging of older messages."""
+
+import pytest
+
+from nanobot.session.manager import Session, SessionManager
+
+
+@pytest.fixture
+def manager(tmp_path) -> SessionManager:
+    manager = SessionManager(tmp_path)
+    manager.sessions_dir = tmp_path
+    return manager
+
+
+def save_session(manager: SessionManager, key: str, count: int, last_consolidated: int = 0) -> None:
+    session = Session(key=key)
+    for i in range(count):
+        session.add_message("user", f"msg{i}")
+    session.last_consolidated = last_consolidated
+    manager.save(session)
+    manager.invalidate(key)
+
+
+class TestTailLoading:
+    def test_loads_only_tail(self, manager):
+        save_session(manager, "test:tail", 1000, last_consolidated=900)
+
+        session = manager.get_or_create("test:tail", tail=50)
+        assert len(session.messages) == 50
+        assert session.offset == 950
+        assert session.total_messages == 1000
+        assert session.last_consolidated == 900
+        assert session.messages[0]["content"] == "msg950"
+        assert session.get_history(max_messages=10)[-1]["content"] == "msg999"
+
+    def test_small_session_loads_fully(self, manager):
+        save_session(manager, "test:small", 10)
+
+        session = manager.get_or_create("test:small", tail=50)
+        assert len(session.messages) == 10
+        assert session.offset == 0
+
+    def test_legacy_file_without_count_loads_fully(self, manager):
+        path = manager._get_session_path("test:legacy")
+        path.write_text(
+            '{"_type": "metadata", "created_at": "2026-01-01T00:00:00", "last_consolidated": 3}\n'
+            + "".join(f'{{"role": "user", "content": "msg{i}"}}\n' for i in range(100))
+        )
+
+        session = manager.get_or_create("test:legacy", tail=20)
+        assert len(session.messages) == 100
+        assert session.offset == 0
+        assert session.last_consolidated == 3
+
+    def test_tail_spanning_multiple_blocks(self, manager):
+        save_session(manager, "test:blocks", 300)
+        path = manager._get_session_path("test:blocks")
+
+        with open(path, "rb") as f:
+            f.readline()
+            lines = manager._read_tail_lines(f, f.tell(), 120, block_size=64)
+        assert len(lines) == 120
+        assert b'"msg180"' in lines[0]
+
+
+class TestPagingAndSave:
+    def test_load_messages_pages_in_older(self, manager):
+        save_session(manager, "test:page", 200)
+        session = manager.get_or_create("test:page", tail=20)
+
+        older = manager.load_messages(session, 10, 190)
+        assert len(older) == 180
+        assert older[0]["content"] == "msg10"
+        assert older[-1]["content"] == "msg189"
+        assert len(session.messages) == 20
+
+    def test_load_messages_all(self, manager):
+        save_session(manager, "test:all", 60)
+        session = manager.get_or_create("test:all", tail=10)
+
+        messages = manager.load_messages(session)
+        assert [m["content"] for m in messages] == [f"msg{i}" for i in range(60)]
+
+    def test_save_preserves_unloaded_messages(self, manager):
+        save_session(manager, "test:save", 100)
+        session = manager.get_or_create("test:save", tail=10)
+        session.add_message("user", "msg100")
+        manager.save(session)
+        manager.invalidate("test:save")
+
+        reloaded = manager.get_or_create("test:save")
+        assert reloaded.total_messages == 101
+        assert reloaded.messages[0]["content"] == "msg0"
+        assert reloaded.messages[-1]["content"] == "msg100"
+
+    def test_clear_drops_unloaded_messages(self, manager):
+        save_session(manager, "test:clear", 100)
+        session = manager.get_or_create("test:clear", tail=10)
+        session.clear()
+        manager.save(session)
+        manager.invalidate("test:clear")
+
+        reloaded = manager.get_or_create("test:clear")
+        assert reloaded.total_messages == 0
+
+
+class TestAppendSave:
+    def test_save_appends_instead_of_rewriting(self, manager):
+        save_session(manager, "test:append", 100)
+        path = manager._get_session_path("test:append")
+        before = path.read_bytes()
+        inode = path.stat().st_ino
+
+        session = manager.get_or_create("test:append", tail=10)
+        session.add_message("assistant", "msg100")
+        session.metadata["topic"] = "x" * 100  # Still fits the padded metadata line
+        manager.save(session)
+
+        after = path.read_bytes()
+        assert path.stat().st_ino == inode
+        header = before.index(b"\n") + 1
+        assert after[header:len(before)] == before[header:]
+        assert after.index(b"\n") + 1 == header
+
+        manager.invalidate("test:append")
+        reloaded = manager.get_or_create("test:append", tail=5)
+        assert reloaded.total_messages == 101
+        assert reloaded.metadata["topic"] == "x" * 100
+        assert reloaded.messages[-1]["content"] == "msg100"
+
+    def test_metadata_outgrowing_its_line_rewrites(self, manager):
+        save_session(manager, "test:grow", 20)
+        session = manager.get_or_create("test:grow", tail=5)
+        session.metadata["notes"] = "y" * 2000
+        session.add_message("user", "msg20")
+        manager.save(session)
+        manager.invalidate("test:grow")
+
+        reloaded = manager.get_or_create("test:grow")
+        assert [m["content"] for m in reloaded.messages] == [f"msg{i}" for i in range(21)]
+        assert reloaded.metadata["notes"] == "y" * 2000
+
+    def test_interrupted_append_is_recounted(self, manager):
+        save_session(manager, "test:crash", 50)
+        path = manager._get_session_path("test:crash")
+        with open(path, "ab") as f:  # Messages written, metadata line never updated
+            f.write(b'{"role": "user", "content": "msg50"}\n')
+
+        session = manager.get_or_create("test:crash", tail=10)
+        assert session.total_messages == 51
+        assert session.messages[-1]["content"] == "msg50"
+
+        session.add_message("user", "msg51")
+        manager.save(session)
+        manager.invalidate("test:crash")
+        reloaded = manager.get_or_create("test:crash", tail=10)
+        assert reloaded.offset == 42
+        assert reloaded.messages[-1]["content"] == "msg51"
@@ -0,0 +1,63 @@
+"""Test the compact SessionMessage record and the cached history view."""
+
+from nanobot.session.manager import Session
+from nanobot.session.message import SessionMessage
+
+
+class TestSessionMessage:
+    def test_roundtrip_dict(self):
+        data = {
+            "role": "assistant",
+            "content": "hi",
+            "timestamp": "2026-01-02T03:04:05",
+            "tools_used": ["read_file"],
+            "custom": 1,
+        }
+        msg = SessionMessage.from_dict(data)
+        assert msg.tools_used == ("read_file",)
+        assert msg.to_dict() == data
+        assert msg == data
+
+    def test_mapping_access(self):
+        msg = SessionMessage("user", "hello")
+        assert msg["role"] == "user"
+        assert msg.get("content") == "hello"
+        assert msg.get("tools_used") is None
+        assert msg.get("timestamp", "?")[:4].isdigit()
+
+    def test_roles_are_interned(self):
+        a = SessionMessage("".join(["assis", "tant"]), "x")
+        b = SessionMessage("assistant", "y")
+        assert a.role is b.role
+
+
+class TestHistoryView:
+    def test_history_dicts_reused_between_turns(self):
+        session = Session(key="test:view")
+        for i in range(20):
+            session.add_message("user", f"msg{i}")
+
+        first = session.get_history(max_messages=10)
+        session.add_message("assistant", "resp")
+        second = session.get_history(max_messages=10)
+
+        assert second[-1] == {"role": "assistant", "content": "resp"}
+        assert second[0] is first[1]
+
+    def test_history_rebuilt_after_clear(self):
+        session = Session(key="test:view_clear")
+        for i in range(5):
+            session.add_message("user", f"msg{i}")
+        session.get_history(max_messages=10)
+
+        session.clear()
+        session.add_message("user", "fresh")
+        assert session.get_history(max_messages=10) == [{"role": "user", "content": "fresh"}]
+
+    def test_history_window_slides(self):
+        session = Session(key="test:view_slide")
+        for i in range(100):
+            session.add_message("user", f"msg{i}")
+            history = session.get_history(max_messages=5)
+            assert [m["content"] for m in history] == [f"msg{j}" for j in range(max(i - 4, 0), i + 1)]
+        assert len(session._view) <= 10
@@ -0,0 +1,79 @@
+import asyncio
+
+from nanobot.agent.subagent import SubagentManager
+from nanobot.bus.queue import MessageBus
+from nanobot.config.schema import SubagentConfig
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class _ScriptedProvider(LLMProvider):
+    """Calls list_dir on the first request; later requests wait on `release` then answer."""
+
+    def __init__(self, release: asyncio.Event | None = None):
+        super().__init__()
+        self.release = release
+        self.seen: list[list[dict]] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        self.seen.append(list(messages))
+        if messages[-1]["role"] == "user":
+            return LLMResponse(
+                content="looking",
+                tool_calls=[ToolCallRequest(id="1", name="list_dir", arguments={"path": "."})],
+                usage={"total_tokens": 7},
+            )
+        if self.release is not None:
+            await self.release.wait()
+        return LLMResponse(content="found it", usage={"total_tokens": 3})
+
+    def get_default_model(self) -> str:
+        return "test"
+
+
+async def _wait_for(predicate, timeout: float = 2.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+async def test_interrupted_task_resumes_from_checkpoint(tmp_path) -> None:
+    checkpoints = tmp_path / "checkpoints"
+    blocked = _ScriptedProvider(asyncio.Event())
+    first = SubagentManager(blocked, tmp_path, MessageBus(), checkpoint_dir=checkpoints)
+    await first.spawn("find the file", label="search")
+    (record,) = first._tasks.values()
+    await _wait_for(lambda: len(blocked.seen) == 2)  # Tool ran; second LLM call is blocked
+
+    record.runner.cancel()  # Gateway shutdown
+    await asyncio.sleep(0)
+    assert (checkpoints / f"{record.id}.json").exists()
+
+    provider = _ScriptedProvider()
+    bus = MessageBus()
+    second = SubagentManager(provider, tmp_path, bus, checkpoint_dir=checkpoints)
+    assert await second.resume() == 1
+
+    announced = await asyncio.wait_for(bus.consume_inbound(), 2)
+    assert "found it" in announced.content
+    assert len(provider.seen) == 1  # Continued after the tool result instead of starting over
+    assert provider.seen[0][-1]["role"] == "tool"
+    status = second.get_status()[0]
+    assert (status["status"], status["iterations"], status["tokens"]) == ("ok", 2, 10)
+    await asyncio.sleep(0)
+    assert not list(checkpoints.glob("*.json"))
+
+
+async def test_progress_updates_go_to_origin_chat(tmp_path) -> None:
+    bus = MessageBus()
+    manager = SubagentManager(
+        _ScriptedProvider(), tmp_path, bus,
+        config=SubagentConfig(progress_updates=True, progress_interval_seconds=0, checkpoints=False),
+    )
+    await manager.spawn("find the file", label="search", origin_channel="telegram", origin_chat_id="42")
+    await asyncio.wait_for(bus.consume_inbound(), 2)
+
+    note = bus.outbound.get_nowait()
+    assert (note.channel, note.chat_id) == ("telegram", "42")
+    assert note.content == "⏳ search: step 1 (list_dir)"
+    assert bus.outbound.empty()
+    assert manager.checkpoints is None
@@ -0,0 +1,130 @@
+import asyncio
+import os
+
+from nanobot.agent.subagent import SubagentManager
+from nanobot.bus.queue import MessageBus
+from nanobot.config.schema import SubagentConfig
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class _Provider(LLMProvider):
+    """Finishes each task after `delay`, or keeps calling tools forever."""
+
+    def __init__(self, delay: float = 0.0, loop_tools: bool = False, tokens: int = 10):
+        super().__init__(api_key=None, api_base=None)
+        self.delay = delay
+        self.loop_tools = loop_tools
+        self.tokens = tokens
+        self.started: list[str] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        task = messages[-1]["content"] if messages[-1]["role"] == "user" else None
+        if task:
+            self.started.append(task)
+        await asyncio.sleep(self.delay)
+        usage = {"total_tokens": self.tokens}
+        if self.loop_tools:
+            return LLMResponse(
+                content="working",
+                tool_calls=[ToolCallRequest(id="1", name="list_dir", arguments={"path": "."})],
+                usage=usage,
+            )
+        return LLMResponse(content="done", usage=usage)
+
+    def get_default_model(self) -> str:
+        return "test"
+
+
+class _PidProvider(LLMProvider):
+    """Lists a directory once, then reports which process it ran in."""
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        if messages[-1]["role"] == "user":
+            return LLMResponse(
+                content=None,
+                tool_calls=[ToolCallRequest(id="1", name="list_dir", arguments={"path": "."})],
+                usage={"total_tokens": 5},
+            )
+        return LLMResponse(content=f"ran in {os.getpid()}", usage={"total_tokens": 5})
+
+    def get_default_model(self) -> str:
+        return "test"
+
+
+def _make_pid_provider() -> LLMProvider:
+    return _PidProvider()
+
+
+def _manager(tmp_path, provider, **config) -> tuple[SubagentManager, MessageBus]:
+    bus = MessageBus()
+    manager = SubagentManager(
+        provider, tmp_path, bus, config=SubagentConfig(**config), checkpoint_dir=tmp_path / "checkpoints",
+    )
+    return manager, bus
+
+
+async def _drain(bus: MessageBus, count: int, timeout: float = 2) -> list[str]:
+    return [(await asyncio.wait_for(bus.consume_inbound(), timeout)).content for _ in range(count)]
+
+
+async def test_caps_and_priority_order(tmp_path) -> None:
+    provider = _Provider(delay=0.05)
+    manager, bus = _manager(tmp_path, provider, max_concurrent=2, max_per_session=1)
+
+    await manager.spawn("a1", origin_chat_id="a")
+    await manager.spawn("a2", origin_chat_id="a", priority="low")
+    await manager.spawn("a3", origin_chat_id="a", priority="high")
+    reply = await manager.spawn("b1", origin_chat_id="b")
+
+    assert "queued" not in reply
+    assert manager.get_running_count() == 2
+    assert manager.get_queued_count() == 2
+    assert [t["status"] for t in manager.get_status("cli:a")] == ["running", "queued", "queued"]
+
+    await _drain(bus, 4)
+    assert provider.started == ["a1", "b1", "a3", "a2"]
+    assert manager.get_running_count() == manager.get_queued_count() == 0
+
+
+async def test_queue_limit_refuses_spawn(tmp_path) -> None:
+    manager, bus = _manager(tmp_path, _Provider(delay=0.05), max_concurrent=1, max_queued=1)
+
+    await manager.spawn("first")
+    assert "queued" in await manager.spawn("second")
+    assert (await manager.spawn("third")).startswith("Error")
+    await _drain(bus, 2)
+
+
+async def test_token_budget_and_timeout_stop_tasks(tmp_path) -> None:
+    manager, bus = _manager(tmp_path, _Provider(loop_tools=True, tokens=40), max_task_tokens=100)
+    await manager.spawn("loops")
+    (content,) = await _drain(bus, 1)
+    assert "token budget" in content
+    assert manager.get_status()[0]["status"] == "budget"
+    assert manager.get_status()[0]["iterations"] == 3
+
+    manager, bus = _manager(tmp_path, _Provider(delay=0.5), timeout_seconds=0.05)
+    await manager.spawn("slow")
+    (content,) = await _drain(bus, 1)
+    assert "did not finish" in content
+    await asyncio.sleep(0)
+    assert manager.get_status()[0]["status"] == "timeout"
+
+
+async def test_process_mode_runs_in_worker_and_reports_back(tmp_path) -> None:
+    bus = MessageBus()
+    manager = SubagentManager(
+        _PidProvider(), tmp_path, bus,
+        config=SubagentConfig(mode="process", workers=1),
+        provider_factory=_make_pid_provider,
+        checkpoint_dir=tmp_path / "checkpoints",
+    )
+    try:
+        await manager.spawn("where am I?")
+        (content,) = await _drain(bus, 1, timeout=30)  # Includes worker process start-up
+        worker_pid = int(content.split("ran in ")[1].split()[0])
+        assert worker_pid != os.getpid()
+        status = manager.get_status()[0]
+        assert (status["status"], status["iterations"], status["tokens"]) == ("ok", 2, 10)
+    finally:
+        manager.shutdown()
@@ -0,0 +1,86 @@
+import os
+from typing import Any
+
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.cache import ToolResultCache
+from nanobot.agent.tools.filesystem import EditFileTool, ListDirTool, ReadFileTool, WriteFileTool
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.tools.shell import ExecTool
+
+
+class CountingSearch(Tool):
+    cacheable = True
+    name = "search"
+    description = "fake web search"
+    parameters = {"type": "object", "properties": {"q": {"type": "string"}, "n": {"type": "integer"}}}
+
+    def __init__(self):
+        self.calls = 0
+
+    async def execute(self, **kwargs: Any) -> str:
+        self.calls += 1
+        return f"result {self.calls}"
+
+
+def _registry(tmp_path, **cache) -> ToolRegistry:
+    reg = ToolRegistry(cache=ToolResultCache(**cache))
+    for tool in (ReadFileTool(tmp_path), WriteFileTool(tmp_path), EditFileTool(tmp_path), ListDirTool(tmp_path)):
+        reg.register(tool)
+    reg.register(ExecTool(working_dir=str(tmp_path)))
+    return reg
+
+
+async def test_file_results_reused_until_file_changes(tmp_path) -> None:
+    reg = _registry(tmp_path)
+    target = tmp_path / "a.txt"
+    target.write_text("one")
+
+    assert await reg.execute("read_file", {"path": str(target)}) == "one"
+    assert await reg.execute("read_file", {"path": str(tmp_path / "." / "a.txt")}) == "one"
+    assert reg.cache.stats()["hits"] == 1
+
+    # Changed behind the agent's back: same size, different mtime
+    target.write_text("two")
+    os.utime(target, ns=(0, 10**9))
+    assert await reg.execute("read_file", {"path": str(target)}) == "two"
+
+    await reg.execute("list_dir", {"path": str(tmp_path)})
+    await reg.execute("edit_file", {"path": str(target), "old_text": "two", "new_text": "six"})
+    assert len(reg.cache) == 0  # Both the file and its directory listing were dropped
+    assert await reg.execute("read_file", {"path": str(target)}) == "six"
+
+    await reg.execute("exec", {"command": "true"})
+    assert len(reg.cache) == 0
+
+
+async def test_errors_are_not_cached(tmp_path) -> None:
+    reg = _registry(tmp_path)
+    missing = str(tmp_path / "later.txt")
+    assert (await reg.execute("read_file", {"path": missing})).startswith("Error")
+    await reg.execute("write_file", {"path": missing, "content": "now"})
+    assert await reg.execute("read_file", {"path": missing}) == "now"
+
+
+async def test_ttl_results_and_normalized_arguments(tmp_path) -> None:
+    reg = _registry(tmp_path, ttl=60)
+    search = CountingSearch()
+    reg.register(search)
+
+    assert await reg.execute("search", {"q": "x", "n": 1}) == "result 1"
+    assert await reg.execute("search", {"n": 1, "q": "x"}) == "result 1"
+    assert await reg.execute("search", {"q": "y"}) == "result 2"
+
+    reg.cache.ttl = 0
+    await reg.execute("search", {"q": "z"})
+    assert await reg.execute("search", {"q": "z"}) == "result 4"
+
+
+async def test_lru_eviction(tmp_path) -> None:
+    reg = _registry(tmp_path, max_entries=2)
+    search = CountingSearch()
+    reg.register(search)
+    for q in ("a", "b", "a", "c"):
+        await reg.execute("search", {"q": q})
+    assert search.calls == 3
+    await reg.execute("search", {"q": "b"})  # Evicted when "c" came in
+    assert search.calls == 4
@@ -0,0 +1,49 @@
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.tools.results import ReadResultTool, ResultStore
+
+
+def _store(tmp_path) -> ResultStore:
+    return ResultStore(tmp_path / "results", threshold=100, preview_chars=30)
+
+
+def test_small_results_pass_through(tmp_path) -> None:
+    store = _store(tmp_path)
+    assert store.spill("read_file", "short") == "short"
+    assert store.spill("read_result", "x" * 500) == "x" * 500
+    assert not (tmp_path / "results").exists()
+
+
+def test_large_result_is_replaced_by_preview_and_handle(tmp_path) -> None:
+    store = _store(tmp_path)
+    text = "".join(f"line {i}\n" for i in range(100))
+
+    spilled = store.spill("web_fetch", text)
+    assert spilled.startswith(text[:30])
+    assert len(spilled) < 300
+    handle = spilled.split("handle='")[1].split("'")[0]
+    assert handle.startswith("web_fetch-")
+    assert store.read(handle) == text
+
+    assert store.spill("web_fetch", text) == spilled  # Same content, same handle
+    assert len(list((tmp_path / "results").iterdir())) == 1
+    assert store.stats()["spilled"] == 2
+
+
+async def test_read_result_pages_through_stored_text(tmp_path) -> None:
+    store = _store(tmp_path)
+    text = "abcdefghij" * 25
+    handle = store.spill("exec", text).split("handle='")[1].split("'")[0]
+    reg = ToolRegistry()
+    reg.register(ReadResultTool(store))
+
+    first = await reg.execute("read_result", {"handle": handle, "offset": 30, "limit": 20})
+    assert text[30:50] in first
+    assert "continue with offset=50" in first
+
+    last = await reg.execute("read_result", {"handle": handle, "offset": 200})
+    assert last.endswith(text[200:])
+    assert "more chars" not in last
+
+    assert (await reg.execute("read_result", {"handle": handle, "offset": 250})).startswith("Error")
+    assert (await reg.execute("read_result", {"handle": "missing-0"})).startswith("Error: No stored result")
+    assert "must match pattern" in await reg.execute("read_result", {"handle": "../../etc/passwd"})
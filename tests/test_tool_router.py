@@ -0,0 +1,119 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.tools.router import ListToolsTool, ToolRouter, current_selection
+
+
+class _Tool(Tool):
+    def __init__(self, name: str, description: str):
+        self._name, self._description = name, description
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return self._description
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"query": {"type": "string"}}}
+
+    async def execute(self, **kwargs: Any) -> str:
+        return "ok"
+
+
+MCP_TOOLS = {
+    "mcp_github_create_issue": "Create a new issue in a GitHub repository",
+    "mcp_github_list_pulls": "List pull requests of a GitHub repository",
+    "mcp_weather_forecast": "Get the weather forecast for a city",
+    "mcp_calendar_add_event": "Add an event to the user's calendar",
+    "mcp_db_query": "Run a read-only SQL query against the analytics database",
+    "mcp_maps_directions": "Get driving directions between two places",
+}
+
+
+def _registry() -> ToolRegistry:
+    registry = ToolRegistry()
+    for name in ("read_file", "exec", "message"):
+        registry.register(_Tool(name, f"built-in {name}"))
+    for name, description in MCP_TOOLS.items():
+        registry.register(_Tool(name, description))
+    return registry
+
+
+def _names(definitions: list[dict]) -> set[str]:
+    return {d["function"]["name"] for d in definitions}
+
+
+@pytest.fixture(params=[True, False], ids=["embedding", "keywords"])
+def numpy_available(request, monkeypatch):
+    monkeypatch.setattr("nanobot.agent.memory_retrieval.NUMPY_AVAILABLE", request.param)
+
+
+async def test_turn_gets_core_tools_plus_relevant_mcp_tools(numpy_available) -> None:
+    registry = _registry()
+    router = ToolRouter(registry, max_tools=6)
+    registry.register(ListToolsTool(router))
+
+    selection = router.begin_turn("please open a github issue about the crash")
+    current_selection.set(selection)
+    sent = _names(selection.definitions())
+    assert {"read_file", "exec", "message", "list_tools", "mcp_github_create_issue"} <= sent
+    assert "mcp_weather_forecast" not in sent
+    assert len(sent) <= 6
+    assert selection.saved_tokens > 0
+
+    result = await registry.execute("list_tools", {"query": "weather forecast for a city"})
+    assert "mcp_weather_forecast" in result
+    assert "mcp_weather_forecast" in _names(selection.definitions())
+
+    next_turn = router.begin_turn("what's on my calendar")
+    assert "mcp_weather_forecast" not in _names(next_turn.definitions())
+    assert router.stats()["saved_tokens"] > 0
+
+
+async def test_concurrent_turns_keep_their_own_tools() -> None:
+    registry = _registry()
+    router = ToolRouter(registry, max_tools=6)
+    registry.register(ListToolsTool(router))
+    chat = router.begin_turn("please open a github issue about the crash")
+    started = asyncio.Event()
+
+    async def cron_turn() -> set[str]:
+        selection = router.begin_turn("weather forecast for a city")
+        current_selection.set(selection)
+        await registry.execute("list_tools", {"query": "driving directions between places"})
+        started.set()
+        return _names(selection.definitions())
+
+    async def chat_turn() -> set[str]:
+        current_selection.set(chat)
+        await started.wait()
+        return _names(chat.definitions())
+
+    chat_sent, cron_sent = await asyncio.gather(chat_turn(), cron_turn())
+    assert "mcp_github_create_issue" in chat_sent
+    assert not {"mcp_weather_forecast", "mcp_maps_directions"} & chat_sent
+    assert {"mcp_weather_forecast", "mcp_maps_directions"} <= cron_sent
+
+
+def test_small_tool_sets_are_sent_whole() -> None:
+    registry = _registry()
+    router = ToolRouter(registry, max_tools=20)
+    selection = router.begin_turn("hello")
+    assert selection.definitions() is registry.get_definitions()
+    assert router.stats()["saved_tokens"] == 0
+
+
+def test_core_tool_patterns() -> None:
+    router = ToolRouter(ToolRegistry(), core_tools=["mcp_github_*", "mcp_db_query"])
+    assert router.is_core("read_file")
+    assert router.is_core("mcp_github_list_pulls")
+    assert router.is_core("mcp_db_query")
+    assert not router.is_core("mcp_weather_forecast")
@@ -1,5 +1,7 @@
 from typing import Any
 
+import pytest
+
 from nanobot.agent.tools.base import Tool
 from nanobot.agent.tools.registry import ToolRegistry
 
@@ -81,8 +83,72 @@ def test_validate_params_ignores_unknown_fields() -> None:
     assert errors == []
 
 
+class StrictTool(SampleTool):
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "id": {"type": "string", "pattern": "^[a-z]+-[0-9]+$"},
+                "target": {
+                    "oneOf": [
+                        {"type": "string", "minLength": 1},
+                        {"type": "array", "items": {"type": "string"}},
+                    ]
+                },
+                "labels": {"type": "object", "additionalProperties": {"type": "integer"}},
+            },
+            "additionalProperties": False,
+        }
+
+
+def test_validate_params_pattern_one_of_and_additional_properties() -> None:
+    tool = StrictTool()
+    assert tool.validate_params({"id": "abc-12", "target": ["a"], "labels": {"x": 1}}) == []
+
+    errors = tool.validate_params({"id": "ABC", "target": 3, "labels": {"x": "1"}, "extra": 1})
+    assert any("id must match pattern" in e for e in errors)
+    assert any("target must match exactly one of 2 allowed schemas (matched 0)" in e for e in errors)
+    assert any("labels.x should be integer" in e for e in errors)
+    assert any("unexpected extra" in e for e in errors)
+
+
+def test_validator_is_compiled_once_per_tool() -> None:
+    tool = SampleTool()
+    tool.validate_params({"query": "hi", "count": 2})
+    validator = tool._validator
+    tool.validate_params({"query": "x"})
+    assert tool._validator is validator
+    assert SampleTool()._validator is None
+
+
 async def test_registry_returns_validation_error() -> None:
     reg = ToolRegistry()
     reg.register(SampleTool())
     result = await reg.execute("sample", {"query": "hi"})
     assert "Invalid parameters" in result
+
+
+def test_registry_caches_definitions_until_tools_change() -> None:
+    reg = ToolRegistry()
+    reg.register(SampleTool())
+    first = reg.get_definitions()
+    assert reg.get_definitions() is first
+
+    reg.unregister("sample")
+    assert reg.get_definitions() == []
+
+    reg.register(SampleTool())
+    reg.freeze()
+    with pytest.raises(RuntimeError):
+        reg.register(SampleTool())
+    assert reg.tool_names == ["sample"]
+
+
+def test_subagent_tools_are_shared_per_configuration(tmp_path) -> None:
+    from nanobot.agent.subagent_worker import subagent_tools
+
+    tools = subagent_tools(tmp_path, True, 60, None)
+    assert subagent_tools(tmp_path, True, 60, None) is tools
+    assert tools.frozen
+    assert subagent_tools(tmp_path, False, 60, None) is not tools
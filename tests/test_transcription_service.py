@@ -0,0 +1,146 @@
+import asyncio
+from pathlib import Path
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.base import BaseChannel
+from nanobot.config.schema import TranscriptionConfig
+from nanobot.providers.transcription import TranscriptionService, make_transcription_service
+
+
+class _FakeProvider:
+    def __init__(self, text: str = "hello", delay: float = 0.0):
+        self.text = text
+        self.delay = delay
+        self.calls: list[Path] = []
+        self.active = 0
+        self.peak = 0
+
+    async def transcribe(self, file_path) -> str:
+        self.calls.append(Path(file_path))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return self.text
+
+    async def aclose(self) -> None:
+        pass
+
+
+class _Channel(BaseChannel):
+    name = "fake"
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def send(self, msg: OutboundMessage) -> None:
+        pass
+
+
+def _audio(tmp_path: Path, name: str, data: bytes) -> Path:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+
+async def test_identical_audio_is_transcribed_once_and_cached(tmp_path) -> None:
+    provider = _FakeProvider(delay=0.01)
+    cache = tmp_path / "cache.jsonl"
+    service = TranscriptionService([provider], cache_path=cache)
+    a = _audio(tmp_path, "a.ogg", b"voice")
+    b = _audio(tmp_path, "b.ogg", b"voice")
+
+    first, second = await asyncio.gather(service.transcribe(a), service.transcribe(b))
+    assert (first, second) == ("hello", "hello")
+    assert len(provider.calls) == 1
+    await service.close()  # Writes transcripts still waiting for the batched flush
+
+    # Persisted cache survives a new service instance
+    other = TranscriptionService([_FakeProvider("different")], cache_path=cache)
+    assert await other.transcribe(a) == "hello"
+    await other.close()
+
+
+async def test_hashing_and_cache_writes_stay_off_the_event_loop(tmp_path, monkeypatch) -> None:
+    import threading
+
+    from nanobot.providers import transcription
+
+    monkeypatch.setattr(transcription, "CACHE_FLUSH_DELAY_S", 0.01)
+    hashed_on: list[threading.Thread] = []
+    original = TranscriptionService._audio_key
+    monkeypatch.setattr(
+        TranscriptionService, "_audio_key",
+        staticmethod(lambda path: hashed_on.append(threading.current_thread()) or original(path)),
+    )
+    cache = tmp_path / "cache.jsonl"
+    service = TranscriptionService([_FakeProvider()], cache_path=cache, cache_size=2)
+
+    future = service.submit(_audio(tmp_path, "a.ogg", b"one"))
+    assert not hashed_on  # submit only queued the file
+    assert await future == "hello"
+    assert hashed_on == [hashed_on[0]] and hashed_on[0] is not threading.main_thread()
+
+    for i in range(5):
+        await service.transcribe(_audio(tmp_path, f"{i}.ogg", f"more {i}".encode()))
+    await asyncio.sleep(0.05)
+    lines = cache.read_text().splitlines()
+    assert 0 < len(lines) <= 4  # Appended in batches and compacted past 2 * cache_size
+    await service.close()
+
+
+async def test_concurrency_is_bounded_and_overflow_is_dropped(tmp_path) -> None:
+    provider = _FakeProvider(delay=0.02)
+    service = TranscriptionService([provider], concurrency=2, max_queue=3)
+    paths = [_audio(tmp_path, f"{i}.ogg", f"voice {i}".encode()) for i in range(6)]
+
+    futures = [service.submit(p) for p in paths]
+    results = await asyncio.gather(*futures)
+
+    assert provider.peak <= 2
+    assert results.count("hello") >= 3
+    assert "" in results
+    await service.close()
+
+
+async def test_falls_back_to_next_provider(tmp_path) -> None:
+    failing, local = _FakeProvider(text=""), _FakeProvider(text="offline")
+    service = TranscriptionService([failing, local])
+
+    assert await service.transcribe(_audio(tmp_path, "a.ogg", b"x")) == "offline"
+    assert len(failing.calls) == len(local.calls) == 1
+    await service.close()
+
+
+def test_make_service_respects_engine(monkeypatch) -> None:
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.setattr("nanobot.providers.transcription.FASTER_WHISPER_AVAILABLE", False)
+
+    assert make_transcription_service(TranscriptionConfig(engine="off"), "key") is None
+    assert make_transcription_service(TranscriptionConfig(), "") is None
+    service = make_transcription_service(TranscriptionConfig(engine="groq"), "key")
+    assert [type(p).__name__ for p in service.providers] == ["GroqTranscriptionProvider"]
+
+
+async def test_channel_publishes_after_transcription_in_chat_order(tmp_path) -> None:
+    bus = MessageBus()
+    channel = _Channel(config=None, bus=bus)
+    channel.transcriber = TranscriptionService([_FakeProvider(text="spoken words", delay=0.05)])
+    voice = _audio(tmp_path, "v.ogg", b"voice")
+
+    await channel._handle_message("u1", "c1", "[voice]", media=[str(voice)], audio=[str(voice)])
+    await channel._handle_message("u1", "c1", "typed after")
+    await channel._handle_message("u2", "c2", "other chat")
+
+    # Intake never waited: the other chat's message is already published
+    first = await asyncio.wait_for(bus.consume_inbound(), 1)
+    assert first.chat_id == "c2"
+    second = await asyncio.wait_for(bus.consume_inbound(), 1)
+    third = await asyncio.wait_for(bus.consume_inbound(), 1)
+    assert second.content == "[voice]\n[transcription: spoken words]"
+    assert third.content == "typed after"
+    await channel.transcriber.close()
@@ -0,0 +1,122 @@
+"""Test preemption of in-flight turns by newer messages."""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.tools.base import Tool
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.session.manager import SessionManager
+
+
+class SlowTool(Tool):
+    """Tool that blocks until released and records that it completed."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.completed = 0
+
+    @property
+    def name(self) -> str:
+        return "slow"
+
+    @property
+    def description(self) -> str:
+        return "A slow tool."
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {}}
+
+    async def execute(self, **kwargs: Any) -> str:
+        self.started.set()
+        await self.release.wait()
+        self.completed += 1
+        return "slow result"
+
+
+class ScriptedProvider(LLMProvider):
+    """Calls the slow tool for 'task A' (or hangs on 'hang'), answers everything else."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls: list[list[dict]] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self.calls.append(messages)
+        current = messages[-1]["content"]
+        if current == "hang":
+            await asyncio.Event().wait()
+        if current == "task A":
+            return LLMResponse(content=None, tool_calls=[ToolCallRequest(id="t1", name="slow", arguments={})])
+        return LLMResponse(content=f"answer to {current}")
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+@pytest.fixture
+async def agent(tmp_path):
+    sessions = SessionManager(tmp_path)
+    sessions.sessions_dir = tmp_path
+    bus = MessageBus()
+    loop = AgentLoop(bus=bus, provider=ScriptedProvider(), workspace=tmp_path, session_manager=sessions)
+    task = asyncio.create_task(loop.run())
+    yield loop
+    loop.stop()
+    task.cancel()
+    await loop.consolidator.stop()
+
+
+def inbound(content: str) -> InboundMessage:
+    return InboundMessage(channel="test", sender_id="u", chat_id="c", content=content)
+
+
+async def test_running_tool_finishes_then_turn_is_folded(agent):
+    tool = SlowTool()
+    agent.tools.register(tool)
+
+    await agent.bus.publish_inbound(inbound("task A"))
+    await asyncio.wait_for(tool.started.wait(), 1)
+    await agent.bus.publish_inbound(inbound("actually B"))
+    await asyncio.sleep(0.05)
+    tool.release.set()
+
+    response = await asyncio.wait_for(agent.bus.consume_outbound(), 2)
+    assert response.content == "answer to actually B"
+    assert tool.completed == 1
+    # The follow-up LLM call for "task A" never happened; B saw A's partial progress
+    assert len(agent.provider.calls) == 2
+    history = " ".join(str(m.get("content")) for m in agent.provider.calls[-1])
+    assert "task A" in history and "Interrupted" in history and "slow result" in history
+    assert agent.bus.outbound.qsize() == 0
+
+
+async def test_pending_llm_call_abandoned(agent):
+    await agent.bus.publish_inbound(inbound("hang"))
+    await asyncio.sleep(0.05)
+    await agent.bus.publish_inbound(inbound("never mind"))
+
+    response = await asyncio.wait_for(agent.bus.consume_outbound(), 2)
+    assert response.content == "answer to never mind"
+
+
+async def test_other_sessions_do_not_preempt(agent):
+    tool = SlowTool()
+    agent.tools.register(tool)
+
+    await agent.bus.publish_inbound(inbound("task A"))
+    await asyncio.wait_for(tool.started.wait(), 1)
+    await agent.bus.publish_inbound(InboundMessage(channel="test", sender_id="u2", chat_id="other", content="hi"))
+    await asyncio.sleep(0.05)
+    tool.release.set()
+
+    first = await asyncio.wait_for(agent.bus.consume_outbound(), 2)
+    second = await asyncio.wait_for(agent.bus.consume_outbound(), 2)
+    assert (first.chat_id, second.chat_id) == ("c", "other")
+    assert second.content == "answer to hi"